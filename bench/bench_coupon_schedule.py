@@ -0,0 +1,60 @@
+"""
+Time of generating coupon schedules for synthetic securities without a cash-flow table:
+one coupon_schedules call per security (what a single-page parse does) vs one batch for the
+whole run (what merge_security_frames does).
+
+    python bench/bench_coupon_schedule.py --securities 10000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kap.coupon_schedule import coupon_schedules
+
+def synthetic_specs(n, seed=0):
+    rng = random.Random(seed)
+    specs = []
+    for i in range(n):
+        frequency = rng.choice([1, 2, 4, 12])
+        count = rng.randrange(2, 4 * frequency + 1)
+        issue_date = datetime(2024, 1, 2) + timedelta(days=rng.randrange(365))
+        specs.append({
+            "ISIN_CODE": f"TRS{i:08d}X",
+            "ISSUE_DATE": issue_date,
+            "MATURITY_DATE": issue_date + timedelta(days=round(count * 365 / frequency)),
+            "FREQUENCY": frequency,
+            "COUPON_COUNT": count,
+            "COUPON": rng.uniform(30, 55),
+            "DAY_YEAR_BASIS": rng.choice(["ACTL365", "EU30360", "US30360"]),
+            "COUPON_DATES": None,
+        })
+    return specs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--securities", type=int, default=10000)
+    args = parser.parse_args()
+
+    specs = synthetic_specs(args.securities)
+
+    t0 = time.perf_counter()
+    single = [coupon_schedules([spec])[0] for spec in specs]
+    single_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    batch = coupon_schedules(specs)
+    batch_s = time.perf_counter() - t0
+
+    assert single == batch
+    rows = sum(len(schedule) for schedule in batch)
+    print(f"{args.securities} securities, {rows} coupon rows")
+    print(f"per security: {single_s:.3f}s")
+    print(f"batched:      {batch_s:.3f}s ({single_s / batch_s:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Export time and file size of the headless writer backends for a large Security/SecurityCoupon
+workbook and an EQUITY price sheet, with pandas' openpyxl to_excel as the in-memory reference.
+
+    python bench/bench_export.py --rows 100000
+"""
+import argparse
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_kap_frames import synthetic_records, build_columnar
+from common.writers import Sheet, WRITERS, export_sheets
+from kap.kap import kap_sheets
+
+def price_sheet(rows):
+    dates = pd.bdate_range("2000-01-03", periods=rows, name="RECORD_DATE")
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.01, rows)))
+    data = pd.DataFrame({
+        "ASSET_NAME": "AAPL_US", "CURRENCY_CODE": "USD", "MARKET_NAME": "SP500",
+        "PRICE_OPEN": close * 0.99, "PRICE_HIGH": close * 1.01, "PRICE_LOW": close * 0.98, "PRICE_CLOSE": close,
+        "DATA_SOURCE": "BLOOMBERG", "DATA_TYPE": "EOD", "RECORD_TIME": None,
+    }, index=dates)
+    return [Sheet("EQUITY", data, {})]
+
+def write_openpyxl(sheets, output_base):
+    path = output_base + ".xlsx"
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for sheet in sheets:
+            sheet.df.to_excel(writer, sheet_name=sheet.name)
+    return [path]
+
+def measure(write, sheets, output_base):
+    # Timed without tracemalloc, which slows Python code down; peak memory comes from a second run
+    t0 = time.perf_counter()
+    paths = write(sheets, output_base)
+    elapsed = time.perf_counter() - t0
+    tracemalloc.start()
+    write(sheets, output_base)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, sum(os.path.getsize(p) for p in paths)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    df_security, df_security_coupon = build_columnar(synthetic_records(args.rows))
+    workloads = {
+        "kap": kap_sheets(df_security, df_security_coupon),
+        "yahoo": price_sheet(args.rows),
+    }
+    backends = {}
+    for name in WRITERS:
+        module = {"xlsx": "xlsxwriter", "parquet": "pyarrow"}.get(name)
+        if module is None or importlib.util.find_spec(module) is not None:
+            backends[name] = lambda sheets, base, name=name: export_sheets(sheets, base, name)
+    if importlib.util.find_spec("openpyxl") is not None:
+        backends["openpyxl to_excel"] = write_openpyxl
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for workload, sheets in workloads.items():
+            rows = sum(len(sheet.df) for sheet in sheets)
+            print(f"{workload}: {rows} rows in {len(sheets)} sheet(s)")
+            for name, write in backends.items():
+                elapsed, peak, size = measure(write, sheets, os.path.join(tmp, f"{workload}_{name.split()[0]}"))
+                print(f"  {name:18s}: {elapsed:7.2f}s  peak={peak / 2**20:7.1f} MiB  size={size / 2**20:6.1f} MiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Serial vs concurrent company-page fetching in get_halkarz_info against a local stand-in for
+halkarz.com. Both runs must return the same frame and company_links. An incremental rerun
+against the store written by the first run must not fetch any company page.
+
+    python bench/bench_halkarz_fetch.py --listings 200 --latency 0.05 --workers 8
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from common import http_client
+from halkarz import halkarz
+from halkarz.halkarz_store import HalkarzStore
+from halkarz_fixtures import halkarz_routes
+from standin import StandinServer
+
+def run(server, workers, known_links=None):
+    http_client._default_client = None  # no ETags from the previous run
+    server.reset_counts()
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        df, company_links = halkarz.get_halkarz_info(workers=workers, known_links=known_links)
+    return time.perf_counter() - t0, server.request_count, df, company_links
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--listings", type=int, default=200)
+    parser.add_argument("--new-ratio", type=float, default=1.0)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    routes, _ = halkarz_routes(args.listings, new_ratio=args.new_ratio)
+    with StandinServer(routes, latency=args.latency) as server, tempfile.TemporaryDirectory() as tmp:
+        halkarz.HALKARZ_BASE_URL = server.base_url
+        serial_time, serial_requests, serial_df, serial_links = run(server, 1)
+        concurrent_time, concurrent_requests, concurrent_df, concurrent_links = run(server, args.workers)
+
+        store = HalkarzStore(os.path.join(tmp, "halkarz.sqlite"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            halkarz.store_new_companies(concurrent_df, concurrent_links, store, os.path.join(tmp, "halkarz.json"))
+        incremental_time, incremental_requests, incremental_df, _ = run(server, args.workers, store.link_index())
+        store.close()
+        assert len(incremental_df) == 0, "known listings were fetched again"
+
+    assert serial_df.equals(concurrent_df) and list(serial_links.items()) == list(concurrent_links.items()), "outputs differ"
+    print(f"listings={args.listings} new={len(serial_df)} latency={args.latency}s workers={args.workers}")
+    print(f"serial     : {serial_time:7.3f}s  requests={serial_requests}")
+    print(f"concurrent : {concurrent_time:7.3f}s  requests={concurrent_requests}  speedup={serial_time / concurrent_time:.1f}x")
+    print(f"incremental: {incremental_time:7.3f}s  requests={incremental_requests}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Refreshing the "Hazırlanıyor..." first trade dates of a HalkarzStore against a local stand-in
+for halkarz.com: serial vs concurrent fetching of the pending company pages, then a second
+concurrent run in which the pages still pending are answered 304 from the stored validators.
+Parse time of a whole-page BeautifulSoup vs the article.single-page SoupStrainer is reported per page.
+
+    python bench/bench_halkarz_pending.py --pending 300 --latency 0.05 --workers 8
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+from bs4 import BeautifulSoup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from common import http_client
+from halkarz import update_biit
+from halkarz.halkarz_store import HalkarzStore
+from halkarz_fixtures import pending_routes
+from standin import StandinServer
+
+def run(server, store, workers):
+    http_client._default_client = None
+    server.reset_counts()
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        updated = update_biit.update_bist_ilk_islem_tarihi(store, workers=workers)
+    return time.perf_counter() - t0, server.request_count, server.not_modified_count, updated
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pending", type=int, default=300)
+    parser.add_argument("--ready-ratio", type=float, default=0.5)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    routes, data = pending_routes(args.pending, args.ready_ratio)
+    with StandinServer(routes, latency=args.latency) as server, tempfile.TemporaryDirectory() as tmp:
+        entries = json.loads(json.dumps(data).replace("{{BASE_URL}}", server.base_url))
+        results = {}
+        for name, workers in [("serial", 1), ("concurrent", args.workers)]:
+            store = HalkarzStore(os.path.join(tmp, f"{name}.sqlite"))
+            store.add(entries)
+            results[name] = run(server, store, workers)
+            if name == "concurrent":
+                results["concurrent, rerun"] = run(server, store, workers)
+                remaining = len(store.pending())
+            store.close()
+
+    pages = [body.decode("utf-8") for _, body in routes.values()]
+    t0 = time.perf_counter()
+    for page in pages:
+        BeautifulSoup(page, "html.parser").find("article", class_="single-page").find_all("tr")
+    full_parse = (time.perf_counter() - t0) / len(pages)
+    t0 = time.perf_counter()
+    for page in pages:
+        update_biit.first_trade_date(page)
+    strained_parse = (time.perf_counter() - t0) / len(pages)
+
+    print(f"pending={args.pending} latency={args.latency}s workers={args.workers} still pending after refresh={remaining}")
+    for name, (elapsed, requests, not_modified, updated) in results.items():
+        print(f"{name:<18}: {elapsed:7.3f}s  requests={requests}  304s={not_modified}  updated={updated}")
+    print(f"parse per page    : whole page {full_parse * 1000:.2f} ms, SoupStrainer {strained_parse * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    main()
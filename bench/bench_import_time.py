@@ -0,0 +1,65 @@
+"""
+Cold import time of the scraper modules, each in a fresh interpreter, vs the eager imports
+they did before (the module plus every heavy dependency it uses). Importing a module must not
+load any heavy dependency; a helper that does not need one must not load it either.
+
+    python bench/bench_import_time.py --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = ["pandas", "numpy", "pyarrow", "bs4", "xlwings", "yfinance", "requests"]
+
+# module, its heavy dependencies, and a helper call that must stay light
+MODULES = [
+    ("kap.kap", ["pandas", "numpy", "bs4", "xlwings", "requests"], "european_to_float('1.234,5')"),
+    ("yahoo.yahoo", ["pandas", "numpy", "pyarrow", "xlwings", "yfinance"], "normalize_ticker(' thyao ')"),
+    ("halkarz.halkarz", ["pandas", "bs4", "requests"], "european_to_float('1.234,5')"),
+    ("halkarz.update_biit", ["bs4", "requests"], None),
+]
+
+PROBE = """
+import importlib, json, sys, time
+heavy, eager, module_name, call = json.loads(sys.argv[1])
+t0 = time.perf_counter()
+for name in eager:
+    importlib.import_module(name)
+module = importlib.import_module(module_name)
+elapsed = time.perf_counter() - t0
+if call:
+    eval(call, vars(module))
+print(json.dumps({"elapsed": elapsed, "loaded": [name for name in heavy if name in sys.modules]}))
+"""
+
+def probe(module_name, eager, call):
+    args = json.dumps([HEAVY, eager, module_name, call])
+    out = subprocess.run([sys.executable, "-c", PROBE, args], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+def available(name):
+    return subprocess.run([sys.executable, "-c", f"import {name}"], capture_output=True).returncode == 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    installed = {name for name in HEAVY if available(name)}
+    print(f"repeat={args.repeat} python={sys.version.split()[0]} not installed: {sorted(set(HEAVY) - installed) or 'none'}")
+    for module_name, deps, call in MODULES:
+        lazy = [probe(module_name, [], call) for _ in range(args.repeat)]
+        loaded = sorted(set().union(*(run["loaded"] for run in lazy)))
+        assert not loaded, f"{module_name} loaded {loaded}"
+        eager = [probe(module_name, [name for name in deps if name in installed], None) for _ in range(args.repeat)]
+        lazy_ms = statistics.median(run["elapsed"] for run in lazy) * 1000
+        eager_ms = statistics.median(run["elapsed"] for run in eager) * 1000
+        print(f"{module_name:<20}: lazy {lazy_ms:7.1f} ms  eager {eager_ms:7.1f} ms  speedup={eager_ms / lazy_ms:.0f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Backfill throughput over a disclosureIndex range against a local stand-in for kap.org.tr:
+page parsing in one worker process vs one per core, then a resumed run that finds everything
+checkpointed.
+
+    python bench/bench_kap_backfill.py --disclosures 2000 --latency 0.02
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from kap import kap, kap_backfill
+from kap.kap_store import KapStore
+from kap_fixtures import kap_routes
+from standin import StandinServer
+
+def run(disclists, db_path, parse_workers, fetch_workers):
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        stored = kap_backfill.backfill(disclists, db_path, fetch_workers=fetch_workers, parse_workers=parse_workers, replace=False, issuances_only=True)
+    return time.perf_counter() - t0, stored
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--disclosures", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--fetch-workers", type=int, default=32)
+    parser.add_argument("--parse-workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    routes, issue_indices = kap_routes(args.disclosures, noise_ratio=0.2)
+    disclists = kap_backfill.index_range(min(issue_indices), max(issue_indices))
+    print(f"{len(disclists)} disclosureIndex values, {len(issue_indices)} bond pages, latency={args.latency}s")
+
+    with StandinServer(routes, latency=args.latency) as server, tempfile.TemporaryDirectory() as tmp:
+        kap.KAP_BASE_URL = server.base_url
+        for parse_workers in dict.fromkeys([1, args.parse_workers]):
+            db_path = os.path.join(tmp, f"backfill_{parse_workers}.sqlite")
+            elapsed, stored = run(disclists, db_path, parse_workers, args.fetch_workers)
+            print(f"parse_workers={parse_workers:<3} {elapsed:7.2f}s  {stored} securities  {len(disclists) / elapsed * 60:9.0f} disclosures/min")
+
+        server.reset_counts()
+        elapsed, stored = run(disclists, db_path, args.parse_workers, args.fetch_workers)
+        store = KapStore(db_path)
+        securities = len(store.load()[0])
+        store.close()
+        print(f"resumed run       {elapsed:7.2f}s  {stored} new securities, {server.request_count} requests, {securities} stored in total")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Peak memory and time to the first bond disclosure when reading a large disclosures feed:
+json.loads of the whole response (the previous parse_disclosures) vs the streaming
+iter_disclosures, against a local stand-in for kap.org.tr.
+
+    python bench/bench_kap_feed.py --disclosures 20000 --noise-ratio 10
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common.http_client import default_client
+from kap import kap
+from kap_fixtures import kap_routes
+from standin import StandinServer
+
+def full_load(issue_only):
+    # The previous pattern: the whole body, then the whole decoded list, then the filter
+    response = default_client().get(f"{kap.KAP_BASE_URL}/tr/api/disclosures", conditional=False)
+    basic_data = [disclosure["basic"] for disclosure in json.loads(response.text)]
+    for disc in basic_data:
+        infolist = kap.disclosure_params(disc, issue_only)
+        if infolist is not None:
+            yield infolist
+
+def streaming(issue_only):
+    return kap.iter_disclosures(issue_only)
+
+def measure(read):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    first = None
+    count = 0
+    for _ in read(True):
+        if first is None:
+            first = time.perf_counter() - t0
+        count += 1
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first, elapsed, peak, count
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--disclosures", type=int, default=20000)
+    parser.add_argument("--noise-ratio", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        routes, _ = kap_routes(args.disclosures, noise_ratio=args.noise_ratio)
+    routes = {"/tr/api/disclosures": routes["/tr/api/disclosures"]}
+    size = len(routes["/tr/api/disclosures"][1])
+    print(f"feed: {size / 2**20:.1f} MiB, {args.disclosures} issuances among {int(args.disclosures * (1 + args.noise_ratio))} items")
+
+    with StandinServer(routes) as server:
+        kap.KAP_BASE_URL = server.base_url
+        for name, read in [("json.loads", full_load), ("streaming", streaming)]:
+            first, elapsed, peak, count = measure(read)
+            print(f"{name:<11} first={first * 1000:8.1f}ms  total={elapsed:6.2f}s  peak={peak / 2**20:7.1f} MiB  disclosures={count}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Serial vs concurrent Bildirim page fetching against a local stand-in for kap.org.tr.
+
+    python bench/bench_kap_fetch.py --disclosures 100 --latency 0.05 --workers 8
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from kap import kap
+from kap_fixtures import kap_routes
+from standin import StandinServer
+
+def run(workers, per_host):
+    cache = kap.DisclosureCache()
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # kap prints every parsed cash-flow table
+        df_security, df_security_coupon = kap.merge_disclosures(True, cache, workers=workers, per_host=per_host)
+    return time.perf_counter() - t0, cache.fetch_count, df_security, df_security_coupon
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--disclosures", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--per-host", type=int, default=8)
+    args = parser.parse_args()
+
+    routes, _ = kap_routes(args.disclosures)
+    with StandinServer(routes, latency=args.latency) as server:
+        kap.KAP_BASE_URL = server.base_url
+
+        serial_time, serial_fetches, serial_sec, serial_cpn = run(1, 1)
+        concurrent_time, concurrent_fetches, conc_sec, conc_cpn = run(args.workers, args.per_host)
+
+    assert serial_sec.index.equals(conc_sec.index) and serial_cpn.index.equals(conc_cpn.index), "row order differs"
+    print(f"disclosures={args.disclosures} latency={args.latency}s workers={args.workers} per_host={args.per_host}")
+    print(f"serial     : {serial_time:7.3f}s  fetches={serial_fetches}")
+    print(f"concurrent : {concurrent_time:7.3f}s  fetches={concurrent_fetches}  speedup={serial_time / concurrent_time:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Time and memory of building the Security/SecurityCoupon frames for synthetic disclosures:
+one-row DataFrames grown with pd.concat (the previous merge_disclosures) vs the columnar
+RecordBuilder.
+
+    python bench/bench_kap_frames.py --disclosures 10000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kap.kap_frames import RecordBuilder, SECURITY_SCHEMA, COUPON_SCHEMA
+
+def synthetic_records(n, seed=0):
+    rng = random.Random(seed)
+    for i in range(n):
+        isin = f"TRS{i:08d}X"
+        issue_date = datetime(2024, 1, 2) + timedelta(days=rng.randrange(365))
+        coupons = rng.choice([0, 1, 2, 4, 8])
+        security = {
+            "ISIN_CODE": isin,
+            "INSTRUMENT_TYPE": rng.choice(["CORP_FIXED_COUPON", "CORP_FLOATING", "CORP_DISCOUNTED", "EUROBOND"]),
+            "MATURITY_DATE": issue_date + timedelta(days=91 * max(coupons, 1)),
+            "CURRENCY": rng.choice(["TRY", "TRY", "TRY", "USD", "EUR"]),
+            "FREQUENCY": 4 if coupons > 1 else coupons,
+            "COUPON": rng.uniform(30, 55),
+            "SPREAD": 0,
+            "ISSUER_CODE": rng.choice(["AKBNK", "GARAN", "YKBNK", "ISCTR"]),
+            "ISSUE_INDEX": 0,
+            "ISSUE_DATE": issue_date,
+            "DAY_YEAR_BASIS": rng.choice(["ACTL365", "EU30360", "US30360"]),
+            "ISSUE_PRICE": rng.uniform(80, 100),
+            "totalIssuedAmount": float(rng.randrange(10, 500) * 1_000_000),
+            "securityType": None,
+            "fundUser": None,
+        }
+        coupon_records = [
+            {"ISIN_CODE": isin, "COUPON_DATE": issue_date + timedelta(days=91 * k), "COUPON_RATE": rng.uniform(7, 14)}
+            for k in range(1, coupons + 1)
+        ]
+        yield security, coupon_records
+
+def build_concat(records):
+    # The previous pattern: one object-dtype frame per disclosure, concatenated in the loop
+    flag = True
+    for security, coupon_records in records:
+        df_security_new = pd.Series(security).to_frame().T.set_index("ISIN_CODE")
+        df_security_coupon_new = pd.DataFrame(coupon_records, columns=list(COUPON_SCHEMA)).set_index("ISIN_CODE")
+        if flag:
+            df_security, df_security_coupon = df_security_new, df_security_coupon_new
+            flag = False
+        else:
+            df_security = pd.concat([df_security, df_security_new])
+            df_security_coupon = pd.concat([df_security_coupon, df_security_coupon_new])
+    return df_security, df_security_coupon
+
+def build_columnar(records):
+    securities = RecordBuilder(SECURITY_SCHEMA)
+    coupons = RecordBuilder(COUPON_SCHEMA)
+    for security, coupon_records in records:
+        securities.append(security)
+        coupons.extend(coupon_records)
+    return securities.to_frame(), coupons.to_frame()
+
+def measure(build, records):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    df_security, df_security_coupon = build(records)
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    size = df_security.memory_usage(deep=True).sum() + df_security_coupon.memory_usage(deep=True).sum()
+    return elapsed, peak, size, len(df_security), len(df_security_coupon)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--disclosures", type=int, default=10000)
+    args = parser.parse_args()
+
+    records = list(synthetic_records(args.disclosures))
+    print(f"disclosures={args.disclosures}")
+    for name, build in [("concat", build_concat), ("columnar", build_columnar)]:
+        elapsed, peak, size, n_security, n_coupon = measure(build, records)
+        print(f"{name:9s}: {elapsed:8.3f}s  peak={peak / 2**20:8.1f} MiB  frames={size / 2**20:6.2f} MiB  "
+              f"rows={n_security}/{n_coupon}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Per-page parse time of Bildirim pages: the original per-label scan vs the single-pass index
+for each available parser backend. Every backend is checked to produce the same paramdict
+and cash-flow rows as the original scan.
+
+    python bench/bench_kap_parse.py --pages 200
+"""
+import argparse
+import importlib.util
+import os
+import random
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from kap import kap
+from kap_fixtures import bildirim_page
+
+def legacy_index(html_content):
+    # The lookups get_security_params did before the single-pass index
+    soup = BeautifulSoup(html_content, 'html.parser')
+    paramdict = {}
+    for label in kap.SECURITY_LABELS:
+        param = None
+        for row in soup.find_all("tr"):
+            label_div = row.find("div", class_="bold font14")
+            if label_div and label in label_div.text:
+                param = row.find("div", class_="gwt-HTML control-label lineheight-32px").text.strip()
+                break
+        paramdict[label] = param
+
+    cashflow_rows = None
+    if len(soup.find_all("table")) >= 10:
+        rows = soup.find_all("table")[5].find_all("tr")
+        cashflow_rows = [[cell.text.strip() for cell in row.find_all("td")] for row in rows]
+    return paramdict, len(soup.find_all("table")), cashflow_rows
+
+def available_backends():
+    backends = ["html.parser"]
+    if importlib.util.find_spec("lxml") is not None:
+        backends.append("lxml")
+    if importlib.util.find_spec("selectolax") is not None:
+        backends.append("selectolax")
+    return backends
+
+def time_per_page(func, pages, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for page in pages:
+            func(page)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(pages)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    pages = []
+    for i in range(args.pages):
+        cashflow = i % 3 != 0
+        pages.append(bildirim_page(1_300_000 + i, rng, cashflow=cashflow, coupons=rng.choice([2, 4, 8]) if cashflow else rng.choice([0, 1])))
+
+    expected = [legacy_index(page) for page in pages]
+    results = {"legacy (html.parser)": time_per_page(legacy_index, pages, args.repeat)}
+    for backend in available_backends():
+        produced = [kap.index_disclosure_page(page, backend) for page in pages]
+        assert produced == expected, f"{backend} output differs from the original scan"
+        results[f"single-pass ({backend})"] = time_per_page(lambda page: kap.index_disclosure_page(page, backend), pages, args.repeat)
+
+    baseline = results["legacy (html.parser)"]
+    print(f"pages={args.pages}")
+    for name, seconds in results.items():
+        print(f"{name:28s}: {seconds * 1000:8.3f} ms/page  ({baseline / seconds:4.1f}x)")
+
+if __name__ == "__main__":
+    main()
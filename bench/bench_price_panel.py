@@ -0,0 +1,83 @@
+"""
+Memory of multi-asset price output in the sheet layout of yf_batch vs the compact panel
+(float64 and float32 prices), per million rows, and the time and size of its Parquet/Arrow export.
+
+    python bench/bench_price_panel.py --assets 400 --days 2500
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from yahoo import yahoo
+from yahoo.price_panel import compact_panel, panel_table, write_panel
+
+def sheet_rows(assets, days, seed=0):
+    """
+    Rows in the sheet layout for assets x days business days, built per asset with
+    format_price_frame and concatenated like batch_rows does.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2014-01-02", periods=days)
+    frames = []
+    for i in range(assets):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, days)))
+        data = pd.DataFrame({"Open": close * 0.99, "High": close * 1.01, "Low": close * 0.98, "Close": close,
+                             "Adj Close": close, "Volume": rng.integers(10**5, 10**7, days)}, index=dates)
+        data["ASSET_NAME"] = f"T{i:04d}_US"
+        frames.append(yahoo.format_price_frame(data, "USD", "SP500"))
+    return pd.concat(frames)
+
+def per_million(nbytes, rows):
+    return nbytes / rows * 1e6 / 2**20
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--assets", type=int, default=400)
+    parser.add_argument("--days", type=int, default=2500)
+    args = parser.parse_args()
+
+    data = sheet_rows(args.assets, args.days)
+    rows = len(data)
+    print(f"{rows} rows ({args.assets} assets x {args.days} days)")
+    print(f"{'layout':<16} {'MiB / 1M rows':>14} {'build':>8} {'to Arrow':>9} {'parquet':>9} {'size MiB':>9}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        layouts = [("sheet", None), ("panel float64", "float64"), ("panel float32", "float32")]
+        for name, price_dtype in layouts:
+            t0 = time.perf_counter()
+            frame = data if price_dtype is None else compact_panel(data, price_dtype)
+            build_s = time.perf_counter() - t0
+            memory = frame.memory_usage(deep=True, index=True).sum()
+
+            t0 = time.perf_counter()
+            if price_dtype is None:
+                table = pa.Table.from_pandas(frame)
+            else:
+                table = panel_table(frame)
+            arrow_s = time.perf_counter() - t0
+
+            path = os.path.join(tmp, name.replace(" ", "_") + ".parquet")
+            t0 = time.perf_counter()
+            if price_dtype is None:
+                frame.to_parquet(path)
+            else:
+                write_panel(frame, path)
+            write_s = time.perf_counter() - t0
+            print(f"{name:<16} {per_million(memory, rows):14.1f} {build_s:7.2f}s {arrow_s:8.3f}s {write_s:8.2f}s "
+                  f"{os.path.getsize(path) / 2**20:9.1f}")
+
+            if price_dtype is not None:
+                shared = table.column("PRICE_CLOSE").chunk(0).buffers()[1].address == frame["PRICE_CLOSE"].to_numpy().ctypes.data
+                assert shared, "price buffer was copied"
+
+if __name__ == "__main__":
+    main()
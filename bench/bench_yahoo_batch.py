@@ -0,0 +1,153 @@
+"""
+Refreshing a universe of tickers one yf_xw call at a time vs one yf_batch call, against a
+local stand-in for Yahoo Finance. The stand-in batch download fetches its symbols over a
+thread pool, like yf.download(threads=True) does. Both runs must write the same rows.
+A second yf_batch run then resolves every ticker from the ticker cache and reads the prices
+from the price store, and a daily refresh of a store filled a week earlier only downloads the
+missing days. The refreshed output must equal the full download.
+
+    python bench/bench_yahoo_batch.py --tickers 500 --latency 0.02
+"""
+import argparse
+import contextlib
+import glob
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from standin import StandinServer
+from yahoo import yahoo
+from yahoo_fixtures import parse_chart, price_csv, yahoo_routes
+
+HOLIDAYS_FILEPATH = os.path.join(ROOT, "yahoo", "riskfree_holiday.xlsx")
+START, END = "02.01.2024", "31.12.2024"
+WEEK_EARLIER = "24.12.2024"
+
+def universe(n, seed=0):
+    """
+    n tickers spread over the probe chain, with the symbols the stand-in serves for them.
+    """
+    rng = random.Random(seed)
+    tickers, symbols = [], []
+    commodities = list(dict.fromkeys(yahoo.COMMODITY_SYMBOLS.values()))
+    for i in range(n):
+        kind = rng.choices(["bist", "us", "index", "commodity", "unknown"], [40, 30, 15, 10, 5])[0]
+        name = f"t{i:04d}"
+        if kind == "bist":
+            symbols.append(f"{name.upper()}.IS")
+        elif kind == "us":
+            symbols.append(name.upper())
+        elif kind == "index":
+            symbols.append(f"^{name.upper()}")
+        elif kind == "commodity":
+            key = rng.choice(list(yahoo.COMMODITY_SYMBOLS))
+            name = f"{key}{i}"
+            symbols.append(yahoo.COMMODITY_SYMBOLS[key])
+        tickers.append(name)
+    return tickers, sorted(set(symbols)) + [symbol for symbol in commodities if symbol not in symbols]
+
+def stand_in_downloads(base_url):
+    session = requests.Session()
+    empty = pd.DataFrame(columns=["Open", "High", "Low", "Close", "Adj Close", "Volume"])
+
+    def download_prices(symbol, start_date, end_date):
+        response = session.get(f"{base_url}/v8/finance/chart/{symbol.upper()}")
+        if response.status_code != 200:
+            return empty.copy()
+        data = parse_chart(response.json())
+        return data[(data.index >= pd.Timestamp(start_date)) & (data.index < pd.Timestamp(end_date))]  # end is exclusive, as in yf.download
+
+    def download_batch(symbols, start_date, end_date):
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            frames = dict(zip(symbols, executor.map(lambda symbol: download_prices(symbol, start_date, end_date), symbols)))
+        return {symbol: frame for symbol, frame in frames.items() if len(frame) > 0}
+
+    def existing_symbols(symbols):
+        return {symbol for symbol in symbols if session.get(f"{base_url}/v8/finance/chart/{symbol.upper()}").status_code == 200}
+
+    return download_prices, download_batch, existing_symbols
+
+def read_sheets(paths):
+    sheets = {}
+    for path in paths:
+        sheet = os.path.basename(path).rsplit("_", 1)[1][:-4]
+        sheets.setdefault(sheet, []).append(pd.read_csv(path))
+    return {sheet: pd.concat(frames, ignore_index=True) for sheet, frames in sheets.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    tickers, symbols = universe(args.tickers)
+    routes = yahoo_routes({symbol: price_csv(symbol) for symbol in symbols})
+
+    with StandinServer(routes, latency=args.latency) as server, tempfile.TemporaryDirectory() as tmp:
+        yahoo.download_prices, yahoo.download_batch, yahoo.existing_symbols = stand_in_downloads(server.base_url)
+
+        yahoo.ticker_cache = yahoo.TickerCache(os.path.join(tmp, "serial_tickers.sqlite"))
+        yahoo.price_store = yahoo.PriceStore(os.path.join(tmp, "serial_prices"))
+        serial_dir = os.path.join(tmp, "serial") + os.sep
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for ticker in tickers:
+                try:
+                    yahoo.yf_xw(ticker, START, END, serial_dir, HOLIDAYS_FILEPATH, backend="csv")
+                except ValueError:
+                    pass
+        serial_time, serial_requests = time.perf_counter() - t0, server.request_count
+
+        server.reset_counts()
+        yahoo.ticker_cache = yahoo.TickerCache(os.path.join(tmp, "batch_tickers.sqlite"))
+        yahoo.price_store = yahoo.PriceStore(os.path.join(tmp, "batch_prices"))
+        batch_dir = os.path.join(tmp, "batch") + os.sep
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            paths, missing = yahoo.yf_batch(tickers, START, END, batch_dir, HOLIDAYS_FILEPATH, backend="csv")
+        batch_time, batch_requests = time.perf_counter() - t0, server.request_count
+
+        # Same batch again: every ticker resolves from the ticker cache and reads from the price store
+        server.reset_counts()
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            warm_paths, _ = yahoo.yf_batch(tickers, START, END, os.path.join(tmp, "warm") + os.sep, HOLIDAYS_FILEPATH, backend="csv")
+        warm_time, warm_requests = time.perf_counter() - t0, server.request_count
+
+        # Daily refresh: a store filled up to a week earlier catches up with the missing days only
+        yahoo.price_store = yahoo.PriceStore(os.path.join(tmp, "refresh_prices"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            yahoo.yf_batch(tickers, START, WEEK_EARLIER, os.path.join(tmp, "seed") + os.sep, HOLIDAYS_FILEPATH, backend="csv")
+        server.reset_counts()
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            refresh_paths, _ = yahoo.yf_batch(tickers, START, END, os.path.join(tmp, "refresh") + os.sep, HOLIDAYS_FILEPATH, backend="csv")
+        refresh_time, refresh_requests = time.perf_counter() - t0, server.request_count
+
+        serial_paths = glob.glob(serial_dir + "*.csv")
+        serial = read_sheets(sorted(serial_paths, key=lambda path: tickers.index(os.path.basename(path).split("_")[0])))
+        batch = read_sheets(paths)
+        assert serial.keys() == batch.keys() and all(serial[name].equals(batch[name]) for name in serial), "outputs differ"
+        for other in [read_sheets(warm_paths), read_sheets(refresh_paths)]:
+            assert other.keys() == batch.keys() and all(other[name].equals(batch[name]) for name in batch), "stored outputs differ"
+
+    print(f"{len(tickers)} tickers ({len(missing)} not found), latency={args.latency}s")
+    print(f"yf_xw per ticker: {serial_time:7.2f}s  {serial_requests} requests  {len(serial_paths)} files")
+    print(f"yf_batch        : {batch_time:7.2f}s  {batch_requests} requests  {len(paths)} files  speedup={serial_time / batch_time:.1f}x")
+    print(f"yf_batch, cached: {warm_time:7.2f}s  {warm_requests} requests")
+    print(f"yf_batch, daily refresh: {refresh_time:7.2f}s  {refresh_requests} requests")
+
+if __name__ == "__main__":
+    main()
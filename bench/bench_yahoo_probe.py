@@ -0,0 +1,57 @@
+"""
+Latency of resolving and downloading one ticker with yf_xw: the serial probe chain vs
+speculative probing, against a local stand-in for Yahoo Finance with a fixed round-trip time.
+Each ticker resolves at a different step of the chain; the ticker cache starts empty.
+
+    python bench/bench_yahoo_probe.py --latency 0.1
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from bench_yahoo_batch import stand_in_downloads
+from standin import StandinServer
+from yahoo import yahoo
+from yahoo_fixtures import price_csv, yahoo_routes
+
+HOLIDAYS_FILEPATH = os.path.join(ROOT, "yahoo", "riskfree_holiday.xlsx")
+START, END = "02.01.2024", "31.12.2024"
+# ticker -> the symbol the stand-in serves for it, one per step of the probe chain
+TICKERS = {"thyao": "THYAO.IS", "aapl": "AAPL", "spx": "^SPX", "cotton": "CT=F", "hgx": "HGX.CMX"}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.1)
+    args = parser.parse_args()
+
+    routes = yahoo_routes({symbol: price_csv(symbol) for symbol in TICKERS.values()})
+    print(f"latency={args.latency}s")
+    print(f"{'ticker':<8} {'serial':>16} {'speculative':>22}")
+    with StandinServer(routes, latency=args.latency) as server, tempfile.TemporaryDirectory() as tmp:
+        yahoo.download_prices, _, yahoo.existing_symbols = stand_in_downloads(server.base_url)
+        yahoo.probe_prices = yahoo.download_prices
+        for ticker in TICKERS:
+            results = []
+            for probe in ["serial", "speculative"]:
+                yahoo.ticker_cache = yahoo.TickerCache(os.path.join(tmp, f"{ticker}_{probe}.sqlite"))
+                yahoo.price_store = yahoo.PriceStore(os.path.join(tmp, f"{ticker}_{probe}_prices"))
+                server.reset_counts()
+                t0 = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    yahoo.yf_xw(ticker, START, END, tmp + os.sep, HOLIDAYS_FILEPATH, backend="csv", probe=probe)
+                results.append((time.perf_counter() - t0, server.request_count))
+                yahoo.ticker_cache.close()
+            (serial_s, serial_requests), (speculative_s, speculative_requests) = results
+            print(f"{ticker:<8} {serial_s:7.3f}s {serial_requests:2d} req  {speculative_s:7.3f}s {speculative_requests:2d} req  {serial_s / speculative_s:4.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import json
+import random
+
+MONTHS = ["Ocak", "Şubat", "Mart", "Nisan", "Mayıs", "Haziran", "Temmuz", "Ağustos", "Eylül", "Ekim", "Kasım", "Aralık"]
+MARKETS = ["Yıldız Pazar", "Ana Pazar", "Alt Pazar"]
+SECTORS = ["Gıda", "Enerji", "Tekstil", "Yazılım", "Lojistik", "Kimya", "Otomotiv", "Turizm"]
+PENDING = "Hazırlanıyor..."
+
+def company(i, rng):
+    """
+    Returns the fields of listing i the way halkarz.com shows them on a company page.
+    """
+    name = f"{rng.choice(SECTORS)} {i} Sanayi ve Ticaret A.Ş."
+    code = "".join(chr(65 + (i // 26 ** k) % 26) for k in range(4)) + "X"
+    month = MONTHS[i % 12]
+    return {
+        "slug": f"sirket-{i}-sanayi-ve-ticaret-a-s",
+        "name": name,
+        "fields": [
+            ("Halka Arz Tarihi", f"{10 + i % 15}-{11 + i % 15} {month} 2024"),
+            ("Halka Arz Fiyatı/Aralığı", f"{rng.randrange(10, 80)},{rng.randrange(0, 100):02d} TL"),
+            ("Dağıtım Yöntemi", "Eşit Dağıtım **"),
+            ("Pay", f"{rng.randrange(10, 200) * 1_000_000:,} Lot"),
+            ("Aracı Kurum", "Örnek Yatırım Menkul Değerler A.Ş."),
+            ("Bist Kodu", code),
+            ("Pazar", rng.choice(MARKETS)),
+            ("Bist İlk İşlem Tarihi", f"{1 + i % 28} {month} 2024"),
+        ],
+    }
+
+def company_page(info, first_trade=None):
+    fields = [(label, first_trade if label == "Bist İlk İşlem Tarihi" and first_trade else value) for label, value in info["fields"]]
+    rows = "".join(f"<tr><td>{label} :</td><td>{value}</td></tr>" for label, value in fields)
+    filler = "".join(f"<p>{info['name']} hakkında bilgi paragrafı {k}.</p>" for k in range(20))
+    return (
+        "<html><head><meta charset='utf-8'><title>Halka Arz</title></head><body>"
+        f"<header><nav>halkarz.com</nav></header><article class='single-page'><h1>{info['name']}</h1>"
+        f"<table>{rows}</table>{filler}</article><aside><ul>{''.join('<li>Diğer arz</li>' for _ in range(30))}</ul></aside>"
+        "</body></html>"
+    )
+
+def index_page(infos, new_count):
+    entries = []
+    for k, info in enumerate(infos):
+        badge = "<div class='il-new'>Yeni</div>" if k < new_count else ""
+        entries.append(
+            f"<article class='index-list'>{badge}<a href='{{{{BASE_URL}}}}/{info['slug']}/'>"
+            f"<h3 class='il-halka-arz-sirket'>{info['name']}</h3></a><span>Halka arz</span></article>"
+        )
+    return f"<html><head><meta charset='utf-8'></head><body><main>{''.join(entries)}</main></body></html>"
+
+def halkarz_routes(n_listings=30, new_ratio=0.7, seed=0):
+    """
+    Returns stand-in routes for the halkarz.com index page and one page per listing,
+    plus the listing infos in index order. Links use the {{BASE_URL}} placeholder.
+    """
+    rng = random.Random(seed)
+    infos = [company(i, rng) for i in range(n_listings)]
+    routes = {"/": ("text/html; charset=utf-8", index_page(infos, int(n_listings * new_ratio)).encode("utf-8"))}
+    for info in infos:
+        routes[f"/{info['slug']}/"] = ("text/html; charset=utf-8", company_page(info).encode("utf-8"))
+    return routes, infos
+
+def pending_store(infos, base_url="{{BASE_URL}}"):
+    """
+    Returns a halkarz.json-style dict in which every listing is still waiting for its first trade date.
+    """
+    data = {}
+    for info in infos:
+        fields = {label: value for label, value in info["fields"] if "arac" not in label.lower()}
+        fields["Bist İlk İşlem Tarihi"] = PENDING
+        fields["İhraççı"] = info["name"]
+        data[fields["Bist Kodu"]] = [fields, f"{base_url}/{info['slug']}/"]
+    return data
+
+def pending_routes(n_pending=300, ready_ratio=0.5, seed=0):
+    """
+    Returns company-page routes for n_pending listings of which ready_ratio already show a first
+    trade date, and the matching halkarz.json-style store with all of them pending.
+    """
+    rng = random.Random(seed)
+    infos = [company(i, rng) for i in range(n_pending)]
+    routes = {}
+    for k, info in enumerate(infos):
+        ready = k < int(n_pending * ready_ratio)
+        routes[f"/{info['slug']}/"] = ("text/html; charset=utf-8", company_page(info, None if ready else PENDING).encode("utf-8"))
+    return routes, pending_store(infos)
+
+def dump_store(data):
+    return json.dumps(data, ensure_ascii=False, indent=4)
@@ -0,0 +1,223 @@
+"""
+Offline benchmark of the scraper entry points against a local stand-in for KAP, halkarz.com and
+Yahoo Finance serving the recorded pages under bench/fixtures/.
+
+For every entry point it reports wall time (median of --repeat runs), HTTP requests served,
+time spent parsing, peak Python memory (tracemalloc, measured in a separate run) and rows
+produced, as JSON. Pass an earlier report with --compare to print the change per metric.
+
+    python bench/harness.py --latency 0.02 --output before.json
+    python bench/harness.py --latency 0.02 --compare before.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from halkarz import halkarz, update_biit
+from halkarz.halkarz_store import open_store
+from kap import kap
+from yahoo import yahoo
+from standin import StandinServer
+from yahoo_fixtures import parse_chart, yahoo_routes
+
+YAHOO_TICKERS = ["THYAO", "aapl", "spx", "cotton"]  # one per step of the yf_xw probe chain
+YAHOO_START, YAHOO_END = "02.01.2024", "31.12.2024"
+HOLIDAYS_FILEPATH = os.path.join(ROOT, "yahoo", "riskfree_holiday.xlsx")
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+def fixture_routes():
+    routes = {}
+    kap_dir = os.path.join(FIXTURES_DIR, "kap")
+    routes["/tr/api/disclosures"] = ("application/json; charset=utf-8", read(os.path.join(kap_dir, "disclosures.json")))
+    for name in os.listdir(os.path.join(kap_dir, "bildirim")):
+        routes[f"/tr/Bildirim/{name[:-5]}"] = ("text/html; charset=utf-8", read(os.path.join(kap_dir, "bildirim", name)))
+
+    halkarz_dir = os.path.join(FIXTURES_DIR, "halkarz")
+    routes["/"] = ("text/html; charset=utf-8", read(os.path.join(halkarz_dir, "index.html")))
+    for name in os.listdir(os.path.join(halkarz_dir, "company")):
+        routes[f"/{name[:-5]}/"] = ("text/html; charset=utf-8", read(os.path.join(halkarz_dir, "company", name)))
+
+    yahoo_dir = os.path.join(FIXTURES_DIR, "yahoo")
+    routes.update(yahoo_routes({name[:-4]: read(os.path.join(yahoo_dir, name)).decode() for name in os.listdir(yahoo_dir)}))
+    return routes
+
+class Run:
+    """
+    State of one entry point run: the stand-in, a scratch directory and the parse time counter.
+    """
+    def __init__(self, server, tmp):
+        self.server = server
+        self.tmp = tmp
+        self.parse_s = 0.0
+
+    @contextlib.contextmanager
+    def timed(self, targets):
+        # Wraps module attributes so time spent inside them counts as parse time
+        originals = [(module, attr, getattr(module, attr)) for module, attr in targets]
+        for module, attr, original in originals:
+            def wrapper(*args, _original=original, **kwargs):
+                t0 = time.perf_counter()
+                try:
+                    return _original(*args, **kwargs)
+                finally:
+                    self.parse_s += time.perf_counter() - t0
+            setattr(module, attr, wrapper)
+        try:
+            yield
+        finally:
+            for module, attr, original in originals:
+                setattr(module, attr, original)
+
+def csv_rows(paths):
+    return sum(len(pd.read_csv(path)) for path in paths)
+
+def run_kap_xw(run):
+    kap.KAP_BASE_URL = run.server.base_url
+    with run.timed([(kap, "index_disclosure_page")]):
+        paths = kap.kap_xw(output_path=run.tmp + os.sep, backend="csv")
+    return csv_rows(paths)
+
+def run_get_halkarz_info(run):
+    halkarz.HALKARZ_BASE_URL = run.server.base_url
+    with run.timed([(halkarz.bs4, "BeautifulSoup")]):
+        df, company_links = halkarz.get_halkarz_info()
+    return len(df)
+
+def run_update_bist_ilk_islem_tarihi(run):
+    json_file = os.path.join(run.tmp, "halkarz.json")
+    with open(os.path.join(FIXTURES_DIR, "halkarz", "halkarz.json"), encoding="utf-8") as f:
+        store = f.read().replace("{{BASE_URL}}", run.server.base_url)
+    with open(json_file, "w", encoding="utf-8") as f:
+        f.write(store)
+    store = open_store(os.path.join(run.tmp, "halkarz.sqlite"), json_file)
+    try:
+        with run.timed([(update_biit.bs4, "BeautifulSoup")]):
+            update_biit.update_bist_ilk_islem_tarihi(store)
+        return len(store) - len(store.pending())
+    finally:
+        store.close()
+
+def run_yf_xw(run):
+    session = requests.Session()
+
+    def download_prices(symbol, start_date, end_date):
+        response = session.get(f"{run.server.base_url}/v8/finance/chart/{symbol.upper()}")
+        if response.status_code != 200:
+            return pd.DataFrame(columns=["Open", "High", "Low", "Close", "Adj Close", "Volume"])
+        t0 = time.perf_counter()
+        data = parse_chart(response.json())
+        run.parse_s += time.perf_counter() - t0
+        return data.loc[pd.Timestamp(start_date):pd.Timestamp(end_date)]
+
+    original = yahoo.download_prices, yahoo.ticker_cache, yahoo.price_store
+    yahoo.download_prices = download_prices
+    yahoo.ticker_cache = yahoo.TickerCache(os.path.join(run.tmp, "ticker_cache.sqlite"))  # every run probes cold
+    yahoo.price_store = yahoo.PriceStore(os.path.join(run.tmp, "prices"))
+    try:
+        paths = []
+        for ticker in YAHOO_TICKERS:
+            paths += yahoo.yf_xw(ticker, start_date=YAHOO_START, end_date=YAHOO_END, output_path=run.tmp + os.sep,
+                                 holidays_filepath=HOLIDAYS_FILEPATH, backend="csv")
+    finally:
+        yahoo.ticker_cache.close()
+        yahoo.download_prices, yahoo.ticker_cache, yahoo.price_store = original
+    return csv_rows(paths)
+
+ENTRY_POINTS = {
+    "kap_xw": run_kap_xw,
+    "get_halkarz_info": run_get_halkarz_info,
+    "update_bist_ilk_islem_tarihi": run_update_bist_ilk_islem_tarihi,
+    "yf_xw": run_yf_xw,
+}
+
+def run_once(entry, server, trace=False):
+    tmp = tempfile.mkdtemp()
+    run = Run(server, tmp)
+    server.reset_counts()
+    try:
+        if trace:
+            tracemalloc.start()
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            rows = ENTRY_POINTS[entry](run)
+        wall = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1] if trace else None
+    finally:
+        if trace:
+            tracemalloc.stop()
+        shutil.rmtree(tmp, ignore_errors=True)
+    return {"wall_s": wall, "requests": server.request_count, "parse_s": run.parse_s, "peak_mib": peak and peak / 2**20, "rows": rows}
+
+def benchmark(entries, latency, repeat):
+    results = {}
+    with StandinServer(fixture_routes(), latency=latency) as server:
+        for entry in entries:
+            runs = [run_once(entry, server) for _ in range(repeat)]
+            traced = run_once(entry, server, trace=True)
+            results[entry] = {
+                "wall_s": round(statistics.median(r["wall_s"] for r in runs), 4),
+                "requests": runs[0]["requests"],
+                "parse_s": round(statistics.median(r["parse_s"] for r in runs), 4),
+                "peak_mib": round(traced["peak_mib"], 2),
+                "rows": runs[0]["rows"],
+            }
+    return results
+
+def compare(report, baseline):
+    print(f"{'entry point':30s} {'metric':9s} {'before':>10s} {'after':>10s} {'change':>8s}")
+    for entry, metrics in report["results"].items():
+        before = baseline["results"].get(entry)
+        if before is None:
+            continue
+        for metric, value in metrics.items():
+            old = before.get(metric)
+            change = f"{value / old:7.2f}x" if old else "     n/a"
+            print(f"{entry:30s} {metric:9s} {old!s:>10s} {value!s:>10s} {change:>8s}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every stand-in response")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--entry", action="append", choices=list(ENTRY_POINTS), help="run only these entry points")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {"time": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                 "latency_s": args.latency, "repeat": args.repeat},
+        "results": benchmark(args.entry or list(ENTRY_POINTS), args.latency, args.repeat),
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+    elif not args.output:
+        print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
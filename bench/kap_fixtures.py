@@ -0,0 +1,134 @@
+import json
+import random
+from datetime import date, timedelta
+
+ISSUE_TITLE = "Pay Dışında Sermaye Piyasası Aracı İşlemlerine İlişkin Bildirim (Faiz İçeren)"
+OTHER_TITLES = [
+    "Özel Durum Açıklaması (Genel)",
+    "Pay Dışında Sermaye Piyasası Aracı İşlemlerine İlişkin Bildirim (Faizsiz)",
+    "Sorumluluk Beyanı",
+]
+ISSUE_SUMMARIES = [
+    "Borçlanma Aracı İhracı",
+    "Finansman bonosu ihracının tamamlanması hk.",
+]
+OTHER_SUMMARIES = [
+    "Kupon ödemesi ve itfa hk.",
+    "Genel kurul toplantısı",
+]
+ISSUERS = ["AKBNK", "GARAN", "YKBNK", "ISCTR", "VAKBN", "HALKB", "QNBFB", "TSKB"]
+
+LABEL_CLASS = "bold font14"
+VALUE_CLASS = "gwt-HTML control-label lineheight-32px"
+CASHFLOW_HEADERS = [
+    "Kupon No", "Ödeme Tarihi", "Kayıt Tarihi", "Faiz Oranı - Dönemsel (%)",
+    "Faiz Oranı - Yıllık Basit (%)", "Faiz Oranı - Yıllık Bileşik (%)", "Ödeme Tutarı",
+]
+
+def tr_date(d):
+    return d.strftime("%d.%m.%Y")
+
+def tr_number(value, decimals=2):
+    text = f"{value:,.{decimals}f}"
+    return text.replace(",", "_").replace(".", ",").replace("_", ".")
+
+def label_row(label, value):
+    return (
+        f'<tr><td><div class="{LABEL_CLASS}">{label}</div></td>'
+        f'<td><div class="{VALUE_CLASS}">{value}</div></td></tr>'
+    )
+
+def filler_table(i):
+    return f'<table class="filler"><tr><td>Bölüm {i}</td></tr></table>'
+
+def bildirim_page(disclosureIndex, rng, cashflow=True, coupons=4):
+    """
+    Builds a page with the layout get_security_params reads: label/value rows in the first tables
+    and, for multi-coupon issues, the cash-flow table as the sixth of ten or more tables.
+    """
+    issue_date = date(2024, 1, 2) + timedelta(days=rng.randrange(0, 300))
+    months = 3 * coupons if coupons > 0 else 3
+    maturity = issue_date + timedelta(days=30 * months)
+    annual = rng.uniform(35, 55)
+    labels = {
+        "ISIN Kodu": f"TRS{rng.choice(ISSUERS)[:3]}{disclosureIndex % 100000:05d}1",
+        "Vade Tarihi": tr_date(maturity),
+        "Döviz Cinsi": "TRY",
+        "İhraç Fiyatı": tr_number(rng.uniform(0.8, 1.0), 4),
+        "Faiz Oranı - Yıllık Basit (%)": tr_number(annual) if coupons > 0 else "-",
+        "Satışı Gerçekleştirilen Nominal Tutar": tr_number(rng.randrange(10, 500) * 1_000_000, 0),
+        "Satışın Tamamlanma Tarihi": tr_date(issue_date),
+        "Kupon Sayısı": str(coupons),
+        "Ek Getiri (%)": "-",
+        "Kupon Ödeme Sıklığı": "3 Ayda Bir" if cashflow else ("Tek Kupon" if coupons == 1 else "Diğer"),
+    }
+    if not cashflow and coupons == 0:
+        del labels["Faiz Oranı - Yıllık Basit (%)"]
+
+    rows = [label_row(label, value) for label, value in labels.items()]
+    label_tables = [f"<table>{''.join(rows[i:i + 2])}</table>" for i in range(0, len(rows), 2)]
+
+    if not cashflow:
+        tables = label_tables + [filler_table(i) for i in range(2)]
+    else:
+        body = ["<tr>" + "".join(f"<td>{h}</td>" for h in CASHFLOW_HEADERS) + "</tr>"]
+        for k in range(1, coupons + 1):
+            paid = issue_date + timedelta(days=91 * k)
+            cells = [str(k), tr_date(paid), tr_date(paid - timedelta(days=1)), tr_number(annual / 4, 4),
+                     tr_number(annual, 4), tr_number(annual * 1.08, 4), ""]
+            body.append("<tr>" + "".join(f"<td>{c}</td>" for c in cells) + "</tr>")
+        body.append("<tr>" + "".join(f"<td>{c}</td>" for c in ["Anapara/Vade Sonu", tr_date(maturity)] + [""] * 5) + "</tr>")
+        cashflow_table = f"<table>{''.join(body)}</table>"
+        tables = label_tables + [cashflow_table] + [filler_table(i) for i in range(6)]
+
+    return (
+        "<html><head><meta charset='utf-8'><title>KAP</title></head><body>"
+        f"<div class='disclosure' id='{disclosureIndex}'>{''.join(tables)}</div>"
+        "</body></html>"
+    )
+
+def kap_routes(n_disclosures=100, noise_ratio=1.0, cashflow_ratio=0.7, seed=0):
+    """
+    Returns stand-in routes for the disclosures API plus one Bildirim page per issuance disclosure,
+    and the list of issuance disclosureIndex values in feed order.
+    """
+    rng = random.Random(seed)
+    feed = []
+    routes = {}
+    issue_indices = []
+    disclosureIndex = 1_300_000
+    n_noise = int(n_disclosures * noise_ratio)
+    kinds = ["issue"] * n_disclosures + ["noise"] * n_noise
+    rng.shuffle(kinds)
+
+    for kind in kinds:
+        disclosureIndex += rng.randrange(1, 5)
+        issuer = rng.choice(ISSUERS)
+        if kind == "issue":
+            title, summary = ISSUE_TITLE, rng.choice(ISSUE_SUMMARIES)
+            cashflow = rng.random() < cashflow_ratio
+            coupons = rng.choice([2, 4, 8]) if cashflow else rng.choice([0, 1])
+            page = bildirim_page(disclosureIndex, rng, cashflow=cashflow, coupons=coupons)
+            routes[f"/tr/Bildirim/{disclosureIndex}"] = ("text/html; charset=utf-8", page.encode("utf-8"))
+            issue_indices.append(disclosureIndex)
+        else:
+            title = rng.choice(OTHER_TITLES + [ISSUE_TITLE])
+            summary = rng.choice(OTHER_SUMMARIES)
+        feed.append({
+            "basic": {
+                "disclosureIndex": disclosureIndex,
+                "title": title,
+                "summary": summary,
+                "stockCodes": f"{issuer}, {issuer}.E",
+                "companyName": f"{issuer} A.Ş.",
+            },
+            "detail": {"summary": summary},
+        })
+
+    feed.reverse()  # the API returns the newest disclosures first
+    issue_indices.reverse()
+    routes["/tr/api/disclosures"] = ("application/json; charset=utf-8", json.dumps(feed, ensure_ascii=False).encode("utf-8"))
+    # The historical query answers with the flat "basic" items; the stand-in ignores the date filter
+    query = [item["basic"] for item in feed]
+    routes["/tr/api/memberDisclosureQuery"] = ("application/json; charset=utf-8", json.dumps(query, ensure_ascii=False).encode("utf-8"))
+    return routes, issue_indices
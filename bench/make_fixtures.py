@@ -0,0 +1,41 @@
+"""
+Regenerates the recorded fixture set under bench/fixtures/ that harness.py serves.
+
+    python bench/make_fixtures.py
+"""
+import json
+import os
+import shutil
+
+from halkarz_fixtures import halkarz_routes, pending_store, dump_store
+from kap_fixtures import kap_routes
+from yahoo_fixtures import SYMBOLS, price_csv
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def write(path, body):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(body if isinstance(body, bytes) else body.encode("utf-8"))
+
+def main():
+    shutil.rmtree(FIXTURES_DIR, ignore_errors=True)
+
+    routes, _ = kap_routes(40, seed=1)
+    for path, (_, body) in routes.items():
+        if path == "/tr/api/disclosures":
+            write(os.path.join(FIXTURES_DIR, "kap", "disclosures.json"), json.dumps(json.loads(body), ensure_ascii=False, indent=1))
+        else:
+            write(os.path.join(FIXTURES_DIR, "kap", "bildirim", path.rsplit("/", 1)[1] + ".html"), body)
+
+    routes, infos = halkarz_routes(30, seed=1)
+    for path, (_, body) in routes.items():
+        name = "index" if path == "/" else path.strip("/")
+        write(os.path.join(FIXTURES_DIR, "halkarz", "company" if name != "index" else "", name + ".html"), body)
+    write(os.path.join(FIXTURES_DIR, "halkarz", "halkarz.json"), dump_store(pending_store(infos)))
+
+    for symbol in SYMBOLS:
+        write(os.path.join(FIXTURES_DIR, "yahoo", symbol + ".csv"), price_csv(symbol))
+
+if __name__ == "__main__":
+    main()
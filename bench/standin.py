@@ -0,0 +1,100 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+class StandinServer:
+    """
+    Local stand-in for the sites the scrapers talk to.
+    routes maps a request path (without the query string) to (content_type, body bytes); every
+    response is delayed by latency seconds to imitate the round-trip time of the real site.
+    "{{BASE_URL}}" in a body is replaced by the server's own URL so fixture links point back to it.
+    Responses carry an ETag and If-None-Match is answered with 304; a POST is answered like a GET
+    of its path. failures maps a path to the number of 503 answers it gives before succeeding,
+    to exercise retries.
+    Use it as a context manager; base_url points at the running server.
+    """
+    def __init__(self, routes, latency=0.0, failures=None):
+        self.routes = routes
+        self.latency = latency
+        self.failures = dict(failures or {})
+        self.not_modified_count = 0
+        self.request_count = 0
+        self.path_counts = Counter()
+        self.lock = threading.Lock()
+        self.server = None
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reset_counts(self):
+        with self.lock:
+            self.request_count = 0
+            self.not_modified_count = 0
+            self.path_counts.clear()
+
+    def __enter__(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                # Queries are answered like a GET of the same path; the request body is ignored
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                self.do_GET()
+
+            def do_GET(self):
+                path = unquote(self.path.split("?")[0])
+                with standin.lock:
+                    standin.request_count += 1
+                    standin.path_counts[path] += 1
+                if standin.latency:
+                    time.sleep(standin.latency)
+
+                with standin.lock:
+                    failing = standin.failures.get(path, 0) > 0
+                    if failing:
+                        standin.failures[path] -= 1
+                if failing or path not in standin.routes:
+                    self.send_response(503 if failing else 404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                content_type, body = standin.routes[path]
+                body = body.replace(b"{{BASE_URL}}", standin.base_url.encode())
+                etag = '"' + hashlib.md5(body).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    with standin.lock:
+                        standin.not_modified_count += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
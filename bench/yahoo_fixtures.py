@@ -0,0 +1,65 @@
+import io
+import json
+import math
+import random
+from datetime import date, datetime, timedelta, timezone
+
+import pandas as pd
+
+# Symbols the stand-in knows, mirroring the probe chain of yf_xw: BIST, US equity, US index, commodity future
+SYMBOLS = ["THYAO.IS", "AAPL", "^SPX", "CT=F"]
+FIXTURE_START = date(2024, 1, 2)
+FIXTURE_END = date(2024, 12, 31)
+
+def price_csv(symbol, start=FIXTURE_START, end=FIXTURE_END, seed=None):
+    """
+    Daily OHLC history in the CSV layout of Yahoo's download endpoint.
+    """
+    rng = random.Random(seed if seed is not None else symbol)
+    price = rng.uniform(20, 500)
+    lines = ["Date,Open,High,Low,Close,Adj Close,Volume"]
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            open_ = price
+            price = price * math.exp(rng.gauss(0, 0.015))
+            high, low = max(open_, price) * 1.005, min(open_, price) * 0.995
+            lines.append(f"{day.isoformat()},{open_:.4f},{high:.4f},{low:.4f},{price:.4f},{price * 0.99:.4f},{rng.randrange(10**5, 10**7)}")
+        day += timedelta(days=1)
+    return "\n".join(lines) + "\n"
+
+def chart_json(symbol, csv_text):
+    """
+    The same history in the layout of Yahoo's v8 chart API.
+    """
+    df = pd.read_csv(io.StringIO(csv_text), parse_dates=["Date"])
+    timestamps = [int(datetime.combine(d.date(), datetime.min.time(), timezone.utc).timestamp()) for d in df["Date"]]
+    result = {
+        "meta": {"symbol": symbol, "currency": "TRY" if symbol.endswith(".IS") else "USD", "dataGranularity": "1d"},
+        "timestamp": timestamps,
+        "indicators": {
+            "quote": [{"open": df["Open"].tolist(), "high": df["High"].tolist(), "low": df["Low"].tolist(),
+                       "close": df["Close"].tolist(), "volume": df["Volume"].tolist()}],
+            "adjclose": [{"adjclose": df["Adj Close"].tolist()}],
+        },
+    }
+    return json.dumps({"chart": {"result": [result], "error": None}})
+
+def yahoo_routes(csv_by_symbol):
+    routes = {}
+    for symbol, csv_text in csv_by_symbol.items():
+        routes[f"/v7/finance/download/{symbol}"] = ("text/csv", csv_text.encode("utf-8"))
+        routes[f"/v8/finance/chart/{symbol}"] = ("application/json", chart_json(symbol, csv_text).encode("utf-8"))
+    return routes
+
+def parse_chart(payload):
+    """
+    Turns a v8 chart response into the Open/High/Low/Close/Adj Close/Volume frame yf.download returns.
+    """
+    result = payload["chart"]["result"][0]
+    quote = result["indicators"]["quote"][0]
+    index = pd.to_datetime(result["timestamp"], unit="s").normalize().rename("Date")
+    return pd.DataFrame({
+        "Open": quote["open"], "High": quote["high"], "Low": quote["low"], "Close": quote["close"],
+        "Adj Close": result["indicators"]["adjclose"][0]["adjclose"], "Volume": quote["volume"],
+    }, index=index)
@@ -0,0 +1,210 @@
+import contextlib
+import random
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from common import instrument
+from common.lazy import lazy_import
+
+requests = lazy_import("requests")
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+# host -> (requests per second, burst); hosts not listed are not throttled
+DEFAULT_RATE_LIMITS = {
+    "www.google.com": (0.5, 1),
+    "www.kap.org.tr": (10, 10),
+    "halkarz.com": (5, 5),
+}
+# host -> requests in flight at once, shared by every caller of the client; hosts not listed are not capped
+DEFAULT_CONCURRENCY_LIMITS = {
+    "www.kap.org.tr": 4,
+}
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+class TokenBucket:
+    """
+    Allows rate requests per second on average with bursts of up to burst requests.
+    """
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class HttpClient:
+    """
+    HTTP client shared by the scrapers.
+    One keep-alive requests.Session with a connection pool per host, per-host token-bucket rate
+    limits and caps on the requests in flight (a stream=True response frees its slot once its
+    headers are in, not when the body is read), retries with exponential backoff and full jitter on connection errors and
+    429/5xx responses (honouring Retry-After), and opt-in ETag/Last-Modified revalidation for
+    pages that are polled (get with conditional=True): a page that answers 304 is served from the
+    last body seen for its URL. Only the max_validators most recently used bodies are kept.
+    """
+    def __init__(self, headers=None, pool_size=16, rate_limits=None, retries=4, backoff=0.5,
+                 max_backoff=30.0, timeout=30, validators=None, max_validators=64, concurrency_limits=None):
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": USER_AGENT})
+        self.session.headers.update(headers or {})
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.rate_limits = DEFAULT_RATE_LIMITS if rate_limits is None else rate_limits
+        self.concurrency_limits = dict(DEFAULT_CONCURRENCY_LIMITS if concurrency_limits is None else concurrency_limits)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.validators = OrderedDict(validators or ())  # url -> {"etag", "last_modified", "content", "encoding"}, LRU order
+        self.max_validators = max_validators
+        self.buckets = {}
+        self.slots = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, host):
+        with self.lock:
+            if host not in self.buckets:
+                limit = self.rate_limits.get(host)
+                self.buckets[host] = TokenBucket(*limit) if limit else None
+            return self.buckets[host]
+
+    def slot(self, host):
+        with self.lock:
+            if host not in self.slots:
+                limit = self.concurrency_limits.get(host)
+                self.slots[host] = threading.BoundedSemaphore(limit) if limit else None
+            return self.slots[host]
+
+    def set_concurrency_limit(self, host, limit):
+        """
+        Caps the requests in flight against host (None removes the cap) for the requests that
+        start from now on.
+        """
+        with self.lock:
+            if self.concurrency_limits.get(host) != limit:
+                self.concurrency_limits[host] = limit
+                self.slots.pop(host, None)
+
+    def delay(self, attempt, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def get(self, url, conditional=False, **kwargs):
+        """
+        GETs url and returns the requests.Response of the last attempt.
+        With conditional=True the body of a 200 answer carrying validators is kept, and a later 304
+        answer is turned into a 200 response carrying that body, flagged with
+        response.not_modified = True. Raises the last connection error once retries run out.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        headers = dict(kwargs.pop("headers", None) or {})
+        cached = self.lookup(url) if conditional else None
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        response = self.request("GET", url, headers=headers, **kwargs)
+        if response.status_code == 304 and cached:
+            return self.cached_response(url, cached, response)
+        response.not_modified = False
+        if conditional and response.status_code == 200 and not kwargs.get("stream"):
+            self.remember(url, response)
+        return response
+
+    def post(self, url, **kwargs):
+        """
+        POSTs url with the same throttling and retries as get; nothing is cached.
+        Only meant for idempotent queries, since a retried POST is sent again.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        response = self.request("POST", url, **kwargs)
+        response.not_modified = False
+        return response
+
+    def request(self, method, url, **kwargs):
+        host = urlparse(url).netloc
+        bucket = self.bucket(host)
+        for attempt in range(self.retries + 1):
+            if bucket is not None:
+                bucket.acquire()
+            # The slot is held per attempt, so backoff sleeps do not keep other callers waiting
+            slot = self.slot(host) or contextlib.nullcontext()
+            try:
+                with slot:
+                    response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+                instrument.count("http.retries")
+                time.sleep(self.delay(attempt))
+                continue
+            if response.status_code in RETRY_STATUSES and attempt < self.retries:
+                instrument.count("http.retries")
+                delay = self.delay(attempt, response)
+                response.close()  # hand a streamed response's connection back to the pool
+                time.sleep(delay)
+                continue
+            return response
+
+    def lookup(self, url):
+        with self.lock:
+            cached = self.validators.get(url)
+            if cached is not None:
+                self.validators.move_to_end(url)
+            return cached
+
+    def remember(self, url, response):
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            with self.lock:
+                self.validators[url] = {"etag": etag, "last_modified": last_modified,
+                                        "content": response.content, "encoding": response.encoding}
+                self.validators.move_to_end(url)
+                while len(self.validators) > self.max_validators:
+                    self.validators.popitem(last=False)
+
+    def cached_response(self, url, cached, not_modified):
+        instrument.count("http.not_modified")
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers = not_modified.headers
+        response._content = cached["content"]
+        response._content_consumed = True
+        response.encoding = cached["encoding"]
+        response.not_modified = True
+        return response
+
+_default_client = None
+_default_lock = threading.Lock()
+
+def default_client():
+    """
+    Process-wide HttpClient the scrapers share.
+    """
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
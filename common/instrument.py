@@ -0,0 +1,154 @@
+import contextlib
+import functools
+import json
+import os
+import random
+import threading
+import time
+
+# Setting RA_METRICS_FILE turns instrumentation on; flush() writes the metrics there (.prom -> Prometheus text, else JSON)
+METRICS_FILE_ENV = "RA_METRICS_FILE"
+MAX_SAMPLES = 10000  # durations kept per span for percentiles (reservoir sample)
+
+_enabled = bool(os.environ.get(METRICS_FILE_ENV))
+_lock = threading.Lock()
+_spans = {}
+_counters = {}
+_noop = contextlib.nullcontext()
+
+def enable():
+    global _enabled
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def enabled():
+    return _enabled
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+class Span:
+    """
+    Accumulated durations of one named stage: call count, total seconds and a bounded sample
+    of individual durations for percentiles.
+    """
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.samples = []
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(seconds)
+        else:
+            slot = random.randrange(self.count)
+            if slot < MAX_SAMPLES:
+                self.samples[slot] = seconds
+
+    def percentile(self, q):
+        ordered = sorted(self.samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)] if ordered else 0.0
+
+def observe(name, seconds):
+    if not _enabled:
+        return
+    with _lock:
+        _spans.setdefault(name, Span()).add(seconds)
+
+def count(name, value=1):
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def record_response(name, response):
+    """
+    Counts one HTTP response and its body size under name.http_requests / name.http_bytes;
+    bodies served from a 304 revalidation count as name.http_not_modified instead.
+    """
+    if not _enabled:
+        return
+    count(f"{name}.http_requests")
+    if getattr(response, "not_modified", False):
+        count(f"{name}.http_not_modified")
+    elif response._content is not False:  # streamed bodies are counted by the reader
+        count(f"{name}.http_bytes", len(response.content))
+
+@contextlib.contextmanager
+def _span(name):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - t0)
+
+def span(name):
+    """
+    Context manager timing the enclosed block as stage name. Returns a shared no-op context when disabled.
+    """
+    return _span(name) if _enabled else _noop
+
+def timed(name):
+    """
+    Decorator timing every call of the function as stage name.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def snapshot():
+    """
+    Returns the current metrics as a dict: per span count, total and p50/p90/p99 seconds, plus counters.
+    """
+    with _lock:
+        spans = {
+            name: {"count": s.count, "total_s": s.total, "p50_s": s.percentile(0.5),
+                   "p90_s": s.percentile(0.9), "p99_s": s.percentile(0.99)}
+            for name, s in _spans.items()
+        }
+        return {"spans": spans, "counters": dict(_counters)}
+
+def to_json():
+    return json.dumps(snapshot(), indent=2)
+
+def prometheus_name(name):
+    return "ra_" + "".join(c if c.isalnum() else "_" for c in name)
+
+def to_prometheus():
+    metrics = snapshot()
+    lines = ["# TYPE ra_span_seconds summary"]
+    for name, s in metrics["spans"].items():
+        for quantile, key in [("0.5", "p50_s"), ("0.9", "p90_s"), ("0.99", "p99_s")]:
+            lines.append(f'ra_span_seconds{{span="{name}",quantile="{quantile}"}} {s[key]}')
+        lines.append(f'ra_span_seconds_sum{{span="{name}"}} {s["total_s"]}')
+        lines.append(f'ra_span_seconds_count{{span="{name}"}} {s["count"]}')
+    for name, value in metrics["counters"].items():
+        lines.append(f"# TYPE {prometheus_name(name)}_total counter")
+        lines.append(f"{prometheus_name(name)}_total {value}")
+    return "\n".join(lines) + "\n"
+
+def write(path):
+    text = to_prometheus() if path.endswith(".prom") else to_json()
+    with open(path, "w") as f:
+        f.write(text)
+
+def flush():
+    """
+    Writes the metrics to RA_METRICS_FILE if it is set.
+    """
+    path = os.environ.get(METRICS_FILE_ENV)
+    if _enabled and path:
+        write(path)
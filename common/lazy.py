@@ -0,0 +1,21 @@
+import importlib
+import sys
+import types
+
+class LazyModule(types.ModuleType):
+    """
+    Placeholder for a module that is imported on its first attribute access, so importing a
+    scraper does not load pandas, xlwings, yfinance and the like until they are used.
+    Attributes set on the placeholder (e.g. a benchmark wrapping BeautifulSoup) stay local to it.
+    """
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__name__)
+        for name, value in vars(module).items():
+            self.__dict__.setdefault(name, value)
+        return getattr(module, attr)
+
+def lazy_import(name):
+    """
+    Returns module name: the module itself when it is already imported, else a LazyModule.
+    """
+    return sys.modules.get(name) or LazyModule(name)
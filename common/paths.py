@@ -0,0 +1,33 @@
+import os
+import sys
+
+# Runtime state (SQLite stores, price files, compiled calendars) lives under RA_FORECASTER_DATA when set,
+# else under the per-user data directory, never inside the installed package
+DATA_DIR_ENV = "RA_FORECASTER_DATA"
+APP_NAME = "ra_forecaster"
+
+def data_dir():
+    """
+    $RA_FORECASTER_DATA, else %LOCALAPPDATA%\\ra_forecaster on Windows and
+    $XDG_DATA_HOME/ra_forecaster (~/.local/share/ra_forecaster) elsewhere.
+    """
+    if os.environ.get(DATA_DIR_ENV):
+        return os.path.abspath(os.path.expanduser(os.environ[DATA_DIR_ENV]))
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser(os.path.join("~", "AppData", "Local"))
+    else:
+        base = os.environ.get("XDG_DATA_HOME") or os.path.expanduser(os.path.join("~", ".local", "share"))
+    return os.path.join(base, APP_NAME)
+
+def data_path(*parts):
+    """
+    A path under data_dir(); nothing is created until a store opens it (ensure_parent).
+    """
+    return os.path.join(data_dir(), *parts)
+
+def ensure_parent(path):
+    """
+    Creates the directory path lives in and returns path.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    return path
@@ -0,0 +1,111 @@
+import os
+from collections import namedtuple
+
+from common.lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+# One output sheet: the frame (its index is written as the first column) and a column -> Excel number format map
+Sheet = namedtuple("Sheet", ["name", "df", "number_formats"])
+
+DATE_FORMAT = "yyyy-mm-dd"
+EXCEL_EPOCH = "1899-12-30"
+WIDTH_SAMPLE_ROWS = 1000  # rows looked at when sizing xlsx columns
+
+def sheet_frame(sheet):
+    """
+    Returns the sheet's frame with the index turned into the first column.
+    """
+    return sheet.df.reset_index() if sheet.df.index.name is not None else sheet.df
+
+def column_width(name, values):
+    sample = values.iloc[:WIDTH_SAMPLE_ROWS]
+    if pd.api.types.is_datetime64_any_dtype(sample):
+        longest = len(DATE_FORMAT)
+    else:
+        longest = sample.astype(str).str.len().max() if len(sample) else 0
+    return min(max(len(str(name)), int(longest) if longest == longest else 0) + 2, 60)
+
+def xlsx_rows(df):
+    """
+    Yields the frame's rows as plain Python values: dates become Excel serial numbers (shown as
+    dates through the column format) and missing values become None, all converted per column.
+    """
+    columns = []
+    for col_name in df.columns:
+        values = df[col_name]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            values = (values - pd.Timestamp(EXCEL_EPOCH)) / pd.Timedelta(days=1)
+        values = values.astype(object)
+        columns.append(values.where(values.notna(), None).tolist())
+    return zip(*columns)
+
+def write_xlsx(sheets, output_base):
+    """
+    Streams the sheets into output_base.xlsx with xlsxwriter's constant_memory mode: rows are
+    flushed as they are written, number formats are set once per column and the header row is bold.
+    """
+    import xlsxwriter
+
+    path = output_base + ".xlsx"
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+    bold = workbook.add_format({"bold": True})
+    formats = {}
+
+    for sheet in sheets:
+        df = sheet_frame(sheet)
+        worksheet = workbook.add_worksheet(sheet.name)
+        for col_num, col_name in enumerate(df.columns):
+            if pd.api.types.is_datetime64_any_dtype(df[col_name]):
+                num_format = sheet.number_formats.get(col_name, DATE_FORMAT)
+            else:
+                num_format = sheet.number_formats.get(col_name)
+            if num_format is not None and num_format not in formats:
+                formats[num_format] = workbook.add_format({"num_format": num_format})
+            worksheet.set_column(col_num, col_num, column_width(col_name, df[col_name]), formats.get(num_format))
+
+        worksheet.write_row(0, 0, [str(c) for c in df.columns], bold)
+        for row_num, row in enumerate(xlsx_rows(df), start=1):
+            worksheet.write_row(row_num, 0, row)
+
+    workbook.close()
+    return [path]
+
+def write_parquet(sheets, output_base):
+    """
+    Writes one output_base_<sheet>.parquet file per sheet; dtypes are kept, number formats do not apply.
+    """
+    paths = []
+    for sheet in sheets:
+        path = f"{output_base}_{sheet.name}.parquet"
+        sheet_frame(sheet).to_parquet(path, index=False)
+        paths.append(path)
+    return paths
+
+def write_csv(sheets, output_base):
+    """
+    Writes one output_base_<sheet>.csv file per sheet.
+    """
+    paths = []
+    for sheet in sheets:
+        path = f"{output_base}_{sheet.name}.csv"
+        sheet_frame(sheet).to_csv(path, index=False, date_format="%Y-%m-%d")
+        paths.append(path)
+    return paths
+
+WRITERS = {
+    "xlsx": write_xlsx,
+    "parquet": write_parquet,
+    "csv": write_csv,
+}
+
+def export_sheets(sheets, output_base, backend="xlsx"):
+    """
+    Writes the sheets with one of the WRITERS backends and returns the written paths.
+    """
+    if backend not in WRITERS:
+        raise ValueError(f"Unknown export backend: {backend}. Choose from {', '.join(WRITERS)}.")
+    directory = os.path.dirname(output_base)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return WRITERS[backend](sheets, output_base)
@@ -1,8 +1,17 @@
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-import json
+import argparse
 import os
+from concurrent.futures import ThreadPoolExecutor
+
+from common import instrument
+from common.http_client import default_client
+from common.lazy import lazy_import
+from halkarz.halkarz_store import open_store, HALKARZ_DB_PATH, HALKARZ_EXPORT_PATH
+
+# Loaded on first use, so european_to_float and the other helpers import without them
+bs4 = lazy_import("bs4")
+pd = lazy_import("pandas")
+
+HALKARZ_BASE_URL = "https://halkarz.com"
 
 def european_to_float(value):
     """
@@ -30,79 +39,120 @@ def Pay_to_int(value):
     
     return int(value)
 
-def get_halkarz_info():
-    # Define headers with a User-Agent
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
+def fetch_company_page(company_link, client=None):
+    """
+    Returns the company page HTML, or None if it could not be fetched.
+    """
+    with instrument.span("halkarz.http_fetch"):
+        response = (client or default_client()).get(company_link)
+    instrument.record_response("halkarz", response)
+    if response.status_code != 200:
+        return None
+    return response.text
+
+def parse_company_page(company_page_html):
+    """
+    Returns the label -> value fields of the company page table (without "Aracı Kurum"),
+    or None if the page has no article.single-page.
+    """
+    # Parse the company page HTML with BeautifulSoup
+    with instrument.span("halkarz.html_parse"):
+        company_soup = bs4.BeautifulSoup(company_page_html, 'html.parser')
+
+    # Extract the desired information
+    company_article = company_soup.find('article', class_='single-page')
+    if not company_article:
+        return None
 
-    # Fetch the main page HTML with headers
-    main_page_url = "https://halkarz.com/"
-    response = requests.get(main_page_url, headers=headers)
+    # Extract the rows of the table
+    rows = company_article.find_all('tr')
+
+    # Initialize a dictionary to hold the extracted information
+    company_info = {}
+
+    with instrument.span("halkarz.field_extract"):
+        for row in rows:
+            cells = row.find_all('td')
+            if len(cells) == 2:
+                label = cells[0].text.strip()
+                value = cells[1].text.strip()
+                
+                if "arac" in label.lower():  # we do not need "Aracı Kurum" info
+                    continue
+                else:
+                    company_info[label[:-2]] = value
+    return company_info
+
+def fetch_company_info(company_link, client=None):
+    company_page_html = fetch_company_page(company_link, client)
+    if company_page_html is None:
+        return None
+    return parse_company_page(company_page_html)
+
+@instrument.timed("halkarz.get_halkarz_info")
+def get_halkarz_info(workers=8, known_links=None):
+    """
+    Scrapes the listings with the "new" badge on the halkarz.com index page. Company pages are
+    fetched and parsed by a pool of workers over the shared client's keep-alive session (the
+    client's halkarz.com rate limit still applies); the frame is built once from the results
+    in index order. Listings whose link is in known_links (HalkarzStore.link_index()) are skipped
+    without fetching their page, so an unchanged index page costs one request.
+    Returns (df indexed by Bist Kodu, {Bist Kodu: company link}).
+    """
+    # The shared client sends a browser User-Agent, retries and throttles
+    client = default_client()
+
+    # Fetch the main page HTML
+    main_page_url = f"{HALKARZ_BASE_URL}/"
+    with instrument.span("halkarz.http_fetch"):
+        response = client.get(main_page_url, conditional=True)
+    instrument.record_response("halkarz", response)
     if response.status_code != 200:
         raise Exception(f"Failed to fetch the main page. Status code: {response.status_code}")
 
     main_page_html = response.text
 
     # Parse the main page HTML with BeautifulSoup
-    soup = BeautifulSoup(main_page_html, 'html.parser')
+    with instrument.span("halkarz.html_parse"):
+        soup = bs4.BeautifulSoup(main_page_html, 'html.parser')
 
-    # Find all company entries
-    company_entries = soup.find_all('article', class_='index-list')
-
-    # Initialize empty dataframe and empty list for storing company links
-    df = pd.DataFrame()
-    company_links = {}
-    
-    # Iterate over each company entry
-    for entry in company_entries:
+    # Find all company entries with the "new" badge and a link to the company page
+    listings = []
+    for entry in soup.find_all('article', class_='index-list'):
         new_badge = entry.find('div', class_='il-new')
-        if new_badge:
-            # Extract the link to the company page
-            company_link_tag = entry.find('a', href=True)
-            if company_link_tag:
-                company_link = company_link_tag['href']
-
-                # Fetch the company page HTML with headers
-                company_page_response = requests.get(company_link, headers=headers)
-                if company_page_response.status_code == 200:
-                    company_page_html = company_page_response.text
-
-                    # Parse the company page HTML with BeautifulSoup
-                    company_soup = BeautifulSoup(company_page_html, 'html.parser')
-
-                    # Extract the desired information
-                    company_article = company_soup.find('article', class_='single-page')
-                    if company_article:
-                        # Extract the rows of the table
-                        rows = company_article.find_all('tr')
-
-                        # Initialize a dictionary to hold the extracted information
-                        company_info = {}
-
-                        for row in rows:
-                            cells = row.find_all('td')
-                            if len(cells) == 2:
-                                label = cells[0].text.strip()
-                                value = cells[1].text.strip()
-                                
-                                if "arac" in label.lower():  # we do not need "Aracı Kurum" info
-                                    continue
-                                else:
-                                    company_info[label[:-2]] = value
-
-                        # Extract Bist Kodu for index
-                        bist_kodu = company_info.get("Bist Kodu", "Unknown")
-                        company_title_tag = entry.find('h3', class_='il-halka-arz-sirket')
-                        company_title = company_title_tag.text.strip()
-                        company_info["İhraççı"] = company_title
-                        print(f"İhraççı: {company_title}")
-                        
-                        company_links[bist_kodu] = company_link
-                        
-                        # Create a Pandas Series and append it to the dataframe
-                        series = pd.Series(company_info, name=bist_kodu)
-                        df = pd.concat([df, pd.DataFrame(series).T])           
+        company_link_tag = entry.find('a', href=True) if new_badge else None
+        if company_link_tag:
+            listings.append((entry, company_link_tag['href']))
+    if known_links:
+        skipped = sum(1 for entry, company_link in listings if company_link in known_links)
+        listings = [(entry, company_link) for entry, company_link in listings if company_link not in known_links]
+        print(f"{skipped} listings already stored, {len(listings)} to fetch.")
+
+    # Fetch and parse the company pages concurrently; map keeps the index order
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        infos = list(executor.map(lambda listing: fetch_company_info(listing[1], client), listings))
+
+    records = []
+    codes = []
+    company_links = {}
+    for (entry, company_link), company_info in zip(listings, infos):
+        if company_info is None:
+            continue
+
+        # Extract Bist Kodu for index
+        bist_kodu = company_info.get("Bist Kodu", "Unknown")
+        company_title_tag = entry.find('h3', class_='il-halka-arz-sirket')
+        company_title = company_title_tag.text.strip()
+        company_info["İhraççı"] = company_title
+        print(f"İhraççı: {company_title}")
+        
+        company_links[bist_kodu] = company_link
+        records.append(company_info)
+        codes.append(bist_kodu)
+
+    # One frame from all records, a row per company
+    with instrument.span("halkarz.frame_build"):
+        df = pd.DataFrame(records, index=codes) if records else pd.DataFrame()
 
     # Re-formatting
     
@@ -115,31 +165,61 @@ def get_halkarz_info():
         df["Pay"] = df["Pay"].apply(Pay_to_int)
         
     print("company links dict =", company_links)
+    instrument.count("halkarz.rows", len(df))
     
     return df, company_links
 
-def create_json(df, company_links):
-    # Check if the JSON file already exists
-    if os.path.exists('halkarz\halkarz.json'):
-        with open('halkarz\halkarz.json', 'r', encoding='utf-8') as f:
-            existing_data = json.load(f)
-    else:
-        existing_data = {}
-
+def company_entries(df, company_links):
+    """
+    The scraped companies in the halkarz.json layout, {Bist Kodu: [company_data, link]}.
+    """
     data_dict = df.to_dict(orient='index')
-    final_dict = {key: [data_dict[key], company_links[key]] for key in data_dict}
+    return {key: [data_dict[key], company_links[key]] for key in data_dict}
 
-    # Update existing data with new entries
-    for key, value in final_dict.items():
-        if key not in existing_data:
-            existing_data[key] = value
+def store_new_companies(df, company_links, store, json_file=None):
+    """
+    Adds the companies that are not stored yet to the HalkarzStore and returns how many. With
+    json_file, the store is also exported there for the tools that still read halkarz.json,
+    when companies were added or the file does not exist yet.
+    """
+    added = store.add(company_entries(df, company_links))
+    print(f"{added} new companies stored.")
+    if json_file is not None and (added or not os.path.exists(json_file)):
+        store.export_json(json_file)
+    return added
 
-    # Write updated data back to JSON file
-    with open('halkarz\halkarz.json', 'w', encoding='utf-8') as f:
-        json.dump(existing_data, f, ensure_ascii=False, indent=4)
+def create_json(df, company_links, json_file=HALKARZ_EXPORT_PATH, db_path=None):
+    """
+    The old entry point: adds the new companies to the store (store_new_companies) and writes
+    the whole store to json_file. Returns how many companies were added.
+    """
+    store = open_store(db_path or HALKARZ_DB_PATH)
+    try:
+        added = store_new_companies(df, company_links, store)
+        store.export_json(json_file)
+    finally:
+        store.close()
+    return added
+
+def main():
+    parser = argparse.ArgumentParser(description="New IPO listings of halkarz.com into the halkarz store.")
+    parser.add_argument("--db", default=HALKARZ_DB_PATH, help="HalkarzStore database (default halkarz.sqlite in the data directory)")
+    parser.add_argument("--json", help="also export the store to this halkarz.json when it changed")
+    parser.add_argument("--full", action="store_true", help="fetch every new listing, also the ones already stored")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    # Incremental run: companies already in the store are not fetched again
+    store = open_store(args.db)
+    try:
+        df, company_links = get_halkarz_info(workers=args.workers, known_links=None if args.full else store.link_index())
+        store_new_companies(df, company_links, store, args.json)
+    finally:
+        store.close()
 
-# Test
-df, company_links = get_halkarz_info()
-create_json(df, company_links)
+    print(df)
+    instrument.flush()
 
-print(df)
\ No newline at end of file
+# Run code
+if __name__ == "__main__":
+    main()
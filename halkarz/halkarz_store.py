@@ -0,0 +1,155 @@
+"""
+SQLite store of the scraped IPOs, replacing the rewrite-everything halkarz.json.
+
+    halkarz-store migrate halkarz.json
+    halkarz-store export halkarz.json
+    halkarz-store pending
+
+The store lives in the data directory (common.paths); a new store is seeded from the
+halkarz.json shipped with the package. Scraper runs only write the store; halkarz.json is
+written on demand with export (or the scrapers' --json).
+"""
+import argparse
+import json
+import os
+import sqlite3
+
+from common.paths import data_path, ensure_parent
+
+HALKARZ_DIR = os.path.dirname(os.path.abspath(__file__))
+HALKARZ_DB_PATH = data_path("halkarz.sqlite")
+HALKARZ_JSON_PATH = os.path.join(HALKARZ_DIR, "halkarz.json")  # shipped seed, only read
+HALKARZ_EXPORT_PATH = data_path("halkarz.json")
+FIRST_TRADE = "Bist İlk İşlem Tarihi"
+PENDING = "Hazırlanıyor..."
+
+class HalkarzStore:
+    """
+    Keeps every company as in halkarz.json, {Bist Kodu: [company_data, link]}, one row per
+    Bist Kodu in insertion order. The first trade date is kept in its own indexed column so the
+    companies still "Hazırlanıyor..." are found without reading the others, links are indexed
+    for the incremental scraper, and every write is one transaction. The ETag/Last-Modified
+    validators of company pages are kept too, so a refresh can ask for unchanged pages with a 304.
+    """
+    def __init__(self, path=HALKARZ_DB_PATH):
+        self.conn = sqlite3.connect(ensure_parent(path))
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS company ("
+                "code TEXT PRIMARY KEY, data TEXT NOT NULL, link TEXT NOT NULL, first_trade TEXT)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS company_first_trade ON company (first_trade)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS company_link ON company (link)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS validator (url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT)")
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM company").fetchone()[0]
+
+    def rows(self, entries):
+        return [
+            (code, json.dumps(company_data, ensure_ascii=False), company_link, company_data.get(FIRST_TRADE))
+            for code, (company_data, company_link) in entries.items()
+        ]
+
+    def add(self, entries):
+        """
+        Inserts the {Bist Kodu: [company_data, link]} entries whose Bist Kodu is not stored yet
+        and returns how many were added; stored companies are left as they are.
+        """
+        with self.conn:
+            return self.conn.executemany("INSERT OR IGNORE INTO company VALUES (?, ?, ?, ?)", self.rows(entries)).rowcount
+
+    def upsert(self, entries, validators=None):
+        """
+        Inserts or replaces the {Bist Kodu: [company_data, link]} entries; replaced companies keep
+        their position. validators is a {url: (etag, last_modified)} map committed with the rows.
+        """
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO company VALUES (?, ?, ?, ?) ON CONFLICT (code) DO UPDATE SET "
+                "data = excluded.data, link = excluded.link, first_trade = excluded.first_trade",
+                self.rows(entries),
+            )
+            if validators:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO validator VALUES (?, ?, ?)",
+                    [(url, etag, last_modified) for url, (etag, last_modified) in validators.items()],
+                )
+
+    def validators(self):
+        """
+        The stored {url: (etag, last_modified)} validators of company pages.
+        """
+        return {url: (etag, last_modified) for url, etag, last_modified in self.conn.execute("SELECT * FROM validator")}
+
+    def query(self, sql, params=()):
+        return {code: [json.loads(data), company_link] for code, data, company_link in self.conn.execute(sql, params)}
+
+    def entries(self):
+        return self.query("SELECT code, data, link FROM company ORDER BY rowid")
+
+    def pending(self):
+        """
+        The entries whose first trade date is still "Hazırlanıyor...".
+        """
+        return self.query("SELECT code, data, link FROM company WHERE first_trade = ? ORDER BY rowid", (PENDING,))
+
+    def link_index(self):
+        """
+        The company link -> Bist Kodu index of the stored companies.
+        """
+        return dict(self.conn.execute("SELECT link, code FROM company ORDER BY rowid"))
+
+    def migrate_json(self, json_file=HALKARZ_JSON_PATH):
+        """
+        Adds the companies of a halkarz.json file that are not stored yet; returns how many.
+        """
+        with open(json_file, "r", encoding="utf-8") as f:
+            return self.add(json.load(f))
+
+    def export_json(self, json_file=HALKARZ_EXPORT_PATH):
+        """
+        Writes the store in the halkarz.json layout; the file is replaced atomically.
+        """
+        with open(ensure_parent(json_file) + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.entries(), f, ensure_ascii=False, indent=4)
+        os.replace(json_file + ".tmp", json_file)
+        return json_file
+
+    def close(self):
+        self.conn.close()
+
+def open_store(path=HALKARZ_DB_PATH, json_file=HALKARZ_JSON_PATH):
+    """
+    Opens the store, filling a new (empty) one from json_file when that file exists.
+    """
+    store = HalkarzStore(path)
+    if len(store) == 0 and json_file is not None and os.path.exists(json_file):
+        print(f"Migrated {store.migrate_json(json_file)} companies from {json_file}.")
+    return store
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=HALKARZ_DB_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate = commands.add_parser("migrate", help="add the companies of a halkarz.json file")
+    migrate.add_argument("json_file", nargs="?", default=HALKARZ_JSON_PATH)
+    export = commands.add_parser("export", help="write the store as halkarz.json")
+    export.add_argument("json_file", nargs="?", default=HALKARZ_EXPORT_PATH)
+    commands.add_parser("pending", help="print the companies without a first trade date")
+    args = parser.parse_args()
+
+    store = HalkarzStore(args.db)
+    try:
+        if args.command == "migrate":
+            print(f"Added {store.migrate_json(args.json_file)} companies.")
+        elif args.command == "export":
+            print(f"Exported {len(store)} companies to {store.export_json(args.json_file)}.")
+        else:
+            for code, (company_data, company_link) in store.pending().items():
+                print(f"{code:<8} {company_data.get('İhraççı', '')}  {company_link}")
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,54 +1,122 @@
-import requests
-from bs4 import BeautifulSoup
-import json
-
-# Define headers with a User-Agent
-headers = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-}
-
-def update_bist_ilk_islem_tarihi(json_file):
-    # Read the existing JSON file
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    for company_code, company_info in data.items():
-        company_data, company_link = company_info
-
-        if company_data.get("Bist İlk İşlem Tarihi") == "Hazırlanıyor...":
-            # Fetch the company page HTML with headers
-            company_page_response = requests.get(company_link, headers=headers)
-            if company_page_response.status_code == 200:
-                company_page_html = company_page_response.text
-
-                # Parse the company page HTML with BeautifulSoup
-                company_soup = BeautifulSoup(company_page_html, 'html.parser')
-
-                # Extract the desired information
-                company_article = company_soup.find('article', class_='single-page')
-                if company_article:
-                    # Extract the rows of the table
-                    rows = company_article.find_all('tr')
-
-                    for row in rows:
-                        cells = row.find_all('td')
-                        if len(cells) == 2:
-                            label = cells[0].text.strip()
-                            value = cells[1].text.strip()
-
-                            if "Bist İlk İşlem Tarihi" in label:
-                                # Check if the value is a date
-                                if value != "Hazırlanıyor...":
-                                    # Update the "Bist İlk İşlem Tarihi"
-                                    data[company_code][0]["Bist İlk İşlem Tarihi"] = value
-                                    print(f"Updated 'Bist İlk İşlem Tarihi' for {company_code} to {value}")
-                                else:
-                                    print(f"Date not ready yet for {company_code}.")
-                                break
-
-    # Write the updated data back to the JSON file
-    with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
-
-# Update the 'Bist İlk İşlem Tarihi' in the 'halkarz.json' file
-update_bist_ilk_islem_tarihi('halkarz.json')
\ No newline at end of file
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from common.http_client import default_client
+from common.lazy import lazy_import
+from halkarz.halkarz_store import open_store, FIRST_TRADE, PENDING, HALKARZ_DB_PATH
+
+# Loaded on first use
+bs4 = lazy_import("bs4")
+
+def first_trade_date(company_page_html):
+    """
+    Returns the "Bist İlk İşlem Tarihi" value of a company page, or None if it has no such row.
+    """
+    # Parse only article.single-page, which holds the company table, with BeautifulSoup
+    company_article = bs4.BeautifulSoup(company_page_html, 'html.parser', parse_only=bs4.SoupStrainer('article', class_='single-page'))
+
+    # Extract the rows of the table
+    for row in company_article.find_all('tr'):
+        cells = row.find_all('td')
+        if len(cells) == 2:
+            label = cells[0].text.strip()
+            value = cells[1].text.strip()
+
+            if FIRST_TRADE in label:
+                return value
+    return None
+
+def refresh_company(company_link, validator, client=None):
+    """
+    Fetches a pending company page, conditionally when its (etag, last_modified) validator is
+    known. Returns (status, first trade date, new validator) with status "not_modified" (the page
+    is unchanged, so the date is still pending), "failed" or "fetched".
+    """
+    headers = {}
+    if validator is not None:
+        etag, last_modified = validator
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    # Fetch the company page HTML; the store keeps the validators, not the client
+    company_page_response = (client or default_client()).get(company_link, conditional=False, headers=headers)
+    if company_page_response.status_code == 304:
+        return "not_modified", PENDING, validator
+    if company_page_response.status_code != 200:
+        return "failed", None, validator
+    validator = (company_page_response.headers.get("ETag"), company_page_response.headers.get("Last-Modified"))
+    return "fetched", first_trade_date(company_page_response.text), validator
+
+def update_bist_ilk_islem_tarihi(store, workers=8):
+    """
+    Refreshes the companies still waiting for their first trade date, found through the store's
+    pending index. Their pages are fetched concurrently over the shared client's pooled session
+    and only their article.single-page is parsed; unchanged pages cost a 304. The new dates and
+    page validators are written back in one transaction. Returns the number of companies updated.
+    store may also be the path of a halkarz.json file, as before the store: its companies are
+    added to the default store, and the file is rewritten from the store after the refresh.
+    """
+    if isinstance(store, (str, os.PathLike)):
+        return update_json_file(store, workers)
+    pending = store.pending()
+    validators = store.validators()
+    client = default_client()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda link: refresh_company(link, validators.get(link), client),
+                                    [company_link for company_data, company_link in pending.values()]))
+
+    updates = {}
+    new_validators = {}
+    for (company_code, (company_data, company_link)), (status, value, validator) in zip(pending.items(), results):
+        if validator is not None and any(validator):
+            new_validators[company_link] = validator
+        if status == "failed" or value is None:
+            continue
+        # Check if the value is a date
+        if value != PENDING:
+            # Update the "Bist İlk İşlem Tarihi"
+            company_data[FIRST_TRADE] = value
+            updates[company_code] = [company_data, company_link]
+            print(f"Updated 'Bist İlk İşlem Tarihi' for {company_code} to {value}")
+        else:
+            print(f"Date not ready yet for {company_code}.")
+
+    # Write the new dates and validators back in one transaction
+    store.upsert(updates, validators=new_validators)
+    return len(updates)
+
+def update_json_file(json_file, workers=8, db_path=None):
+    """
+    update_bist_ilk_islem_tarihi for a halkarz.json path.
+    """
+    store = open_store(db_path or HALKARZ_DB_PATH)
+    try:
+        store.migrate_json(json_file)
+        updated = update_bist_ilk_islem_tarihi(store, workers)
+        store.export_json(json_file)
+    finally:
+        store.close()
+    return updated
+
+def main():
+    parser = argparse.ArgumentParser(description="Refreshes the pending 'Bist İlk İşlem Tarihi' of the halkarz store.")
+    parser.add_argument("--db", default=HALKARZ_DB_PATH, help="HalkarzStore database (default halkarz.sqlite in the data directory)")
+    parser.add_argument("--json", help="also export the store to this halkarz.json when it changed")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    store = open_store(args.db)
+    try:
+        updated = update_bist_ilk_islem_tarihi(store, workers=args.workers)
+        if args.json and (updated or not os.path.exists(args.json)):
+            store.export_json(args.json)
+    finally:
+        store.close()
+
+# Update the 'Bist İlk İşlem Tarihi' in the halkarz store
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from common.paths import ensure_parent
+
+class CouponRateCache:
+    """
+    On-disk cache of cbonds coupon rates keyed by ISIN.
+    "Not found" results (None) are cached too, with their own TTL. The table is capped at
+    max_entries rows, evicting the least recently used ISINs first. Concurrent lookups of the
+    same ISIN share one in-flight request.
+    """
+    def __init__(self, path, ttl=30 * 24 * 3600, negative_ttl=7 * 24 * 3600, max_entries=5000):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.inflight = {}
+        self.conn = sqlite3.connect(ensure_parent(path), check_same_thread=False)
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS coupon_rate ("
+                "isin TEXT PRIMARY KEY, rate REAL, fetched_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS coupon_rate_last_used ON coupon_rate (last_used)")
+
+    def _lookup(self, isin, now):
+        row = self.conn.execute("SELECT rate, fetched_at FROM coupon_rate WHERE isin = ?", (isin,)).fetchone()
+        if row is None:
+            return False, None
+        rate, fetched_at = row
+        ttl = self.ttl if rate is not None else self.negative_ttl
+        if now - fetched_at > ttl:
+            return False, None
+        with self.conn:
+            self.conn.execute("UPDATE coupon_rate SET last_used = ? WHERE isin = ?", (now, isin))
+        return True, rate
+
+    def _store(self, isin, rate, now):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO coupon_rate (isin, rate, fetched_at, last_used) VALUES (?, ?, ?, ?)",
+                (isin, rate, now, now),
+            )
+            self.conn.execute(
+                "DELETE FROM coupon_rate WHERE isin IN ("
+                "SELECT isin FROM coupon_rate ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def get(self, isin, fetch):
+        """
+        Returns the cached rate for isin, calling fetch(isin) on a miss.
+        Errors raised by fetch are passed on to every waiting caller and are not cached.
+        """
+        with self.lock:
+            found, rate = self._lookup(isin, time.time())
+            if found:
+                self.hits += 1
+                return rate
+            future = self.inflight.get(isin)
+            if future is not None:
+                self.hits += 1
+                owner = False
+            else:
+                self.misses += 1
+                future = self.inflight[isin] = Future()
+                owner = True
+
+        if not owner:
+            return future.result()
+
+        try:
+            rate = fetch(isin)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            with self.lock:
+                self._store(isin, rate, time.time())
+            future.set_result(rate)
+            return rate
+        finally:
+            with self.lock:
+                del self.inflight[isin]
+
+    def stats(self):
+        with self.lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM coupon_rate").fetchone()[0]
+            return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def close(self):
+        self.conn.close()
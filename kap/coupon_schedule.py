@@ -0,0 +1,96 @@
+"""
+Local coupon schedule engine for disclosures whose Bildirim page has no usable cash-flow table.
+
+A schedule spec is a dict with the keys
+    ISIN_CODE, ISSUE_DATE, MATURITY_DATE, FREQUENCY, COUPON_COUNT, COUPON (annual simple rate, %),
+    DAY_YEAR_BASIS ("ACTL365", "EU30360" or "US30360") and COUPON_DATES (payment dates or None).
+When COUPON_DATES is None the payment dates are rolled back from MATURITY_DATE (required)
+every 12 / FREQUENCY months; rolled dates on or before the issue date are dropped, so a
+COUPON_COUNT the tenor cannot hold gives fewer payments. The periodic rate of each payment is
+the annual rate times the year fraction of its accrual period under the day-count basis; the
+first period accrues from the issue date. All specs of a run are computed together with numpy array operations.
+"""
+from common.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+def year_fractions(start, end, basis):
+    """
+    Year fraction of every [start, end) period (datetime64[D] arrays) under its basis.
+    """
+    actual = (end - start).astype("int64") / 365.0
+
+    # 30/360: whole months between both ends plus the day difference
+    m1, m2 = start.astype("datetime64[M]"), end.astype("datetime64[M]")
+    d1 = (start - m1.astype("datetime64[D]")).astype("int64") + 1
+    d2 = (end - m2.astype("datetime64[D]")).astype("int64") + 1
+    months = (m2 - m1).astype("int64")
+    d1 = np.minimum(d1, 30)
+    # 30E/360 caps both days at 30; the US bond basis only when the period starts on the 30th or 31st
+    d2 = np.where((basis == "EU30360") | (d1 == 30), np.minimum(d2, 30), d2)
+    thirty = (30 * months + (d2 - d1)) / 360.0
+
+    return np.where(basis == "ACTL365", actual, thirty)
+
+def rolled_dates(maturity, step, counts):
+    """
+    Payment dates rolled back from each maturity every step months, counts[i] dates for
+    security i, ascending. Returns (owner, position, dates) over the flattened schedule.
+    """
+    owner = np.repeat(np.arange(len(counts)), counts)
+    position = np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)
+    periods_back = counts[owner] - 1 - position
+
+    maturity_day = maturity[owner]
+    maturity_month = maturity_day.astype("datetime64[M]")
+    day = (maturity_day - maturity_month.astype("datetime64[D]")).astype("int64")
+    month = maturity_month - (periods_back * step[owner]).astype("timedelta64[M]")
+    month_length = ((month + 1).astype("datetime64[D]") - month.astype("datetime64[D]")).astype("int64")
+    dates = month.astype("datetime64[D]") + np.minimum(day, month_length - 1).astype("timedelta64[D]")
+    return owner, position, dates
+
+def coupon_schedules(specs):
+    """
+    Returns one list of SecurityCoupon records (ISIN_CODE, COUPON_DATE, COUPON_RATE) per spec.
+    """
+    if len(specs) == 0:
+        return []
+    for spec in specs:
+        if spec["COUPON_DATES"] is None and spec["MATURITY_DATE"] is None:
+            raise ValueError(f"{spec['ISIN_CODE']}: a rolled coupon schedule needs a maturity date")
+    explicit = np.array([spec["COUPON_DATES"] is not None for spec in specs])
+    counts = np.array([len(spec["COUPON_DATES"]) if spec["COUPON_DATES"] is not None else spec["COUPON_COUNT"] for spec in specs], dtype="int64")
+    issue = np.array([spec["ISSUE_DATE"] for spec in specs], dtype="datetime64[D]")
+    maturity = np.array([spec["MATURITY_DATE"] for spec in specs], dtype="datetime64[D]")
+    annual = np.array([spec["COUPON"] if spec["COUPON"] is not None else np.nan for spec in specs], dtype="float64")
+    basis = np.array([spec["DAY_YEAR_BASIS"] for spec in specs])
+
+    # Roll step in months: 12 / FREQUENCY, or the tenor split evenly when the frequency is unknown
+    frequency = np.array([spec["FREQUENCY"] or 0 for spec in specs], dtype="int64")
+    tenor = (maturity.astype("datetime64[M]") - issue.astype("datetime64[M]")).astype("int64")
+    step = np.where(frequency > 0, 12 // np.maximum(frequency, 1), np.rint(tenor / np.maximum(counts, 1)))
+    step = np.maximum(step, 1).astype("int64")
+
+    owner, _, dates = rolled_dates(maturity, step, counts)
+    if explicit.any():
+        given = [date for spec in specs if spec["COUPON_DATES"] is not None for date in spec["COUPON_DATES"]]
+        dates[explicit[owner]] = np.array(given, dtype="datetime64[D]")
+
+    # Rolled dates can reach back before the issue date when COUPON_COUNT does not fit the tenor
+    keep = explicit[owner] | (dates > issue[owner])
+    owner, dates = owner[keep], dates[keep]
+
+    # Accrual starts at the previous payment, or at the issue date for the first one
+    start = np.empty_like(dates)
+    start[1:] = dates[:-1]
+    first = np.ones(len(owner), dtype=bool)
+    first[1:] = owner[1:] != owner[:-1]
+    start[first] = issue[owner][first]
+    rates = annual[owner] * year_fractions(start, dates, basis[owner])
+
+    coupon_dates = dates.astype("datetime64[us]").tolist()
+    coupon_rates = [None if np.isnan(rate) else rate for rate in rates.tolist()]
+    schedules = [[] for _ in specs]
+    for i, coupon_date, coupon_rate in zip(owner.tolist(), coupon_dates, coupon_rates):
+        schedules[i].append({"ISIN_CODE": specs[i]["ISIN_CODE"], "COUPON_DATE": coupon_date, "COUPON_RATE": coupon_rate})
+    return schedules
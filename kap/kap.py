@@ -1,11 +1,37 @@
+import argparse
 import json
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-import xlwings as xw
-from datetime import date
+from datetime import date, datetime
 import re
 import unicodedata
+import codecs
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from kap.coupon_cache import CouponRateCache
+from kap.kap_store import KapStore
+from kap.kap_frames import RecordBuilder, SECURITY_SCHEMA, COUPON_SCHEMA, security_frames
+from kap.coupon_schedule import coupon_schedules
+from common.writers import Sheet, export_sheets
+from common import instrument
+from common.http_client import default_client
+from common.lazy import lazy_import
+from common.paths import data_path
+
+# Loaded on first use, so the parsing helpers import without them
+bs4 = lazy_import("bs4")
+pd = lazy_import("pandas")
+xw = lazy_import("xlwings")
+
+KAP_BASE_URL = "https://www.kap.org.tr"
+
+# cbonds coupon rates found through Google are kept here between runs
+COUPON_CACHE_PATH = data_path("coupon_rates.sqlite")
+coupon_rate_cache = None
+coupon_rate_cache_lock = threading.Lock()
+
+# Security master used by incremental runs (kap_sync)
+KAP_DB_PATH = data_path("kap.sqlite")
 
 def normalize_text(text):
     """
@@ -22,18 +48,13 @@ def get_coupon_rate_via_google(isin_code):
     query = f'site:cbonds.com "{isin_code}"'
     google_url = f"https://www.google.com/search?q={query}"
 
-    # Headers to avoid bot detection
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
-
-    # Make the request to Google
-    response = requests.get(google_url, headers=headers)
+    # Make the request to Google (the shared client sends a browser User-Agent and throttles google.com)
+    response = default_client().get(google_url, conditional=False)
     if response.status_code != 200:
         raise ValueError("Failed to fetch Google search results.")
 
     # Parse the Google search results page
-    soup = BeautifulSoup(response.text, 'html.parser')
+    soup = bs4.BeautifulSoup(response.text, 'html.parser')
 
     # Find all Google search results
     search_results = soup.select("div.g")
@@ -63,6 +84,16 @@ def get_coupon_rate_via_google(isin_code):
 
     return coupon_rate
 
+def get_coupon_rate(isin_code):
+    """
+    get_coupon_rate_via_google behind the persistent ISIN-keyed CouponRateCache.
+    """
+    global coupon_rate_cache
+    with coupon_rate_cache_lock:
+        if coupon_rate_cache is None:
+            coupon_rate_cache = CouponRateCache(COUPON_CACHE_PATH)
+    return coupon_rate_cache.get(isin_code, get_coupon_rate_via_google)
+
 def european_to_float(value):
     """
     Convert a European formatted string to a float.
@@ -76,34 +107,209 @@ def european_to_float(value):
     except:
         return None
 
-def get_security_params(infolist):
-    disclosureIndex = infolist[0]
-    sukuk_flag = infolist[1]
+def coupon_frequency(value, numeric=True):
+    """
+    Coupon payments per year for a "Kupon Ödeme Sıklığı" value; 0 when unknown.
+    A number of payments is only taken as is when numeric: pages with a cash-flow table map
+    just the named frequencies, so a numeric value there stays 0 and keeps the page's
+    CORP_DISCOUNTED/CORP_FIXED_COUPON classification.
+    """
+    if value is None:
+        return 0
+    frequencies = {"tek kupon": 1, "yıllık": 1, "6 ayda bir": 2, "3 ayda bir": 4, "aylık": 12}
+    if value.lower() in frequencies:
+        return frequencies[value.lower()]
+    return int(value) if numeric and value.isdigit() else 0
+
+def parse_tr_date(value):
+    """
+    Parses a "dd.mm.yyyy" date as shown on KAP pages; None stays None.
+    """
+    return datetime.strptime(value, "%d.%m.%Y") if value is not None else None
 
-    # Step 1: Fetch HTML content
-    url = f"https://www.kap.org.tr/tr/Bildirim/{disclosureIndex}"
-    response = requests.get(url)
+class DisclosureCache:
+    """
+    Run-scoped memo of KAP disclosures keyed by disclosureIndex.
+    Each Bildirim page is fetched and parsed at most once per run; fetch_count reports
+    how many network fetches actually happened.
+    """
+    def __init__(self, client=None):
+        self.client = client or default_client()
+        self.pages = {}
+        self.records = {}
+        self.fetch_count = 0
+
+    def get(self, infolist):
+        """
+        Returns the (security record, coupon records) of a disclosure.
+        """
+        disclosureIndex = infolist[0]
+        if disclosureIndex not in self.records:
+            self.records[disclosureIndex] = self.parse(infolist)
+        return self.records[disclosureIndex]
+
+    def get_many(self, disclists):
+        """
+        Returns the (security record, coupon records) of every disclosure in disclists.
+        Coupon schedules that have to be generated locally are computed in one batch for all
+        pages parsed by this call.
+        """
+        schedules = []
+        owners = []
+        for infolist in disclists:
+            disclosureIndex = infolist[0]
+            if disclosureIndex not in self.records:
+                pending = len(schedules)
+                self.records[disclosureIndex] = self.parse(infolist, schedules)
+                owners += [disclosureIndex] * (len(schedules) - pending)
+        for disclosureIndex, coupon_records in zip(owners, coupon_schedules(schedules)):
+            self.records[disclosureIndex][1].extend(coupon_records)
+        return [self.records[infolist[0]] for infolist in disclists]
+
+    def parse(self, infolist, schedules=None):
+        html_content = self.pages.pop(infolist[0], None)
+        if html_content is None:
+            html_content = fetch_disclosure_page(infolist[0], self.client)
+            self.fetch_count += 1
+        return parse_security_records(html_content, infolist, schedules)
+
+    def prefetch(self, indices, workers=8, per_host=None):
+        """
+        Downloads the pages not seen yet concurrently over the client's pooled session.
+        The requests in flight against the KAP host are capped by the client, for all of its
+        callers together; per_host sets that cap. Pages are stored by disclosureIndex so the parse
+        order stays the input order, not the completion order.
+        indices may be a lazy iterable: each download starts as soon as its index arrives.
+        """
+        if per_host is not None:
+            self.client.set_concurrency_limit(urlparse(KAP_BASE_URL).netloc, per_host)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            downloads = {}
+            for disclosureIndex in indices:
+                if disclosureIndex not in self.records and disclosureIndex not in self.pages and disclosureIndex not in downloads:
+                    downloads[disclosureIndex] = executor.submit(fetch_disclosure_page, disclosureIndex, self.client)
+            for disclosureIndex, download in downloads.items():
+                self.pages[disclosureIndex] = download.result()
+                self.fetch_count += 1
+
+def fetch_disclosure_page(disclosureIndex, client=None):
+    url = f"{KAP_BASE_URL}/tr/Bildirim/{disclosureIndex}"
+    with instrument.span("kap.http_fetch"):
+        response = (client or default_client()).get(url)
+    instrument.record_response("kap", response)
 
     if response.status_code == 200:
-        html_content = response.text
+        return response.text
     else:
         raise Exception(f"Failed to fetch webpage: {response.status_code}")
 
-    # Step 2: Parse the HTML
-    soup = BeautifulSoup(html_content, 'html.parser')
-
-    # Step 3: Extract several params
-    paramdict = {}
-    for label in ["ISIN Kodu", "Vade Tarihi", "Döviz Cinsi", "İhraç Fiyatı", "Faiz Oranı - Yıllık Basit (%)", "Satışı Gerçekleştirilen Nominal Tutar", "Satışın Tamamlanma Tarihi", "Kupon Sayısı", "Ek Getiri (%)", "Kupon Ödeme Sıklığı"]:
-        param = None
-        for row in soup.find_all("tr"):
-            label_div = row.find("div", class_="bold font14")
-            if label_div and label in label_div.text:
-                param = row.find("div", class_="gwt-HTML control-label lineheight-32px").text.strip()
-                paramdict[label] = param
-                break
-        if param is None:  # If the label isn't found, set None
-            paramdict[label] = param
+@instrument.timed("kap.get_security_params")
+def get_security_params(infolist, cache=None):
+    """
+    Returns (df_security, df_security_coupon) for a [disclosureIndex, sukuk flag, issuer code] list.
+    If a DisclosureCache is given, the page is only fetched and parsed the first time.
+    """
+    if cache is not None:
+        security_record, coupon_records = cache.get(infolist)
+        return security_frames([security_record], coupon_records)
+    return parse_security_params(fetch_disclosure_page(infolist[0]), infolist)
+
+SECURITY_LABELS = ["ISIN Kodu", "Vade Tarihi", "Döviz Cinsi", "İhraç Fiyatı", "Faiz Oranı - Yıllık Basit (%)", "Satışı Gerçekleştirilen Nominal Tutar", "Satışın Tamamlanma Tarihi", "Kupon Sayısı", "Ek Getiri (%)", "Kupon Ödeme Sıklığı"]
+LABEL_CLASS = "bold font14"
+VALUE_CLASS = "gwt-HTML control-label lineheight-32px"
+CASHFLOW_TABLE_INDEX = 5  # the cash flow table is the 6th table on pages with 10 or more tables
+
+# Parser backend for Bildirim pages: any BeautifulSoup feature ("html.parser", "lxml") or "selectolax"
+HTML_PARSER = "html.parser"
+
+def _index_labels(paramdict, label_text, get_value):
+    """
+    Assigns the row value to every label not seen yet that occurs in label_text,
+    matching the first-row-wins lookup of the original per-label scan.
+    """
+    for label in SECURITY_LABELS:
+        if paramdict[label] is None and label in label_text:
+            paramdict[label] = get_value()
+
+def _index_with_soup(html_content, parser):
+    soup = bs4.BeautifulSoup(html_content, parser)
+    paramdict = dict.fromkeys(SECURITY_LABELS)
+    tables = []
+    
+    # One walk over the document collects the label rows and the tables together
+    for tag in soup.find_all(["table", "tr"]):
+        if tag.name == "table":
+            tables.append(tag)
+            continue
+        label_div = tag.find("div", class_=LABEL_CLASS)
+        if label_div:
+            _index_labels(paramdict, label_div.text, lambda: tag.find("div", class_=VALUE_CLASS).text.strip())
+    
+    cashflow_rows = None
+    if len(tables) >= 10:
+        cashflow_rows = [[cell.text.strip() for cell in row.find_all("td")] for row in tables[CASHFLOW_TABLE_INDEX].find_all("tr")]
+    return paramdict, len(tables), cashflow_rows
+
+def _index_with_selectolax(html_content):
+    from selectolax.lexbor import LexborHTMLParser
+    
+    tree = LexborHTMLParser(html_content)
+    paramdict = dict.fromkeys(SECURITY_LABELS)
+    tables = []
+    
+    for node in tree.css("table, tr"):
+        if node.tag == "table":
+            tables.append(node)
+            continue
+        label_div = node.css_first(f'div[class="{LABEL_CLASS}"]')
+        if label_div is not None:
+            _index_labels(paramdict, label_div.text(), lambda: node.css_first(f'div[class="{VALUE_CLASS}"]').text().strip())
+    
+    cashflow_rows = None
+    if len(tables) >= 10:
+        cashflow_rows = [[cell.text().strip() for cell in row.css("td")] for row in tables[CASHFLOW_TABLE_INDEX].css("tr")]
+    return paramdict, len(tables), cashflow_rows
+
+@instrument.timed("kap.html_parse")
+def index_disclosure_page(html_content, parser=None):
+    """
+    Walks a Bildirim page once and returns (paramdict, table_count, cashflow_rows):
+    the value of every label in SECURITY_LABELS (None if missing), the number of tables,
+    and the cell texts of the cash flow table (None when the page has fewer than 10 tables).
+    """
+    parser = parser or HTML_PARSER
+    if parser == "selectolax":
+        return _index_with_selectolax(html_content)
+    return _index_with_soup(html_content, parser)
+
+def parse_security_params(html_content, infolist):
+    """
+    Returns (df_security, df_security_coupon) for one Bildirim page.
+    """
+    security_record, coupon_records = parse_security_records(html_content, infolist)
+    return security_frames([security_record], coupon_records)
+
+def parse_security_records(html_content, infolist, schedules=None):
+    """
+    Extracts the Security row of a Bildirim page as a dict and its SecurityCoupon rows
+    as a list of dicts, in the column layout of kap_frames.SECURITY_SCHEMA/COUPON_SCHEMA.
+    """
+    # Parse the HTML into a label -> value index and the cash-flow table rows
+    paramdict, table_count, cashflow_rows = index_disclosure_page(html_content)
+    return extract_security_records(paramdict, table_count, cashflow_rows, infolist, schedules)
+
+@instrument.timed("kap.field_extract")
+def extract_security_records(paramdict, table_count, cashflow_rows, infolist, schedules=None):
+    """
+    Coupon rows the page does not list are generated by coupon_schedule: the whole schedule
+    when a page with several coupons has no cash flow table, and the periodic rates when the
+    table has no "Faiz Oranı - Dönemsel (%)" column. With a schedules list the schedule spec is
+    appended to it and the returned coupon list is left for the caller to fill in a batch.
+    """
+    sukuk_flag = infolist[1]
+    schedule_dates = None  # "rolled" or the payment dates when the coupon rows are generated
+    annual_rate = None
     
     # print("-"*20)
     # print("ISIN:", paramdict["ISIN Kodu"])
@@ -111,17 +317,11 @@ def get_security_params(infolist):
     # Security Coupon Sheet
     
     # If 0 or 1 coupon payment, there is no cash flow table
-    if len(soup.find_all("table")) < 10:
+    if table_count < 10:
         coupon = (european_to_float(paramdict["Faiz Oranı - Yıllık Basit (%)"]) if paramdict["Faiz Oranı - Yıllık Basit (%)"] != None else 0)
         
         # Frequency
-        if paramdict["Kupon Ödeme Sıklığı"] is None:
-            frequency = 0
-        else:
-            if paramdict["Kupon Ödeme Sıklığı"] == "Tek Kupon":
-                frequency = 1
-            else:
-                frequency = (int(paramdict["Kupon Ödeme Sıklığı"]) if paramdict["Kupon Ödeme Sıklığı"] != "Diğer" else 0)
+        frequency = coupon_frequency(paramdict["Kupon Ödeme Sıklığı"])
         
         # Classification
         fis_dict={}
@@ -133,81 +333,59 @@ def get_security_params(infolist):
             else:
                 inst_type = "CORP_FIXED_COUPON"
         
-        discdict = {"ISIN_CODE":paramdict["ISIN Kodu"], "COUPON_DATE":pd.to_datetime(paramdict["Vade Tarihi"], format="%d.%m.%Y"), "COUPON_RATE":coupon}
-        df_security_coupon = pd.Series(discdict)
-        df_security_coupon = df_security_coupon.to_frame().T
-        df_security_coupon.set_index("ISIN_CODE", inplace=True)
+        discdict = {"ISIN_CODE":paramdict["ISIN Kodu"], "COUPON_DATE":parse_tr_date(paramdict["Vade Tarihi"]), "COUPON_RATE":coupon}
+        coupon_records = [discdict]
         
-        # if no coupon payments, pass empty dataframe
+        # if no coupon payments, pass no coupon rows
         if paramdict["Kupon Sayısı"] is None:
-            df_security_coupon = df_security_coupon.iloc[0:0]
+            coupon_records = []
         elif int(paramdict["Kupon Sayısı"]) == 0:
-            df_security_coupon = df_security_coupon.iloc[0:0]
+            coupon_records = []
+        elif int(paramdict["Kupon Sayısı"]) > 1:
+            # several coupons but no cash flow table: roll the schedule back from maturity
+            schedule_dates = "rolled"
+            annual_rate = coupon
+            coupon_records = []
         
     # If more than 1 coupon payments, there is a cash flow table:
     else:
         # print("    HTML length greater than 10")
-        table = soup.find_all("table")[5]
-        rows = table.find_all("tr")
-
-        # Extract the table headers
-        headers = [header.text.strip() for header in rows[0].find_all("td")]
-        
-        # Extract the table data
-        data = []
-        for row in rows[1:]:
-            data.append([cell.text.strip() for cell in row.find_all("td")])
-
-        # Create the DataFrame
-        df = pd.DataFrame(data, columns=headers)
+        # Extract the table headers and data, the last row has no use
+        headers = cashflow_rows[0]
+        data = cashflow_rows[1:-1]
         
-        # Drop last row as it has no use
-        df = df.iloc[:(df.shape[0] - 1), :]
+        def column(name):
+            position = headers.index(name)
+            return [row[position] for row in data]
         
         # Coupon Frequency
-        if paramdict["Kupon Ödeme Sıklığı"] is None:
-            frequency  = 0
-        elif paramdict["Kupon Ödeme Sıklığı"].lower() == "tek kupon":
-            frequency = 1
-        elif paramdict["Kupon Ödeme Sıklığı"].lower() == "yıllık":
-            frequency = 1
-        elif paramdict["Kupon Ödeme Sıklığı"].lower() == "6 ayda bir":
-            frequency = 2
-        elif paramdict["Kupon Ödeme Sıklığı"].lower() == "3 ayda bir":
-            frequency = 4
-        elif paramdict["Kupon Ödeme Sıklığı"].lower() == "aylık":
-            frequency = 12
-        else:
-            frequency = 0
-        
-        try:
-            df["Faiz Oranı - Dönemsel (%)"] = df["Faiz Oranı - Dönemsel (%)"].apply(european_to_float)
-        except KeyError:
-            df["Faiz Oranı - Dönemsel (%)"] = ((get_coupon_rate_via_google(paramdict["ISIN Kodu"]) / frequency) if get_coupon_rate_via_google(paramdict["ISIN Kodu"]) != None else None)
-            df["Faiz Oranı - Yıllık Basit (%)"] = (get_coupon_rate_via_google(paramdict["ISIN Kodu"]) if get_coupon_rate_via_google(paramdict["ISIN Kodu"]) != None else None)
-        
-        df["COUPON_DATE"] = pd.to_datetime(df["Ödeme Tarihi"], format="%d.%m.%Y")
-        df["ISIN_CODE"] = paramdict["ISIN Kodu"]
+        frequency = coupon_frequency(paramdict["Kupon Ödeme Sıklığı"], numeric=False)
         
-        print("   df after manipulatons")
-        print(df)
+        if "Faiz Oranı - Dönemsel (%)" in headers:
+            periodic_rates = [european_to_float(value) for value in column("Faiz Oranı - Dönemsel (%)")]
+            coupon_records = [
+                {"ISIN_CODE": paramdict["ISIN Kodu"], "COUPON_DATE": parse_tr_date(payment_date), "COUPON_RATE": rate}  # removed .dropna()
+                for payment_date, rate in zip(column("Ödeme Tarihi"), periodic_rates)
+            ]
+        else:
+            # Periodic rates follow from the annual rate and the day-count basis;
+            # the rate is only searched online when the page does not state it
+            annual_rate = european_to_float(paramdict["Faiz Oranı - Yıllık Basit (%)"])
+            if annual_rate is None:
+                annual_rate = get_coupon_rate(paramdict["ISIN Kodu"])
+            schedule_dates = [parse_tr_date(payment_date) for payment_date in column("Ödeme Tarihi")]
+            coupon_records = []
         
         # Set coupon rate depending if FRN or not
         if paramdict["Faiz Oranı - Yıllık Basit (%)"] == None:
-            coupon = european_to_float(df["Faiz Oranı - Yıllık Basit (%)"][0])
+            coupon = european_to_float(column("Faiz Oranı - Yıllık Basit (%)")[0]) if "Faiz Oranı - Dönemsel (%)" in headers else annual_rate
         else:
             coupon = european_to_float(paramdict["Faiz Oranı - Yıllık Basit (%)"])
-
-        df_security_coupon = df.loc[:, ["ISIN_CODE", "COUPON_DATE", "Faiz Oranı - Dönemsel (%)"]]  # removed .dropna()
-        df_security_coupon.columns = ["ISIN_CODE", "COUPON_DATE", "COUPON_RATE"]
-        df_security_coupon.set_index("ISIN_CODE", inplace=True)
-        
-        # print("  Kupon Sayısı =", paramdict["Kupon Sayısı"])
-        # print(df_security_coupon)
         
-        # if no coupon payments, pass empty dataframe
+        # if no coupon payments, pass no coupon rows
         if paramdict["Kupon Sayısı"] in [0, None]:
-            df_security_coupon = df_security_coupon.iloc[0:0]
+            coupon_records = []
+            schedule_dates = None
 
     # Security Sheet
     # Basis
@@ -229,14 +407,14 @@ def get_security_params(infolist):
     fis_dict = {
         "ISIN_CODE": paramdict["ISIN Kodu"],
         "INSTRUMENT_TYPE": None,  # instrument type is assigned below
-        "MATURITY_DATE": pd.to_datetime(paramdict["Vade Tarihi"], format="%d.%m.%Y"),
+        "MATURITY_DATE": parse_tr_date(paramdict["Vade Tarihi"]),
         "CURRENCY": paramdict["Döviz Cinsi"],
         "FREQUENCY": (int(frequency) if frequency is not None else None),
         "COUPON": coupon,
         "SPREAD": spread,
         "ISSUER_CODE": infolist[2],  # third element of input list is issuer code
         "ISSUE_INDEX": 0,  # hard-coded, fix later
-        "ISSUE_DATE": [pd.to_datetime(paramdict["Satışın Tamamlanma Tarihi"], format="%d.%m.%Y") if paramdict["Satışın Tamamlanma Tarihi"] != None else date.today()][0],
+        "ISSUE_DATE": [parse_tr_date(paramdict["Satışın Tamamlanma Tarihi"]) if paramdict["Satışın Tamamlanma Tarihi"] != None else date.today()][0],
         "DAY_YEAR_BASIS": basis,
         "ISSUE_PRICE": [european_to_float(paramdict["İhraç Fiyatı"]) * 100 if paramdict["İhraç Fiyatı"] != None else 100][0],
         "totalIssuedAmount": european_to_float(paramdict["Satışı Gerçekleştirilen Nominal Tutar"]),
@@ -245,7 +423,7 @@ def get_security_params(infolist):
     }
 
     # Instrument Type
-    if len(soup.find_all("table")) < 10:
+    if table_count < 10:
         fis_dict["INSTRUMENT_TYPE"] = inst_type
     else:
         if sukuk_flag:
@@ -271,65 +449,246 @@ def get_security_params(infolist):
             else:
                 fis_dict["INSTRUMENT_TYPE"] = "EUROBOND"
 
-    # Generate security dataframe from fis_dict
-    df_security = pd.Series(fis_dict)
-    df_security = df_security.to_frame().T
-    df_security.set_index("ISIN_CODE", inplace=True)
+    # A schedule is only rolled back from a known maturity; without one the page gets no coupon rows
+    if schedule_dates == "rolled" and fis_dict["MATURITY_DATE"] is None:
+        schedule_dates = None
+    if schedule_dates is not None:
+        spec = {
+            "ISIN_CODE": fis_dict["ISIN_CODE"],
+            "ISSUE_DATE": fis_dict["ISSUE_DATE"],
+            "MATURITY_DATE": fis_dict["MATURITY_DATE"],
+            "FREQUENCY": fis_dict["FREQUENCY"],
+            "COUPON_COUNT": int(paramdict["Kupon Sayısı"]),
+            "COUPON": annual_rate,
+            "DAY_YEAR_BASIS": basis,
+            "COUPON_DATES": None if schedule_dates == "rolled" else schedule_dates,
+        }
+        if schedules is None:
+            coupon_records = coupon_schedules([spec])[0]
+        else:
+            schedules.append(spec)
 
-    return df_security, df_security_coupon
+    return fis_dict, coupon_records
 
-def parse_disclosures(issue_only):
-    paramlist = []
-    # Retrieve the data from the API
-    url = "https://www.kap.org.tr/tr/api/disclosures"
-    response = requests.get(url)
+BOND_TITLE = "Pay Dışında Sermaye Piyasası Aracı İşlemlerine İlişkin Bildirim (Faiz İçeren)"
+# Keywords of the normalized summary: issuance/completion notices qualify unless they are redemptions
+ISSUE_PATTERN = re.compile(r"ihrac|tamamlanmasi")
+REDEMPTION_PATTERN = re.compile(r"itfa")
+FEED_CHUNK_SIZE = 64 * 1024
+JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
 
-    # Check if the request was successful
-    if response.status_code == 200:
-        # Parse the JSON response
-        disclosures = json.loads(response.text)
+class NoDisclosures(ValueError):
+    """
+    The feed was read fine but has no matching disclosure (after the watermark, if any).
+    """
+
+def disclosure_params(disc, issue_only):
+    """
+    Returns the [disclosureIndex, sukuk flag, issuer code] list of a "basic" disclosure item
+    if it is a bond disclosure (an issuance when issue_only), else None.
+    """
+    if disc["title"] != BOND_TITLE:
+        # elif disc["title"] == "Pay Dışında Sermaye Piyasası Aracı İşlemlerine İlişkin Bildirim (Faizsiz)":
+        #     return [disc["disclosureIndex"], True, disc["stockCodes"].split(',')[0].strip()]  # [sukuk flag, issuer code]
+        return None
+    if issue_only:
+        normalized_summary = normalize_text(disc["summary"])
+        if not ISSUE_PATTERN.search(normalized_summary) or REDEMPTION_PATTERN.search(normalized_summary):
+            return None
+    return [disc["disclosureIndex"], False, disc["stockCodes"].split(',')[0].strip()]  # [sukuk flag, issuer code]
+
+def iter_json_array(chunks):
+    """
+    Yields the elements of a JSON array one at a time from an iterable of UTF-8 byte chunks,
+    so only the element being decoded and the unread part of the current chunk are in memory.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer, pos = "", 0
+    opened = False
+    for chunk in itertools.chain(chunks, [None]):
+        final = chunk is None
+        buffer = buffer[pos:] + text_decoder.decode(chunk or b"", final=final)
+        pos = 0
+        while True:
+            pos = JSON_WHITESPACE.match(buffer, pos).end()
+            if pos == len(buffer):
+                break
+            if not opened:
+                if buffer[pos] != "[":
+                    raise ValueError("Disclosure feed is not a JSON array.")
+                opened = True
+                pos += 1
+            elif buffer[pos] == ",":
+                pos += 1
+            elif buffer[pos] == "]":
+                return
+            else:
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    break  # the element continues in the next chunk
+                if end == len(buffer) and not final:
+                    break  # a scalar may continue in the next chunk, decode it again then
+                yield item
+                pos = end
+    raise ValueError("Disclosure feed ended before the end of the JSON array.")
+
+def iter_disclosures(issue_only, after_index=None, stream=True):
+    """
+    Yields the [disclosureIndex, sukuk flag, issuer code] lists of the bond disclosures in the
+    feed while it downloads. Items are decoded one at a time and dropped unless they match.
+    With after_index, disclosures at or below that disclosureIndex are skipped.
+    stream=False downloads the whole feed first, which lets the client revalidate it with a
+    conditional GET (used by the watcher, which polls an unchanged feed most of the time).
+    """
+    url = f"{KAP_BASE_URL}/tr/api/disclosures"
+    with instrument.span("kap.http_fetch"):
+        response = default_client().get(url, conditional=not stream, stream=stream)
+    instrument.record_response("kap", response)
+    try:
+        if response.status_code != 200:
+            raise Exception(f"Failed to retrieve data from the API: {response.status_code}")
         
-        # Extract 'basic' data into list of dictionaries
-        basic_data = [disclosure['basic'] for disclosure in disclosures]
-        # detail_data = [disclosure['detail'] for disclosure in disclosures]
-    else:
-        print("Failed to retrieve data from the API")
+        def chunks():
+            for chunk in response.iter_content(chunk_size=FEED_CHUNK_SIZE):
+                if stream:
+                    instrument.count("kap.http_bytes", len(chunk))
+                yield chunk
         
-    for disc in basic_data:
-        if disc["title"] == "Pay Dışında Sermaye Piyasası Aracı İşlemlerine İlişkin Bildirim (Faiz İçeren)":
-            normalized_summary = normalize_text(disc["summary"])
-            print("IIII  normalized summary :", normalized_summary)
-            if issue_only:
-                if (("ihrac" in normalized_summary) or ("tamamlanmasi" in normalized_summary)) and ("itfa" not in normalized_summary):
-                    paramlist.append([disc["disclosureIndex"], False, disc["stockCodes"].split(',')[0].strip()])  # [sukuk flag, issuer code]
-            else: # skip "ihraci" filter
-                paramlist.append([disc["disclosureIndex"], False, disc["stockCodes"].split(',')[0].strip()])  # [sukuk flag, issuer code]
-        # elif disc["title"] == "Pay Dışında Sermaye Piyasası Aracı İşlemlerine İlişkin Bildirim (Faizsiz)":
-        #     paramlist.append([disc["disclosureIndex"], True, disc["stockCodes"].split(',')[0].strip()])  # [sukuk flag, issuer code]
+        for disclosure in iter_json_array(chunks()):
+            disc = disclosure["basic"]
+            if after_index is not None and disc["disclosureIndex"] <= after_index:
+                continue
+            infolist = disclosure_params(disc, issue_only)
+            if infolist is not None:
+                yield infolist
+    finally:
+        response.close()
+
+@instrument.timed("kap.parse_disclosures")
+def parse_disclosures(issue_only, after_index=None, stream=True):
+    """
+    Returns [disclosureIndex, sukuk flag, issuer code] lists of the bond disclosures in the feed.
+    With after_index, disclosures at or below that disclosureIndex are skipped.
+    """
+    paramlist = list(iter_disclosures(issue_only, after_index, stream))
     if len(paramlist) == 0:
-        raise ValueError("No disclosures happened yet.")
+        raise NoDisclosures("No disclosures happened yet.")
     return paramlist
 
-def merge_disclosures(issue_only):
-    flag = True
-    for disclist in parse_disclosures(issue_only):
-        if flag:
-            df_security, df_security_coupon = get_security_params(disclist)
-            flag = False
-        else:
-            df_security = pd.concat([df_security, get_security_params(disclist)[0]])
-            df_security_coupon = pd.concat([df_security_coupon, get_security_params(disclist)[1]])
+def merge_security_frames(disclists, cache=None, workers=1, per_host=None):
+    """
+    Merges the security and coupon frames of the given disclosures.
+    With workers > 1 the Bildirim pages are downloaded concurrently first; rows keep the
+    order of disclists either way.
+    """
+    if cache is None:
+        cache = DisclosureCache()
+    
+    if workers > 1:
+        cache.prefetch([disclist[0] for disclist in disclists], workers=workers, per_host=per_host)
     
+    # Accumulate records column-wise and build each frame once at the end
+    securities = RecordBuilder(SECURITY_SCHEMA)
+    coupons = RecordBuilder(COUPON_SCHEMA)
+    for security_record, coupon_records in cache.get_many(disclists):
+        securities.append(security_record)
+        coupons.extend(coupon_records)
+    
+    with instrument.span("kap.frame_build"):
+        df_security, df_security_coupon = securities.to_frame(), coupons.to_frame()
+    instrument.count("kap.rows", len(df_security) + len(df_security_coupon))
     return df_security, df_security_coupon
+
+def merge_disclosures(issue_only, cache=None, workers=1, per_host=None):
+    """
+    merge_security_frames over the current feed. With workers > 1 each Bildirim page starts
+    downloading as soon as its disclosure has streamed in, before the rest of the feed arrives.
+    """
+    if cache is None:
+        cache = DisclosureCache()
+    disclists = []
+    
+    def feed():
+        for disclist in iter_disclosures(issue_only):
+            disclists.append(disclist)
+            yield disclist[0]
+    
+    if workers > 1:
+        cache.prefetch(feed(), workers=workers, per_host=per_host)
+    else:
+        for _ in feed():
+            pass
+    if len(disclists) == 0:
+        raise NoDisclosures("No disclosures happened yet.")
+    return merge_security_frames(disclists, cache)
+
+def kap_sync(db_path=None, issue_only=True, workers=8, per_host=None):
+    """
+    Incremental run: only disclosures newer than the stored disclosureIndex watermark are
+    fetched, and their rows are upserted into the ISIN-keyed tables of the KapStore.
+    Returns the number of new disclosures processed.
+    """
+    store = KapStore(db_path or KAP_DB_PATH)
+    try:
+        watermark = store.watermark()
+        try:
+            disclists = parse_disclosures(issue_only, after_index=watermark)
+        except NoDisclosures:  # nothing newer than the watermark; a malformed feed still raises
+            print(f"No new disclosures after {watermark}.")
+            return 0
+        
+        cache = DisclosureCache()
+        df_security, df_security_coupon = merge_security_frames(disclists, cache, workers=workers, per_host=per_host)
+        store.upsert(df_security, df_security_coupon, watermark=max(disclist[0] for disclist in disclists))
+        print(f"KAP disclosure pages fetched: {cache.fetch_count}, watermark: {store.watermark()}")
+        return len(disclists)
+    finally:
+        store.close()
                 
-def kap_xw(output_path=None, issue_only=True):
+def kap_sheets(df_security, df_security_coupon):
+    """
+    Returns the Security and SecurityCoupon sheets with the number formats kap_xw applies in Excel.
+    """
+    security_columns = [df_security.index.name] + list(df_security.columns)
+    coupon_columns = [df_security_coupon.index.name] + list(df_security_coupon.columns)
+    return [
+        Sheet("Security", df_security, {c: "0.00" for c in security_columns if c not in ["MATURITY_DATE", "ISSUE_DATE", "FREQUENCY"]}),
+        Sheet("SecurityCoupon", df_security_coupon, {c: "0.00" for c in coupon_columns if c != "COUPON_DATE"}),
+    ]
+
+@instrument.timed("kap.kap_xw")
+def kap_xw(output_path=None, issue_only=True, workers=8, per_host=None, backend="xlwings"):
+    """
+    Writes the Security and SecurityCoupon sheets of the day's bond disclosures.
+    backend "xlwings" fills a live Excel workbook; "xlsx", "parquet" and "csv" write files
+    headless through common.writers and need output_path.
+    """
+    # Fetch and parse every disclosure once, both sheets are filled from the same frames
+    cache = DisclosureCache()
+    df_security, df_security_coupon = merge_disclosures(issue_only, cache, workers=workers, per_host=per_host)
+    print(f"KAP disclosure pages fetched: {cache.fetch_count}")
+    if coupon_rate_cache is not None:
+        print(f"Coupon rate cache: {coupon_rate_cache.stats()}")
+    
+    if backend != "xlwings":
+        if output_path is None:
+            raise ValueError(f"output_path is required for the {backend} backend.")
+        with instrument.span("kap.export"):
+            paths = export_sheets(kap_sheets(df_security, df_security_coupon), output_path + "KAP_" + f"{date.today()}", backend)
+        print("Export successful:", ", ".join(paths))
+        return paths
+    
     # Create a new Excel workbook
     wb = xw.Book()
     sht2 = wb.sheets.add("SecurityCoupon")
     sht1 = wb.sheets.add("Security")
     
-    sht1.range("A1").value = merge_disclosures(issue_only)[0]
-    sht2.range("A1").value = merge_disclosures(issue_only)[1]
+    sht1.range("A1").value = df_security
+    sht2.range("A1").value = df_security_coupon
     
     # Security sheet (sht1)
     for col_num, col_name in enumerate(sht1.range("A1").expand('right').value, start=1):
@@ -370,6 +729,23 @@ def kap_xw(output_path=None, issue_only=True):
         wb.save(output_path + "KAP_" + f"{date.today()}" + ".xlsx")
         wb.close()
     
+def main():
+    parser = argparse.ArgumentParser(description="Security and SecurityCoupon sheets of the day's KAP bond disclosures.")
+    parser.add_argument("--output", help="output directory/prefix; required unless --backend xlwings")
+    parser.add_argument("--backend", default="xlwings", choices=["xlwings", "xlsx", "parquet", "csv"])
+    parser.add_argument("--all", action="store_true", help="every Faiz İçeren disclosure, not only issuances")
+    parser.add_argument("--sync", action="store_true", help="upsert new disclosures into the KapStore instead of writing sheets")
+    parser.add_argument("--db", help="KapStore database for --sync (default kap.sqlite in the data directory)")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--per-host", type=int, help="requests in flight against KAP at once (default 4, the client's cap)")
+    args = parser.parse_args()
+
+    if args.sync:
+        kap_sync(args.db, issue_only=not args.all, workers=args.workers, per_host=args.per_host)
+    else:
+        kap_xw(output_path=args.output, issue_only=not args.all, workers=args.workers, per_host=args.per_host, backend=args.backend)
+    instrument.flush()
+
 # Run code
-output_path = "C:\\Users\\adevr\\OneDrive\\Belgeler\\Riskactive Portföy\\KAP\\"
-kap_xw(output_path=output_path, issue_only=True)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Historical KAP backfill into the KapStore security master.
+
+    kap-backfill --index 1300000 1305000
+    kap-backfill --dates 2024-01-01 2024-03-31 --unverified-query
+    kap-backfill --index 1300000 1305000 --retry-errors
+
+Bildirim pages are downloaded by a thread pool and parsed by a process pool, one chunk at a
+time with the next chunk already downloading. Every chunk is committed together with a
+checkpoint row per disclosureIndex, so an interrupted backfill resumes where it stopped.
+Pages that did not parse are checkpointed "error" and skipped by later runs until they are
+asked for again with --retry-errors (after a parser fix, say).
+
+An --index range has no feed item to filter on, so only issuance pages (with a "Satışın
+Tamamlanma Tarihi") are kept and ISINs already in the store are never replaced: a later
+redemption or coupon notice of the same ISIN cannot overwrite its issuance row. The issuer
+code of a page is only known from its feed item, so it is taken from the live feed for the
+disclosures still in it; older ones keep a NULL ISSUER_CODE until a run that knows it (a
+--dates backfill, kap --sync) fills it in. --dates reads KAP's memberDisclosureQuery, which
+is not verified against the live site yet and has to be asked for with --unverified-query.
+"""
+import argparse
+import os
+from datetime import date
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from kap import kap
+from kap.kap_frames import security_frames
+from kap.kap_store import KapStore
+from common import instrument
+from common.http_client import default_client
+
+def index_range(first, last, issuers=None):
+    """
+    Every disclosureIndex from first to last, with its issuer code from issuers
+    ({disclosureIndex: issuer code}, see feed_issuers) or None. Pages that turn out not to be
+    bond issuances are skipped when parsed.
+    """
+    issuers = issuers or {}
+    return [[disclosureIndex, False, issuers.get(disclosureIndex)] for disclosureIndex in range(first, last + 1)]
+
+def feed_issuers():
+    """
+    {disclosureIndex: issuer code} of the bond disclosures still in the live feed.
+    """
+    return {infolist[0]: infolist[2] for infolist in kap.iter_disclosures(issue_only=False)}
+
+def query_disclosures(from_date, to_date, issue_only=True):
+    """
+    Bond disclosures published between from_date and to_date (datetime.date), from KAP's
+    disclosure query, filtered like parse_disclosures filters the live feed.
+    """
+    url = f"{kap.KAP_BASE_URL}/tr/api/memberDisclosureQuery"
+    query = {"fromDate": from_date.isoformat(), "toDate": to_date.isoformat()}
+    with instrument.span("kap.http_fetch"):
+        response = default_client().post(url, json=query)
+    instrument.record_response("kap", response)
+    if response.status_code != 200:
+        raise Exception(f"Disclosure query failed: {response.status_code}")
+
+    disclists = []
+    for item in response.json():
+        infolist = kap.disclosure_params(item.get("basic", item), issue_only)
+        if infolist is not None:
+            disclists.append(infolist)
+    return sorted(disclists, key=lambda infolist: infolist[0])
+
+def fetch_page(disclosureIndex):
+    """
+    Returns the page text, or None when KAP has no page for disclosureIndex.
+    """
+    url = f"{kap.KAP_BASE_URL}/tr/Bildirim/{disclosureIndex}"
+    with instrument.span("kap.http_fetch"):
+        response = default_client().get(url, conditional=False)
+    instrument.record_response("kap", response)
+    if response.status_code == 404:
+        return None
+    if response.status_code != 200:
+        raise Exception(f"Failed to fetch webpage: {response.status_code}")
+    return response.text
+
+def parse_page(html_content, infolist, issuances_only=False):
+    """
+    Process pool task: the (security record, coupon records) of a page, or None if the page
+    is not a bond disclosure. With issuances_only (index_range items, not filtered by
+    disclosure_params) the page must also be an issuance, i.e. have a sale completion date.
+    """
+    paramdict, table_count, cashflow_rows = kap.index_disclosure_page(html_content)
+    if paramdict["ISIN Kodu"] is None:
+        return None
+    if issuances_only and paramdict["Satışın Tamamlanma Tarihi"] is None:
+        return None
+    return kap.extract_security_records(paramdict, table_count, cashflow_rows, infolist)
+
+def backfill(disclists, db_path=None, fetch_workers=16, parse_workers=None, chunk_size=500, replace=True,
+             issuances_only=False, retry_errors=False):
+    """
+    Fetches, parses and stores every disclosure in disclists not checkpointed yet.
+    Checkpoint statuses are "done", "skipped" (not a bond disclosure, or a later page of an ISIN
+    that is kept as it is), "missing" (no page) and "error" (the page did not parse). Pages that
+    fail to download are left unchecked and retried by the next run; "error" pages only with
+    retry_errors. replace=False keeps securities that are already stored (KapStore.upsert) and,
+    within a chunk, the first page of every ISIN. issuances_only: see parse_page.
+    Returns the number of securities parsed.
+    """
+    store = KapStore(db_path or kap.KAP_DB_PATH)
+    done = store.backfilled(exclude=["error"] if retry_errors else [])
+    pending = [infolist for infolist in disclists if infolist[0] not in done]
+    chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+    print(f"Backfill: {len(pending)} disclosures to process, {len(disclists) - len(pending)} already checkpointed.")
+
+    def fetch_chunk(chunk):
+        return [fetchers.submit(fetch_page, infolist[0]) for infolist in chunk]
+
+    stored = 0
+    try:
+        with ThreadPoolExecutor(max_workers=fetch_workers) as fetchers, ProcessPoolExecutor(max_workers=parse_workers) as parsers:
+            downloads = fetch_chunk(chunks[0]) if chunks else []
+            for n, chunk in enumerate(chunks):
+                pages = downloads
+                downloads = fetch_chunk(chunks[n + 1]) if n + 1 < len(chunks) else []
+
+                checkpoints = []
+                parsing = []
+                for infolist, page in zip(chunk, pages):
+                    try:
+                        html_content = page.result()
+                    except Exception as e:
+                        print(f"Disclosure {infolist[0]} failed to download, left for the next run: {e}")
+                        continue
+                    if html_content is None:
+                        checkpoints.append((infolist[0], "missing"))
+                    else:
+                        parsing.append((infolist, parsers.submit(parse_page, html_content, infolist, issuances_only)))
+
+                security_records, coupon_records = [], []
+                isins = set()
+                for infolist, parsed in parsing:
+                    try:
+                        records = parsed.result()
+                    except Exception as e:
+                        print(f"Disclosure {infolist[0]} failed to parse: {e}")
+                        checkpoints.append((infolist[0], "error"))
+                        continue
+                    if records is None or (not replace and records[0]["ISIN_CODE"] in isins):
+                        checkpoints.append((infolist[0], "skipped"))
+                        continue
+                    isins.add(records[0]["ISIN_CODE"])
+                    security_records.append(records[0])
+                    coupon_records.extend(records[1])
+                    checkpoints.append((infolist[0], "done"))
+
+                df_security, df_security_coupon = security_frames(security_records, coupon_records)
+                store.upsert(df_security, df_security_coupon, backfilled=checkpoints, replace=replace)
+                stored += len(security_records)
+                print(f"Backfill chunk {n + 1}/{len(chunks)}: {len(security_records)} securities, {len(checkpoints)} checkpointed.")
+    finally:
+        store.close()
+    return stored
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    span = parser.add_mutually_exclusive_group(required=True)
+    span.add_argument("--index", nargs=2, type=int, metavar=("FIRST", "LAST"), help="disclosureIndex range, inclusive")
+    span.add_argument("--dates", nargs=2, metavar=("FROM", "TO"), help="publication date range, YYYY-MM-DD")
+    parser.add_argument("--db", help="KapStore database (default kap.sqlite in the data directory)")
+    parser.add_argument("--fetch-workers", type=int, default=16)
+    parser.add_argument("--parse-workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--all", action="store_true", help="every Faiz İçeren disclosure, not only issuances (--dates only)")
+    parser.add_argument("--unverified-query", action="store_true", help="allow --dates, whose query endpoint is not verified against KAP")
+    parser.add_argument("--retry-errors", action="store_true", help="parse pages checkpointed as errors by earlier runs again")
+    args = parser.parse_args()
+
+    if args.index:
+        disclists = index_range(*args.index, issuers=feed_issuers())
+    else:
+        if not args.unverified_query:
+            parser.error("--dates uses KAP's memberDisclosureQuery, which is not verified yet; add --unverified-query to use it")
+        from_date, to_date = (date.fromisoformat(value) for value in args.dates)
+        disclists = query_disclosures(from_date, to_date, issue_only=not args.all)
+    backfill(disclists, args.db, fetch_workers=args.fetch_workers, parse_workers=args.parse_workers,
+             chunk_size=args.chunk_size, replace=not args.index, issuances_only=bool(args.index), retry_errors=args.retry_errors)
+    instrument.flush()
+
+if __name__ == "__main__":
+    main()
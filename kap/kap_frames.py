@@ -0,0 +1,72 @@
+from common.lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+# Column -> dtype of the Security and SecurityCoupon sheets; ISIN_CODE becomes the index
+SECURITY_SCHEMA = {
+    "ISIN_CODE": "object",
+    "INSTRUMENT_TYPE": "category",
+    "MATURITY_DATE": "datetime64[ns]",
+    "CURRENCY": "category",
+    "FREQUENCY": "int64",
+    "COUPON": "float64",
+    "SPREAD": "float64",
+    "ISSUER_CODE": "object",
+    "ISSUE_INDEX": "int64",
+    "ISSUE_DATE": "datetime64[ns]",
+    "DAY_YEAR_BASIS": "category",
+    "ISSUE_PRICE": "float64",
+    "totalIssuedAmount": "float64",
+    "securityType": "object",
+    "fundUser": "object",
+}
+COUPON_SCHEMA = {
+    "ISIN_CODE": "object",
+    "COUPON_DATE": "datetime64[ns]",
+    "COUPON_RATE": "float64",
+}
+
+def to_column(values, dtype):
+    if dtype.startswith("datetime64"):
+        return pd.to_datetime(pd.Series(values, dtype="object")).astype(dtype)
+    if dtype == "float64":
+        return pd.Series(values, dtype="object").astype("float64")
+    if dtype == "category":
+        return pd.Series(pd.Categorical(values))
+    return pd.Series(values, dtype=dtype)
+
+class RecordBuilder:
+    """
+    Column-wise accumulator for one schema.
+    Records are appended as dicts into per-column lists and to_frame materializes all of
+    them at once with the schema dtypes, instead of concatenating one-row DataFrames.
+    """
+    def __init__(self, schema, index="ISIN_CODE"):
+        self.schema = schema
+        self.index = index
+        self.columns = {name: [] for name in schema}
+
+    def __len__(self):
+        return len(self.columns[self.index])
+
+    def append(self, record):
+        for name, values in self.columns.items():
+            values.append(record.get(name))
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def to_frame(self):
+        df = pd.DataFrame({name: to_column(values, self.schema[name]) for name, values in self.columns.items()})
+        return df.set_index(self.index)
+
+def security_frames(security_records, coupon_records):
+    """
+    Returns (df_security, df_security_coupon) built from lists of record dicts.
+    """
+    securities = RecordBuilder(SECURITY_SCHEMA)
+    securities.extend(security_records)
+    coupons = RecordBuilder(COUPON_SCHEMA)
+    coupons.extend(coupon_records)
+    return securities.to_frame(), coupons.to_frame()
@@ -0,0 +1,123 @@
+import sqlite3
+from common.lazy import lazy_import
+from common.paths import ensure_parent
+from kap.kap_frames import SECURITY_SCHEMA, COUPON_SCHEMA
+
+pd = lazy_import("pandas")
+
+SECURITY_COLUMNS = list(SECURITY_SCHEMA)
+COUPON_COLUMNS = list(COUPON_SCHEMA)
+DATE_COLUMNS = ["MATURITY_DATE", "ISSUE_DATE", "COUPON_DATE"]
+
+def to_sql_value(value):
+    # None, NaN and NaT first: NaT is a Timestamp and has isoformat too
+    if pd.api.types.is_scalar(value) and pd.isna(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.strftime("%Y-%m-%d")
+    if hasattr(value, "isoformat"):  # datetime.date
+        return value.isoformat()
+    if hasattr(value, "item"):  # numpy scalars
+        return value.item()
+    return value
+
+class KapStore:
+    """
+    SQLite security master for incremental KAP ingestion.
+    Securities are keyed by ISIN and coupons by (ISIN, coupon date), so re-ingesting a
+    disclosure replaces its rows instead of duplicating them. The highest processed
+    disclosureIndex is kept as the watermark for the next run.
+    """
+    def __init__(self, path):
+        self.conn = sqlite3.connect(ensure_parent(path))
+        security_columns = ", ".join(f'"{c}"' for c in SECURITY_COLUMNS[1:])
+        with self.conn:
+            self.conn.execute(f'CREATE TABLE IF NOT EXISTS security ("ISIN_CODE" TEXT PRIMARY KEY, {security_columns})')
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS security_coupon ('
+                '"ISIN_CODE" TEXT NOT NULL, "COUPON_DATE" TEXT NOT NULL, "COUPON_RATE" REAL, '
+                'PRIMARY KEY ("ISIN_CODE", "COUPON_DATE"))'
+            )
+            self.conn.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS backfill (disclosure_index INTEGER PRIMARY KEY, status TEXT NOT NULL)")
+
+    def watermark(self):
+        row = self.conn.execute("SELECT value FROM state WHERE key = 'disclosure_index'").fetchone()
+        return None if row is None else int(row[0])
+
+    def backfilled(self, exclude=()):
+        """
+        Returns the disclosureIndex values a backfill has already checkpointed, leaving out the
+        ones whose status is in exclude.
+        """
+        statuses = list(exclude)
+        query = f"SELECT disclosure_index FROM backfill WHERE status NOT IN ({', '.join('?' for _ in statuses)})"
+        return {row[0] for row in self.conn.execute(query, statuses)}
+
+    def upsert(self, df_security, df_security_coupon, watermark=None, backfilled=None, replace=True):
+        """
+        Upserts both frames (indexed by ISIN_CODE) and moves the watermark in one transaction.
+        The coupon schedule of every ISIN in df_security is replaced as a whole; coupon rows
+        without a COUPON_DATE cannot be keyed and are left out.
+        backfilled is a list of (disclosureIndex, status) checkpoints committed with the rows.
+        replace=False only adds ISINs that are not stored yet and leaves the stored ones as they are,
+        apart from filling in an ISSUER_CODE they are missing. df_security must then have one row
+        per ISIN: coupon rows only carry the ISIN, so the schedules of two pages of the same ISIN
+        could not be told apart.
+        """
+        securities = df_security.reset_index().reindex(columns=SECURITY_COLUMNS)
+        coupons = df_security_coupon.reset_index().reindex(columns=COUPON_COLUMNS)
+        coupons = coupons[coupons["COUPON_DATE"].notna()]
+        issuers = []
+        if not replace:
+            if securities["ISIN_CODE"].duplicated().any():
+                raise ValueError("upsert(replace=False) needs one security row per ISIN")
+            stored = {isin for (isin,) in self.conn.execute('SELECT "ISIN_CODE" FROM security')}
+            kept = ~securities["ISIN_CODE"].isin(stored)
+            issuers = [[issuer, isin] for isin, issuer in zip(securities["ISIN_CODE"][~kept], securities["ISSUER_CODE"][~kept]) if isinstance(issuer, str)]
+            securities = securities[kept]
+            coupons = coupons[coupons["ISIN_CODE"].isin(securities["ISIN_CODE"])]
+        security_rows = [[to_sql_value(v) for v in row] for row in securities.itertuples(index=False)]
+        coupon_rows = [[to_sql_value(v) for v in row] for row in coupons.itertuples(index=False)]
+        isins = [[isin] for isin in securities["ISIN_CODE"].unique()]
+
+        columns = ", ".join(f'"{c}"' for c in SECURITY_COLUMNS)
+        placeholders = ", ".join("?" for _ in SECURITY_COLUMNS)
+        with self.conn:
+            self.conn.executemany(f"INSERT OR REPLACE INTO security ({columns}) VALUES ({placeholders})", security_rows)
+            self.conn.executemany('DELETE FROM security_coupon WHERE "ISIN_CODE" = ?', isins)
+            self.conn.executemany('INSERT OR REPLACE INTO security_coupon VALUES (?, ?, ?)', coupon_rows)
+            self.conn.executemany('UPDATE security SET "ISSUER_CODE" = ? WHERE "ISIN_CODE" = ? AND "ISSUER_CODE" IS NULL', issuers)
+            if watermark is not None:
+                self.conn.execute(
+                    "INSERT INTO state (key, value) VALUES ('disclosure_index', ?) "
+                    "ON CONFLICT (key) DO UPDATE SET value = MAX(value, excluded.value)",
+                    (int(watermark),),
+                )
+            if backfilled:
+                self.conn.executemany("INSERT OR REPLACE INTO backfill VALUES (?, ?)", backfilled)
+
+    def checkpoint(self, disclosureIndex, status):
+        """
+        Records a disclosure whose rows are not stored (a watcher gave up on it) as a backfill
+        checkpoint and moves the watermark past it; kap-backfill --retry-errors picks up the
+        "error" ones again.
+        """
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO state (key, value) VALUES ('disclosure_index', ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = MAX(value, excluded.value)",
+                (int(disclosureIndex),),
+            )
+            self.conn.execute("INSERT OR REPLACE INTO backfill VALUES (?, ?)", (int(disclosureIndex), status))
+
+    def load(self):
+        """
+        Returns the stored (df_security, df_security_coupon) frames indexed by ISIN_CODE.
+        """
+        df_security = pd.read_sql_query("SELECT * FROM security ORDER BY ISSUE_DATE, ISIN_CODE", self.conn, parse_dates=DATE_COLUMNS)
+        df_security_coupon = pd.read_sql_query("SELECT * FROM security_coupon ORDER BY ISIN_CODE, COUPON_DATE", self.conn, parse_dates=DATE_COLUMNS)
+        return df_security.set_index("ISIN_CODE"), df_security_coupon.set_index("ISIN_CODE")
+
+    def close(self):
+        self.conn.close()
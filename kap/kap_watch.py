@@ -0,0 +1,218 @@
+"""
+Watch mode for KAP: polls the disclosures API and emits every new bond issuance disclosure
+as soon as it shows up.
+
+    kap-watch --interval 2 --jsonl new_bonds.jsonl --sqlite kap.sqlite
+"""
+import argparse
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from kap import kap
+from kap.kap_frames import security_frames
+from kap.kap_store import KapStore
+from common import instrument
+
+class JsonLinesSink:
+    """
+    Appends one JSON line per emitted disclosure: the security record and its coupon records.
+    """
+    def __init__(self, path):
+        self.file = open(path, "a", encoding="utf-8")
+
+    def __call__(self, disclist, security_record, coupon_records):
+        line = {"disclosureIndex": disclist[0], "security": security_record, "coupons": coupon_records}
+        self.file.write(json.dumps(line, ensure_ascii=False, default=str) + "\n")
+        self.file.flush()
+
+    def error(self, disclist, message):
+        line = {"disclosureIndex": disclist[0], "error": message}
+        self.file.write(json.dumps(line, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class SqliteSink:
+    """
+    Upserts emitted disclosures into a KapStore and moves its watermark, so a restarted
+    watcher resumes after the last emitted disclosure.
+    """
+    def __init__(self, path):
+        self.store = KapStore(path)
+
+    def watermark(self):
+        return self.store.watermark()
+
+    def __call__(self, disclist, security_record, coupon_records):
+        df_security, df_security_coupon = security_frames([security_record], coupon_records)
+        self.store.upsert(df_security, df_security_coupon, watermark=disclist[0])
+
+    def error(self, disclist, message):
+        # Checkpointed "error" and passed by the watermark, so a restarted watcher does not retry it
+        self.store.checkpoint(disclist[0], "error")
+
+    def close(self):
+        self.store.close()
+
+class Watcher:
+    """
+    Polls /tr/api/disclosures every interval seconds and passes each new "Faiz İçeren" issuance
+    disclosure to the sinks (callables taking disclist, security record, coupon records) in
+    disclosureIndex order. Disclosures are deduplicated by disclosureIndex; the seen set keeps at
+    most max_seen entries and everything at or below the watermark is skipped outright.
+    A disclosure whose page fails to download or parse, or that a sink fails to take, is retried
+    on the next poll, holding back the later ones; a retry only goes to the sinks that have not
+    taken it yet. After max_attempts failed polls it is parked: the sinks that did not take it
+    get an error record if they have an error method, it is marked seen and the later
+    disclosures are released.
+    """
+    def __init__(self, sinks, interval=2.0, issue_only=True, workers=4, max_seen=10000, start_after=None, max_attempts=3):
+        self.sinks = sinks
+        self.interval = interval
+        self.issue_only = issue_only
+        self.workers = workers
+        self.max_seen = max_seen
+        self.seen = OrderedDict()
+        self.watermark = start_after
+        self.max_attempts = max_attempts
+        self.attempts = {}
+        self.delivered = {}  # disclosureIndex -> positions of the sinks that took it, while a delivery is incomplete
+        self.stop_event = threading.Event()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+    def mark_seen(self, disclosureIndex):
+        self.seen[disclosureIndex] = None
+        if len(self.seen) > self.max_seen:
+            self.seen.popitem(last=False)
+        if self.watermark is None or disclosureIndex > self.watermark:
+            self.watermark = disclosureIndex
+
+    def new_disclosures(self):
+        # An empty list is an idle poll; a malformed feed raises and the poll fails
+        disclists = list(kap.iter_disclosures(self.issue_only, after_index=self.watermark, stream=False))
+        return sorted((d for d in disclists if d[0] not in self.seen), key=lambda d: d[0])
+
+    def poll(self):
+        """
+        Runs one poll and returns the number of disclosures emitted.
+        """
+        poll_start = time.perf_counter()
+        with instrument.span("kap.watch.poll"):
+            disclists = self.new_disclosures()
+        if not disclists:
+            return 0
+
+        # Pages download concurrently but are emitted in disclosureIndex order as they complete
+        futures = [self.executor.submit(kap.fetch_disclosure_page, disclist[0]) for disclist in disclists]
+        emitted = 0
+        done = 0
+        for disclist, future in zip(disclists, futures):
+            try:
+                security_record, coupon_records = kap.parse_security_records(future.result(), disclist)
+                self.deliver(disclist, security_record, coupon_records)
+            except Exception as e:
+                attempts = self.attempts.get(disclist[0], 0) + 1
+                if attempts < self.max_attempts:
+                    self.attempts[disclist[0]] = attempts
+                    print(f"Disclosure {disclist[0]} failed ({attempts}/{self.max_attempts}), retrying next poll: {e}")
+                    break  # keep emission in order; later ones are picked up again next poll
+                self.park(disclist, f"{type(e).__name__}: {e}")
+                done += 1
+                continue
+            self.attempts.pop(disclist[0], None)
+            self.mark_seen(disclist[0])
+            emitted += 1
+            done += 1
+            instrument.observe("kap.watch.emit_latency", time.perf_counter() - poll_start)
+            print(f"New bond {security_record['ISIN_CODE']} ({security_record['ISSUER_CODE']}) from disclosure {disclist[0]}")
+        for future in futures[done:]:
+            future.cancel()
+        return emitted
+
+    def deliver(self, disclist, security_record, coupon_records):
+        """
+        Passes a disclosure to every sink that has not taken it yet. A sink that raises stops the
+        delivery; the sinks before it are remembered, so the retry goes to the remaining ones only.
+        """
+        delivered = self.delivered.setdefault(disclist[0], set())
+        for position, sink in enumerate(self.sinks):
+            if position not in delivered:
+                sink(disclist, security_record, coupon_records)
+                delivered.add(position)
+        del self.delivered[disclist[0]]
+
+    def park(self, disclist, message):
+        """
+        Gives up on a disclosure that failed max_attempts times, so the ones after it are emitted.
+        Sinks that took it already keep it; the others are told about the failure.
+        """
+        delivered = self.delivered.pop(disclist[0], set())
+        for position, sink in enumerate(self.sinks):
+            error = getattr(sink, "error", None)
+            if position in delivered or error is None:
+                continue
+            try:
+                error(disclist, message)
+            except Exception as e:
+                print(f"{type(sink).__name__} could not record failed disclosure {disclist[0]}: {e}")
+        self.attempts.pop(disclist[0], None)
+        self.mark_seen(disclist[0])
+        instrument.count("kap.watch.parked")
+        print(f"Disclosure {disclist[0]} failed {self.max_attempts} times, skipped: {message}")
+
+    def run(self, max_polls=None):
+        polls = 0
+        while not self.stop_event.is_set():
+            try:
+                self.poll()
+            except Exception as e:  # a failed poll must not stop the watcher
+                print(f"Poll failed: {e}")
+            polls += 1
+            if max_polls is not None and polls >= max_polls:
+                break
+            self.stop_event.wait(self.interval)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def stop(self):
+        self.stop_event.set()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between polls")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-attempts", type=int, default=3, help="polls a failing disclosure is retried before it is skipped")
+    parser.add_argument("--jsonl", help="append new disclosures to this JSON Lines file")
+    parser.add_argument("--sqlite", help="upsert new disclosures into this KapStore database")
+    parser.add_argument("--skip-existing", action="store_true", help="ignore what is already in the feed at startup")
+    parser.add_argument("--all", action="store_true", help="emit every Faiz İçeren disclosure, not only issuances")
+    args = parser.parse_args()
+
+    sinks = []
+    if args.sqlite:
+        sinks.append(SqliteSink(args.sqlite))
+    if args.jsonl:
+        sinks.append(JsonLinesSink(args.jsonl))
+    if not sinks:
+        parser.error("give at least one sink: --jsonl or --sqlite")
+
+    start_after = sinks[0].watermark() if args.sqlite else None
+    watcher = Watcher(sinks, interval=args.interval, issue_only=not args.all, workers=args.workers,
+                      start_after=start_after, max_attempts=args.max_attempts)
+    if args.skip_existing:
+        for disclist in watcher.new_disclosures():
+            watcher.mark_seen(disclist[0])
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for sink in sinks:
+            sink.close()
+        instrument.flush()
+
+if __name__ == "__main__":
+    main()
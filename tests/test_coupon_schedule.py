@@ -0,0 +1,78 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from kap.coupon_schedule import coupon_schedules, rolled_dates, year_fractions
+from kap.kap import coupon_frequency
+
+def fraction(start, end, basis):
+    return year_fractions(np.array([start], dtype="datetime64[D]"), np.array([end], dtype="datetime64[D]"), np.array([basis]))[0]
+
+def spec(**fields):
+    return {"ISIN_CODE": "TRSTEST00001", "FREQUENCY": 4, "COUPON_COUNT": 4, "COUPON": 36.5,
+            "DAY_YEAR_BASIS": "ACTL365", "COUPON_DATES": None, **fields}
+
+@pytest.mark.parametrize("start, end, basis, expected", [
+    # actual days over 365, leap day included
+    ("2024-01-01", "2024-07-01", "ACTL365", 182 / 365),
+    ("2024-02-15", "2024-05-15", "ACTL365", 90 / 365),
+    # 30E/360 caps both days at 30
+    ("2024-01-15", "2024-03-31", "EU30360", (2 * 30 + 15) / 360),
+    ("2024-01-31", "2024-02-29", "EU30360", 29 / 360),
+    # US bond basis: d2 = 31 only becomes 30 when d1 is 30 or 31
+    ("2024-01-15", "2024-03-31", "US30360", (2 * 30 + 16) / 360),
+    ("2024-01-30", "2024-03-31", "US30360", 60 / 360),
+    ("2024-01-31", "2024-03-31", "US30360", 60 / 360),
+    ("2024-01-31", "2024-02-29", "US30360", 29 / 360),
+])
+def test_year_fractions(start, end, basis, expected):
+    assert fraction(start, end, basis) == pytest.approx(expected)
+
+def test_rolled_dates_clip_month_ends():
+    maturity = np.array(["2024-08-31", "2025-08-31"], dtype="datetime64[D]")
+    owner, position, dates = rolled_dates(maturity, np.array([6, 6]), np.array([2, 3]))
+    assert owner.tolist() == [0, 0, 1, 1, 1]
+    assert position.tolist() == [0, 1, 0, 1, 2]
+    # the 31st rolls back to Feb 29 in a leap year and Feb 28 otherwise
+    assert dates.astype(str).tolist() == ["2024-02-29", "2024-08-31", "2024-08-31", "2025-02-28", "2025-08-31"]
+
+def test_coupon_schedules_quarterly_actual():
+    schedule, = coupon_schedules([spec(ISSUE_DATE=datetime(2024, 2, 15), MATURITY_DATE=datetime(2025, 2, 15))])
+    assert [row["COUPON_DATE"] for row in schedule] == [datetime(2024, 5, 15), datetime(2024, 8, 15), datetime(2024, 11, 15), datetime(2025, 2, 15)]
+    assert [row["COUPON_RATE"] for row in schedule] == pytest.approx([9.0, 9.2, 9.2, 9.2])
+
+def test_coupon_schedules_first_period_accrues_from_issue():
+    # issued six weeks before the first payment: 44 days of accrual, not a full quarter
+    short, full = coupon_schedules([
+        spec(ISSUE_DATE=datetime(2024, 4, 1), MATURITY_DATE=datetime(2025, 2, 15)),
+        spec(ISIN_CODE="TRSTEST00002", ISSUE_DATE=datetime(2024, 1, 31), MATURITY_DATE=datetime(2024, 7, 31),
+             FREQUENCY=2, COUPON_COUNT=1, COUPON=36.0, DAY_YEAR_BASIS="EU30360"),
+    ])
+    assert short[0]["COUPON_RATE"] == pytest.approx(36.5 * 44 / 365)
+    assert [row["COUPON_RATE"] for row in short[1:]] == pytest.approx([9.2, 9.2, 9.2])
+    assert full == [{"ISIN_CODE": "TRSTEST00002", "COUPON_DATE": datetime(2024, 7, 31), "COUPON_RATE": pytest.approx(18.0)}]
+
+def test_coupon_schedules_explicit_dates_and_unknown_rate():
+    schedule, = coupon_schedules([spec(ISSUE_DATE=datetime(2024, 1, 1), MATURITY_DATE=datetime(2024, 12, 31), COUPON=None,
+                                       COUPON_DATES=[datetime(2024, 3, 29), datetime(2024, 12, 31)])])
+    assert [row["COUPON_DATE"] for row in schedule] == [datetime(2024, 3, 29), datetime(2024, 12, 31)]
+    assert [row["COUPON_RATE"] for row in schedule] == [None, None]
+
+def test_coupon_schedules_drop_rolled_dates_before_issue():
+    # six quarterly coupons do not fit a one-year tenor: 2023-11-15 and the issue date itself are dropped
+    schedule, = coupon_schedules([spec(ISSUE_DATE=datetime(2024, 2, 15), MATURITY_DATE=datetime(2025, 2, 15), COUPON_COUNT=6)])
+    assert [row["COUPON_DATE"] for row in schedule] == [datetime(2024, 5, 15), datetime(2024, 8, 15), datetime(2024, 11, 15), datetime(2025, 2, 15)]
+    assert [row["COUPON_RATE"] for row in schedule] == pytest.approx([9.0, 9.2, 9.2, 9.2])
+
+def test_coupon_schedules_reject_rolling_without_maturity():
+    with pytest.raises(ValueError, match="TRSTEST00001"):
+        coupon_schedules([spec(ISSUE_DATE=datetime(2024, 2, 15), MATURITY_DATE=None)])
+
+@pytest.mark.parametrize("value, numeric, expected", [
+    (None, True, 0), ("Tek Kupon", True, 1), ("3 Ayda Bir", True, 4), ("Diğer", True, 0), ("4", True, 4),
+    # pages with a cash-flow table only map the named frequencies
+    ("4", False, 0), ("6 ayda bir", False, 2),
+])
+def test_coupon_frequency(value, numeric, expected):
+    assert coupon_frequency(value, numeric) == expected
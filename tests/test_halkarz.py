@@ -0,0 +1,27 @@
+import json
+
+import pandas as pd
+
+from halkarz import halkarz, update_biit
+from halkarz.halkarz_store import HalkarzStore, FIRST_TRADE, PENDING
+
+LINK = "https://halkarz.com/abcde"
+
+def test_create_json_stores_and_exports(tmp_path):
+    df = pd.DataFrame({"Şirket": ["ABC A.Ş."], FIRST_TRADE: [PENDING]}, index=["ABCDE"])
+    json_file = str(tmp_path / "halkarz.json")
+    assert halkarz.create_json(df, {"ABCDE": LINK}, json_file, db_path=str(tmp_path / "halkarz.sqlite")) == 1
+    with open(json_file, encoding="utf-8") as f:
+        assert json.load(f)["ABCDE"] == [{"Şirket": "ABC A.Ş.", FIRST_TRADE: PENDING}, LINK]
+
+def test_update_with_a_json_path(tmp_path, monkeypatch):
+    json_file = tmp_path / "halkarz.json"
+    json_file.write_text(json.dumps({"ABCDE": [{FIRST_TRADE: PENDING}, LINK]}), encoding="utf-8")
+    monkeypatch.setattr(update_biit, "HALKARZ_DB_PATH", str(tmp_path / "halkarz.sqlite"))
+    monkeypatch.setattr(update_biit, "refresh_company", lambda link, validator, client=None: ("fetched", "02.05.2025", None))
+    # the old call style: the file is read into the store, refreshed and written back
+    assert update_biit.update_bist_ilk_islem_tarihi(str(json_file)) == 1
+    assert json.loads(json_file.read_text(encoding="utf-8"))["ABCDE"] == [{FIRST_TRADE: "02.05.2025"}, LINK]
+    store = HalkarzStore(str(tmp_path / "halkarz.sqlite"))
+    assert store.pending() == {}
+    store.close()
@@ -0,0 +1,51 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from common.http_client import HttpClient
+
+class FakeSession:
+    """
+    Answers every request with a 200 after a short delay and records the most requests in
+    flight at once per host.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.peak = {}
+
+    def request(self, method, url, **kwargs):
+        host = url.split("/")[2]
+        with self.lock:
+            self.in_flight[host] = self.in_flight.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.in_flight[host])
+        time.sleep(0.01)
+        with self.lock:
+            self.in_flight[host] -= 1
+        response = requests.Response()
+        response.status_code = 200
+        return response
+
+def client_with(concurrency_limits):
+    client = HttpClient(rate_limits={}, concurrency_limits=concurrency_limits)
+    client.session = FakeSession()
+    return client
+
+def test_cap_is_shared_by_all_callers():
+    client = client_with({"kap.test": 3})
+    # two independent callers with their own pools, like two prefetch calls
+    with ThreadPoolExecutor(8) as first, ThreadPoolExecutor(8) as second:
+        futures = [pool.submit(client.get, f"http://kap.test/{i}") for i in range(40) for pool in (first, second)]
+        assert all(future.result().status_code == 200 for future in futures)
+    assert client.session.peak["kap.test"] == 3
+    # other hosts are not capped
+    assert client.slot("other.test") is None
+
+def test_set_concurrency_limit():
+    client = client_with({})
+    client.set_concurrency_limit("kap.test", 2)
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(client.get, [f"http://kap.test/{i}" for i in range(24)]))
+    assert client.session.peak["kap.test"] == 2
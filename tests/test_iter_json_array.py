@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+from kap.kap import iter_json_array
+
+FEED = [
+    {"basic": {"disclosureIndex": 1300001, "title": "Pay Dışında Sermaye Piyasası Aracı", "summary": "İhraç — ğüşıöç"}},
+    {"basic": {"disclosureIndex": 1300002, "stockCodes": "GARAN, GARAN.E", "amount": 12.5e6, "flags": [True, None]}},
+    12345,
+    "yalın metin",
+]
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 16, 64, 4096])
+def test_any_chunk_boundary(size):
+    # multi-byte UTF-8 characters, numbers and strings get split at every possible offset
+    data = json.dumps(FEED, ensure_ascii=False, indent=1).encode("utf-8")
+    assert list(iter_json_array(chunked(data, size))) == FEED
+
+def test_scalar_split_across_chunks():
+    assert list(iter_json_array([b"[1, 2", b"3, 4", b"56]"])) == [1, 23, 456]
+
+def test_empty_array():
+    assert list(iter_json_array([b" [ ", b"] "])) == []
+
+def test_not_an_array():
+    with pytest.raises(ValueError, match="not a JSON array"):
+        list(iter_json_array([b"<html>maintenance</html>"]))
+
+def test_truncated_between_elements():
+    with pytest.raises(ValueError, match="ended before the end"):
+        list(iter_json_array([b'[{"a": 1}, ']))
+
+def test_truncated_inside_element():
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'[{"a": 1}, {"b": ', b'"unterminated']))
@@ -0,0 +1,62 @@
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from kap.kap_store import KapStore, to_sql_value
+
+@pytest.mark.parametrize("value, expected", [
+    (pd.NaT, None), (None, None), (np.nan, None), (np.float64("nan"), None),
+    (pd.Timestamp("2025-02-15"), "2025-02-15"), (datetime(2025, 2, 15), "2025-02-15T00:00:00"), (date(2025, 2, 15), "2025-02-15"),
+    (np.int64(4), 4), (9.2, 9.2), ("TRY", "TRY"),
+])
+def test_to_sql_value(value, expected):
+    assert to_sql_value(value) == expected
+
+def frames(isin, maturity, coupon_dates):
+    df_security = pd.DataFrame({"ISIN_CODE": [isin], "MATURITY_DATE": [pd.Timestamp(maturity) if maturity else pd.NaT],
+                                "ISSUE_DATE": [pd.Timestamp("2024-02-15")], "FREQUENCY": [4]}).set_index("ISIN_CODE")
+    df_security_coupon = pd.DataFrame({"ISIN_CODE": isin, "COUPON_DATE": pd.to_datetime(coupon_dates), "COUPON_RATE": 9.2}).set_index("ISIN_CODE")
+    return df_security, df_security_coupon
+
+def test_missing_dates_are_stored_as_null(tmp_path):
+    store = KapStore(str(tmp_path / "kap.sqlite"))
+    store.upsert(*frames("TRSTEST00001", None, ["2024-05-15", None]))
+    assert store.conn.execute('SELECT "MATURITY_DATE" FROM security').fetchall() == [(None,)]
+    # a coupon without a date has no key and is not stored
+    assert store.conn.execute('SELECT "COUPON_DATE" FROM security_coupon').fetchall() == [("2024-05-15",)]
+    store.close()
+
+def test_upsert_without_replace_keeps_stored_issuances(tmp_path):
+    store = KapStore(str(tmp_path / "kap.sqlite"))
+    issued, issued_coupons = frames("TRSTEST00001", "2025-02-15", ["2024-05-15", "2024-08-15"])
+    issued["ISSUER_CODE"] = None
+    store.upsert(issued, issued_coupons, replace=False)
+    # a later notice of the same ISIN next to a new ISIN: only the new ISIN and its coupons are added,
+    # and the stored row only gets the issuer code it was missing
+    later, later_coupons = frames("TRSTEST00001", "2026-02-15", ["2024-11-15"])
+    later["ISSUER_CODE"] = "GARAN"
+    new, new_coupons = frames("TRSTEST00002", "2025-02-15", ["2025-02-15"])
+    store.upsert(pd.concat([later, new]), pd.concat([later_coupons, new_coupons]), replace=False)
+    rows = store.conn.execute('SELECT "ISIN_CODE", "MATURITY_DATE", "ISSUER_CODE" FROM security ORDER BY 1').fetchall()
+    assert rows == [("TRSTEST00001", "2025-02-15", "GARAN"), ("TRSTEST00002", "2025-02-15", None)]
+    coupons = store.conn.execute('SELECT "ISIN_CODE", "COUPON_DATE" FROM security_coupon ORDER BY 1, 2').fetchall()
+    assert coupons == [("TRSTEST00001", "2024-05-15"), ("TRSTEST00001", "2024-08-15"), ("TRSTEST00002", "2025-02-15")]
+    store.close()
+
+def test_upsert_without_replace_needs_one_row_per_isin(tmp_path):
+    store = KapStore(str(tmp_path / "kap.sqlite"))
+    first, first_coupons = frames("TRSTEST00001", "2025-02-15", ["2024-05-15"])
+    second, second_coupons = frames("TRSTEST00001", "2026-02-15", ["2024-11-15"])
+    with pytest.raises(ValueError):
+        store.upsert(pd.concat([first, second]), pd.concat([first_coupons, second_coupons]), replace=False)
+    store.close()
+
+def test_backfilled_excludes_statuses(tmp_path):
+    store = KapStore(str(tmp_path / "kap.sqlite"))
+    empty, empty_coupons = frames("TRSTEST00001", "2025-02-15", [])
+    store.upsert(empty.iloc[:0], empty_coupons, backfilled=[(1, "done"), (2, "error"), (3, "skipped")])
+    assert store.backfilled() == {1, 2, 3}
+    assert store.backfilled(exclude=["error"]) == {1, 3}
+    store.close()
@@ -0,0 +1,65 @@
+import pytest
+
+from kap import kap, kap_watch
+from kap.kap_frames import SECURITY_SCHEMA
+from kap.kap_store import KapStore
+
+FEED = [[1300001, False, "GARAN"], [1300002, False, "AKBNK"], [1300003, False, "YKBNK"]]
+
+def record(disclist):
+    security = {column: 0 if dtype == "int64" else None for column, dtype in SECURITY_SCHEMA.items()}
+    security.update(ISIN_CODE=f"TRS{disclist[0]}", ISSUER_CODE=disclist[2])
+    return security, []
+
+@pytest.fixture(autouse=True)
+def feed(monkeypatch):
+    monkeypatch.setattr(kap, "iter_disclosures", lambda issue_only, after_index=None, stream=True: [d for d in FEED if after_index is None or d[0] > after_index])
+    monkeypatch.setattr(kap, "fetch_disclosure_page", lambda disclosureIndex: disclosureIndex)
+    monkeypatch.setattr(kap, "parse_security_records", lambda page, disclist: record(disclist))
+
+class ListSink:
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.taken, self.errors = [], []
+
+    def __call__(self, disclist, security_record, coupon_records):
+        if disclist[0] in self.fail:
+            raise OSError("disk full")
+        self.taken.append(disclist[0])
+
+    def error(self, disclist, message):
+        self.errors.append(disclist[0])
+
+def test_failing_sink_retries_only_itself():
+    first, flaky = ListSink(), ListSink(fail=[1300002])
+    watcher = kap_watch.Watcher([first, flaky], max_attempts=3)
+    assert watcher.poll() == 1
+    # the second disclosure reached the first sink only and holds back the third
+    assert first.taken == [1300001, 1300002] and flaky.taken == [1300001]
+    flaky.fail.clear()
+    assert watcher.poll() == 2
+    assert first.taken == [1300001, 1300002, 1300003] and flaky.taken == first.taken
+
+def test_parked_disclosure_goes_to_the_sinks_that_missed_it(tmp_path):
+    first, broken = ListSink(), ListSink(fail=[1300002])
+    sqlite = kap_watch.SqliteSink(str(tmp_path / "kap.sqlite"))
+    watcher = kap_watch.Watcher([first, broken, sqlite], max_attempts=2)
+    watcher.poll()
+    watcher.poll()
+    assert first.taken == [1300001, 1300002, 1300003] and first.errors == []
+    assert broken.taken == [1300001, 1300003] and broken.errors == [1300002]
+    # the SQLite sink was never reached for 1300002: it records the failure and its watermark passes it
+    assert sqlite.store.backfilled() == {1300002}
+    assert sqlite.watermark() == 1300003
+    sqlite.close()
+
+def test_restart_does_not_retry_a_parked_disclosure(tmp_path, monkeypatch):
+    monkeypatch.setattr(kap, "parse_security_records", lambda page, disclist: (_ for _ in ()).throw(ValueError("bad page")) if disclist[0] == 1300003 else record(disclist))
+    sqlite = kap_watch.SqliteSink(str(tmp_path / "kap.sqlite"))
+    kap_watch.Watcher([sqlite], max_attempts=1).poll()
+    sqlite.close()
+    store = KapStore(str(tmp_path / "kap.sqlite"))
+    assert store.watermark() == 1300003
+    assert store.backfilled(exclude=["done"]) == {1300003}
+    assert [isin for isin in store.load()[0].index] == ["TRS1300001", "TRS1300002"]
+    store.close()
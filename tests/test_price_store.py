@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+
+from yahoo.price_store import PriceStore
+from yahoo.trading_calendar import TradingCalendar
+
+CALENDAR = TradingCalendar(["2024-01-01"])
+T = pd.Timestamp
+
+@pytest.fixture
+def store(tmp_path):
+    # ASSET covers [Mon 2024-01-08, Mon 2024-02-05)
+    store = PriceStore(str(tmp_path))
+    dates = CALENDAR.business_days("2024-01-08", "2024-02-02")
+    data = pd.DataFrame({"PRICE_CLOSE": range(len(dates))}, index=dates.rename("RECORD_DATE"), dtype="float64")
+    store.update("ASSET", data, "2024-01-08", "2024-02-05", CALENDAR)
+    return store
+
+def test_unstored_asset(store):
+    assert store.missing_ranges("OTHER", "2024-01-02", "2024-03-01", CALENDAR) == [(T("2024-01-02"), T("2024-03-01"))]
+
+def test_unstored_range_without_business_days(store):
+    # New Year's Day is a holiday
+    assert store.missing_ranges("OTHER", "2024-01-01", "2024-01-02", CALENDAR) == []
+
+def test_covered_request(store):
+    assert store.coverage("ASSET") == (T("2024-01-08"), T("2024-02-05"))
+    assert store.missing_ranges("ASSET", "2024-01-10", "2024-02-01", CALENDAR) == []
+
+def test_gaps_before_and_after(store):
+    # the range after the coverage restarts at its last business day, Fri 2024-02-02
+    assert store.missing_ranges("ASSET", "2024-01-02", "2024-02-12", CALENDAR) == [
+        (T("2024-01-02"), T("2024-01-08")),
+        (T("2024-02-02"), T("2024-02-12")),
+    ]
+
+def test_weekend_before_coverage_is_not_missing(store):
+    assert store.missing_ranges("ASSET", "2024-01-06", "2024-02-05", CALENDAR) == []
+
+def test_future_end_is_clipped_to_today(store):
+    ranges = store.missing_ranges("ASSET", "2024-01-08", "2999-01-01", CALENDAR)
+    assert ranges[0][0] == T("2024-02-02") and ranges[0][1] == T(pd.Timestamp.today().date())
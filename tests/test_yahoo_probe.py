@@ -0,0 +1,63 @@
+import glob
+import threading
+from collections import Counter
+
+import pandas as pd
+import pytest
+
+from yahoo import yahoo
+
+START, END = "02.01.2024", "01.03.2024"
+
+def prices(start="2024-01-02", end="2024-02-29"):
+    index = pd.bdate_range(start, end, name="Date")
+    return pd.DataFrame({"Open": 1.0, "High": 2.0, "Low": 0.5, "Close": 1.5, "Adj Close": 1.4, "Volume": 100}, index=index)
+
+@pytest.fixture
+def requests(monkeypatch, tmp_path):
+    """
+    Every probe and download, counted per symbol (Yahoo symbols are case-insensitive), against
+    the symbols put into served.
+    """
+    monkeypatch.setenv("RA_FORECASTER_DATA", str(tmp_path / "data"))
+    monkeypatch.setattr(yahoo, "ticker_cache", yahoo.TickerCache(str(tmp_path / "tickers.sqlite")))
+    monkeypatch.setattr(yahoo, "price_store", yahoo.PriceStore(str(tmp_path / "prices")))
+    counts = Counter()
+    lock = threading.Lock()
+    served = {}
+
+    def fetch(symbol, start_date, end_date):
+        with lock:
+            counts[symbol.upper()] += 1
+        return served.get(symbol.upper(), prices().iloc[:0]).copy()
+
+    monkeypatch.setattr(yahoo, "download_prices", fetch)
+    monkeypatch.setattr(yahoo, "probe_prices", fetch)
+    monkeypatch.setattr(yahoo, "existing_symbols", lambda symbols: {symbol for symbol in symbols if symbol.upper() in served})
+    yield counts, served
+    yahoo.ticker_cache.close()
+
+@pytest.mark.parametrize("ticker, symbol", [("thyao", "THYAO.IS"), ("spx", "^SPX"), ("hgx", "HGX.CMX")])
+def test_winner_is_fetched_once(requests, tmp_path, ticker, symbol):
+    counts, served = requests
+    served[symbol] = prices()
+    paths = yahoo.yf_xw(ticker, START, END, str(tmp_path) + "/", backend="csv", probe="speculative")
+    # the winning probe's prices are written, not downloaded again
+    assert counts[symbol] == 1
+    # every candidate before the winner is probed once; at most PROBE_WORKERS - 1 after it
+    chain = [candidate[0].upper() for candidate in yahoo.candidate_symbols(ticker)]
+    winner = chain.index(symbol)
+    assert all(counts[other] == 1 for other in chain[:winner])
+    assert not any(counts[other] for other in chain[winner + yahoo.PROBE_WORKERS:])
+    assert sum(counts.values()) <= winner + yahoo.PROBE_WORKERS
+    assert len(pd.read_csv(paths[0])) == len(prices())
+
+def test_speculative_picks_the_serial_winner(requests, tmp_path):
+    # the BIST listing stopped trading mid-range, the US one covers all of it: both have data, the first one wins
+    counts, served = requests
+    served["THYAO.IS"] = prices(end="2024-01-31")
+    served["THYAO"] = prices()
+    yahoo.yf_xw("thyao", START, END, str(tmp_path) + "/", backend="csv", probe="speculative")
+    assert yahoo.ticker_cache.lookup("thyao") == (True, ("thyao.IS", "TRY", "IMKB", "THYAO"))
+    assert counts["THYAO.IS"] == 1
+    assert len(glob.glob(str(tmp_path / "thyao_*.csv"))) == 1
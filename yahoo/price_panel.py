@@ -0,0 +1,88 @@
+"""
+Compact long-format price panel for multi-asset batch output.
+
+The sheet layout of yf_xw/yf_batch repeats five strings on every row and carries an all-None
+RECORD_TIME column. The panel keeps the same data indexed by (RECORD_DATE, ASSET_NAME), with the
+repeated strings as categoricals and the prices as float64 or float32 arrays, and converts to an
+Arrow table without copying the price buffers.
+"""
+from common.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+pa = lazy_import("pyarrow")
+feather = lazy_import("pyarrow.feather")
+pq = lazy_import("pyarrow.parquet")
+
+CATEGORY_COLUMNS = ["CURRENCY_CODE", "MARKET_NAME", "DATA_SOURCE", "DATA_TYPE"]
+PRICE_COLUMNS = ["PRICE_OPEN", "PRICE_HIGH", "PRICE_LOW", "PRICE_CLOSE"]
+SHEET_COLUMNS = ["ASSET_NAME"] + CATEGORY_COLUMNS[:2] + PRICE_COLUMNS + CATEGORY_COLUMNS[2:] + ["RECORD_TIME"]
+
+def compact_panel(data, price_dtype="float64"):
+    """
+    Converts price rows in the sheet layout (RECORD_DATE index, format_price_frame columns) to
+    the panel: (RECORD_DATE, ASSET_NAME) index sorted by date, categorical string columns and
+    price_dtype ("float64" or "float32") prices. RECORD_TIME is dropped.
+    """
+    if price_dtype not in ("float64", "float32"):
+        raise ValueError(f"Unknown price dtype: {price_dtype}. Choose from float64, float32.")
+    index = pd.MultiIndex.from_arrays(
+        [pd.DatetimeIndex(data.index, name="RECORD_DATE"), pd.Categorical(data["ASSET_NAME"])],
+        names=["RECORD_DATE", "ASSET_NAME"],
+    )
+    columns = {name: pd.Categorical(data[name]) for name in CATEGORY_COLUMNS}
+    columns.update({name: data[name].to_numpy(dtype=price_dtype) for name in PRICE_COLUMNS})
+    panel = pd.DataFrame(columns, index=index)[CATEGORY_COLUMNS[:2] + PRICE_COLUMNS + CATEGORY_COLUMNS[2:]]
+    return panel.sort_index()
+
+def expand_panel(panel):
+    """
+    The panel back in the sheet layout, rows ordered by asset then date, for common.writers.
+    """
+    data = panel.reset_index(level="ASSET_NAME").sort_values(["ASSET_NAME", "RECORD_DATE"], kind="stable")
+    data = data.astype({name: object for name in ["ASSET_NAME"] + CATEGORY_COLUMNS})
+    data["RECORD_TIME"] = None
+    return data[SHEET_COLUMNS]
+
+def dictionary_array(values):
+    """
+    A categorical as an Arrow dictionary array over its own codes.
+    """
+    return pa.DictionaryArray.from_arrays(pa.array(values.codes), pa.array(np.asarray(values.categories, dtype=object)))
+
+def panel_table(panel):
+    """
+    The panel as an Arrow table with the index levels as its first columns. Price arrays are
+    wrapped without a copy (the buffers are shared with the panel), categoricals and ASSET_NAME
+    become dictionary arrays over their existing codes, and RECORD_DATE is taken from its level.
+    """
+    dates, assets = panel.index.levels
+    date_codes, asset_codes = panel.index.codes
+    arrays = {
+        "RECORD_DATE": pa.array(dates.values.take(date_codes)),
+        "ASSET_NAME": pa.DictionaryArray.from_arrays(pa.array(asset_codes), pa.array(np.asarray(assets, dtype=object))),
+    }
+    for name in panel.columns:
+        values = panel[name].array
+        arrays[name] = dictionary_array(values) if isinstance(values, pd.Categorical) else pa.array(values.to_numpy())
+    return pa.table(arrays)
+
+def write_panel(panel, path):
+    """
+    Writes the panel to path as Parquet (.parquet) or the Arrow IPC/Feather format (.arrow, .feather).
+    """
+    table = panel_table(panel)
+    if path.endswith(".parquet"):
+        pq.write_table(table, path)
+    elif path.endswith((".arrow", ".feather")):
+        feather.write_feather(table, path, compression="uncompressed")
+    else:
+        raise ValueError(f"Unknown panel format: {path}. Use .parquet, .arrow or .feather.")
+    return path
+
+def read_panel(path):
+    """
+    Reads a panel written by write_panel; dictionary columns come back as categoricals.
+    """
+    table = pq.read_table(path) if path.endswith(".parquet") else feather.read_table(path, memory_map=True)
+    return table.to_pandas().set_index(["RECORD_DATE", "ASSET_NAME"])
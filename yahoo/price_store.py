@@ -0,0 +1,108 @@
+"""
+Local store of downloaded EOD prices, one Parquet file per ASSET_NAME.
+"""
+import json
+import os
+import threading
+from datetime import date
+from urllib.parse import quote
+
+from common.lazy import lazy_import
+from common.paths import data_path
+
+pd = lazy_import("pandas")
+pa = lazy_import("pyarrow")
+pq = lazy_import("pyarrow.parquet")
+
+PRICE_STORE_DIR = data_path("prices")
+COVERAGE_KEY = b"ra_forecaster.covered"
+
+class PriceStore:
+    """
+    Keeps the formatted price rows of yf_xw (indexed by RECORD_DATE) per ASSET_NAME, together with
+    the [start, end) date range that has been downloaded for the asset, so later requests only
+    download what lies outside it. Reads are memory-mapped and filtered to the requested range.
+    """
+    def __init__(self, root=PRICE_STORE_DIR):
+        self.root = root
+        self.lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, asset_name):
+        return os.path.join(self.root, quote(asset_name, safe="") + ".parquet")
+
+    def has(self, asset_name):
+        return os.path.exists(self.path(asset_name))
+
+    def coverage(self, asset_name):
+        """
+        Returns the downloaded (start, end) range of the asset as Timestamps, or None.
+        """
+        if not self.has(asset_name):
+            return None
+        metadata = pq.read_schema(self.path(asset_name)).metadata or {}
+        if COVERAGE_KEY not in metadata:
+            return None
+        start, end = json.loads(metadata[COVERAGE_KEY])
+        return pd.Timestamp(start), pd.Timestamp(end)
+
+    def missing_ranges(self, asset_name, start_date, end_date, calendar):
+        """
+        The [start, end) ranges of the request that are not covered yet and contain at least one
+        business day of the calendar. The range after the coverage starts at its last business
+        day, whose bar may have been downloaded before the close.
+        """
+        start_date, end_date = pd.Timestamp(start_date), min(pd.Timestamp(end_date), pd.Timestamp(date.today()))
+        covered = self.coverage(asset_name)
+        if covered is None:
+            ranges = [(start_date, end_date)]
+        else:
+            covered_start, covered_end = covered
+            ranges = []
+            if start_date < covered_start:
+                ranges.append((start_date, covered_start))
+            if end_date > covered_end:
+                ranges.append((pd.Timestamp(calendar.offset(covered_end.date(), -1)), end_date))
+        return [(start, end) for start, end in ranges if start < end and calendar.count(start.date(), end.date()) > 0]
+
+    def read(self, asset_name, start_date=None, end_date=None):
+        """
+        The stored rows with start_date <= RECORD_DATE < end_date.
+        """
+        filters = []
+        if start_date is not None:
+            filters.append(("RECORD_DATE", ">=", pd.Timestamp(start_date)))
+        if end_date is not None:
+            filters.append(("RECORD_DATE", "<", pd.Timestamp(end_date)))
+        table = pq.read_table(self.path(asset_name), memory_map=True, filters=filters or None)
+        return table.to_pandas()
+
+    def update(self, asset_name, data, start_date, end_date, calendar):
+        """
+        Merges newly downloaded rows (None if the range had no data) into the asset's file and
+        extends its coverage by [start_date, end_date). New rows replace stored rows of the same
+        date; the merged rows are reindexed to the calendar so gaps at the seams are forward filled.
+        The file is replaced atomically.
+        """
+        start_date, end_date = pd.Timestamp(start_date), min(pd.Timestamp(end_date), pd.Timestamp(date.today()))
+        with self.lock:
+            covered = self.coverage(asset_name)
+            frames = []
+            if covered is not None:
+                frames.append(self.read(asset_name))
+                start_date, end_date = min(start_date, covered[0]), max(end_date, covered[1])
+            if data is not None and len(data) > 0:
+                frames.append(data)
+            if not frames:
+                return
+            merged = pd.concat(frames)
+            merged.index = pd.to_datetime(merged.index)
+            merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+            merged = calendar.reindex(merged).rename_axis("RECORD_DATE")
+
+            table = pa.Table.from_pandas(merged)
+            coverage = json.dumps([start_date.date().isoformat(), end_date.date().isoformat()]).encode()
+            table = table.replace_schema_metadata({**(table.schema.metadata or {}), COVERAGE_KEY: coverage})
+            path = self.path(asset_name)
+            pq.write_table(table, path + ".tmp")
+            os.replace(path + ".tmp", path)
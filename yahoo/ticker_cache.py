@@ -0,0 +1,106 @@
+"""
+On-disk cache of how normalized tickers resolve to Yahoo symbols.
+
+    yahoo-ticker-cache list
+    yahoo-ticker-cache invalidate F_RTYU24 cotton
+    yahoo-ticker-cache invalidate --all
+"""
+import argparse
+import sqlite3
+import threading
+import time
+
+from common.paths import data_path, ensure_parent
+
+TICKER_CACHE_PATH = data_path("ticker_cache.sqlite")
+
+class TickerCache:
+    """
+    Maps a normalized ticker to the (symbol, currency, MARKET_NAME label, ASSET_NAME) its probe
+    chain resolved to, so later runs download the winning symbol directly. Tickers no candidate
+    was found for are cached as None for negative_ttl seconds only.
+    """
+    def __init__(self, path=TICKER_CACHE_PATH, ttl=180 * 24 * 3600, negative_ttl=24 * 3600):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(ensure_parent(path), check_same_thread=False)
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS ticker ("
+                "ticker TEXT PRIMARY KEY, symbol TEXT, currency TEXT, label TEXT, asset_name TEXT, "
+                "resolved_at REAL NOT NULL)"
+            )
+
+    def lookup(self, ticker):
+        """
+        Returns (found, resolution); resolution is None for a cached miss.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT symbol, currency, label, asset_name, resolved_at FROM ticker WHERE ticker = ?", (ticker,)
+            ).fetchone()
+        if row is None:
+            return False, None
+        resolution, resolved_at = (row[:4] if row[0] is not None else None), row[4]
+        ttl = self.ttl if resolution is not None else self.negative_ttl
+        if time.time() - resolved_at > ttl:
+            return False, None
+        return True, resolution
+
+    def store(self, ticker, resolution):
+        """
+        Stores the winning (symbol, currency, label, ASSET_NAME) of ticker, or None if nothing was found.
+        """
+        symbol, currency, label, asset_name = resolution if resolution is not None else (None, None, None, None)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO ticker VALUES (?, ?, ?, ?, ?, ?)",
+                (ticker, symbol, currency, label, asset_name, time.time()),
+            )
+
+    def invalidate(self, tickers=None):
+        """
+        Forgets the given normalized tickers, or every ticker when tickers is None.
+        Returns the number of entries removed.
+        """
+        with self.lock, self.conn:
+            if tickers is None:
+                return self.conn.execute("DELETE FROM ticker").rowcount
+            return self.conn.executemany("DELETE FROM ticker WHERE ticker = ?", [(ticker,) for ticker in tickers]).rowcount
+
+    def entries(self):
+        with self.lock:
+            return self.conn.execute("SELECT * FROM ticker ORDER BY ticker").fetchall()
+
+    def close(self):
+        self.conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default=TICKER_CACHE_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="print the cached resolutions")
+    invalidate = commands.add_parser("invalidate", help="forget tickers so they are probed again")
+    invalidate.add_argument("tickers", nargs="*", help="tickers as passed to yf_xw")
+    invalidate.add_argument("--all", action="store_true", help="forget every ticker")
+    args = parser.parse_args()
+
+    cache = TickerCache(args.path)
+    try:
+        if args.command == "list":
+            for ticker, symbol, currency, label, asset_name, resolved_at in cache.entries():
+                when = time.strftime("%Y-%m-%d %H:%M", time.localtime(resolved_at))
+                print(f"{ticker:<20} {symbol or 'not found':<12} {currency or '':<4} {label or '':<14} {asset_name or '':<16} {when}")
+        elif args.all:
+            print(f"Removed {cache.invalidate()} entries.")
+        elif args.tickers:
+            from yahoo.yahoo import normalize_ticker
+            print(f"Removed {cache.invalidate([normalize_ticker(ticker) for ticker in args.tickers])} entries.")
+        else:
+            parser.error("give tickers to invalidate or --all")
+    finally:
+        cache.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Turkish business-day calendar compiled from the holidays workbook (riskfree_holiday.xlsx).
+"""
+import hashlib
+import os
+import threading
+
+from common.lazy import lazy_import
+from common.paths import data_path, ensure_parent
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+class TradingCalendar:
+    """
+    Monday to Friday minus the Turkish holidays, as a numpy busdaycalendar.
+    All methods take and return arrays, so whole date columns are handled in one call.
+    """
+    def __init__(self, holidays):
+        self.holidays = np.unique(np.asarray(holidays, dtype="datetime64[D]"))
+        self.busdaycalendar = np.busdaycalendar(weekmask="1111100", holidays=self.holidays)
+
+    def is_business_day(self, dates):
+        return np.is_busday(np.asarray(dates, dtype="datetime64[D]"), busdaycal=self.busdaycalendar)
+
+    def business_days(self, start, end):
+        """
+        The business days from start to end, both included, as a DatetimeIndex.
+        """
+        first = np.busday_offset(np.datetime64(pd.Timestamp(start).date()), 0, roll="forward", busdaycal=self.busdaycalendar)
+        last = np.datetime64(pd.Timestamp(end).date()) + 1
+        if first >= last:
+            return pd.DatetimeIndex([])
+        days = np.arange(first, last, dtype="datetime64[D]")
+        return pd.DatetimeIndex(days[self.is_business_day(days)])
+
+    def roll(self, dates, direction="forward"):
+        """
+        Moves non-business days to the next ("forward") or previous ("backward") business day.
+        """
+        return np.busday_offset(np.asarray(dates, dtype="datetime64[D]"), 0, roll=direction, busdaycal=self.busdaycalendar)
+
+    def offset(self, dates, days):
+        """
+        Adds days business days, rolling non-business days forward first.
+        """
+        return np.busday_offset(np.asarray(dates, dtype="datetime64[D]"), days, roll="forward", busdaycal=self.busdaycalendar)
+
+    def count(self, start, end):
+        """
+        Business days in [start, end), like np.busday_count.
+        """
+        return np.busday_count(np.asarray(start, dtype="datetime64[D]"), np.asarray(end, dtype="datetime64[D]"),
+                               busdaycal=self.busdaycalendar)
+
+    def reindex(self, data):
+        """
+        Reindexes a date-indexed frame to the business days between its first and last date,
+        carrying the last known row forward over missing days.
+        """
+        data.index = pd.to_datetime(data.index)
+        return data.reindex(self.business_days(data.index.min(), data.index.max()), method="ffill")
+
+def read_holidays(holidays_filepath):
+    # Load the data from the first sheet
+    hdays = pd.read_excel(holidays_filepath, sheet_name="Sheet1")
+
+    # Correct the column name and convert it to pandas datetime objects
+    hdays.rename(columns={"# holiday_date": "holiday_date"}, inplace=True)
+    return pd.to_datetime(hdays["holiday_date"]).dropna().values.astype("datetime64[D]")
+
+_calendars = {}
+_calendars_lock = threading.Lock()
+
+def load_calendar(holidays_filepath):
+    """
+    Returns the TradingCalendar of a holidays workbook.
+    The holidays are compiled once to a .npz file in the data directory, which is rebuilt when the
+    workbook's modification time or size changes; within a process the calendar is kept in memory
+    and only the workbook's stat is checked again.
+    """
+    stat = os.stat(holidays_filepath)
+    source = np.array([stat.st_mtime_ns, stat.st_size], dtype="int64")
+    key = os.path.abspath(holidays_filepath)
+    with _calendars_lock:
+        cached = _calendars.get(key)
+        if cached is not None and np.array_equal(cached[0], source):
+            return cached[1]
+
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+        compiled_path = data_path("calendars", f"{os.path.splitext(os.path.basename(key))[0]}-{digest}.npz")
+        holidays = None
+        if os.path.exists(compiled_path):
+            with np.load(compiled_path) as compiled:
+                if np.array_equal(compiled["source"], source):
+                    holidays = compiled["holidays"]
+        if holidays is None:
+            holidays = read_holidays(holidays_filepath)
+            try:
+                with open(ensure_parent(compiled_path) + ".tmp", "wb") as f:
+                    np.savez(f, holidays=holidays, source=source)
+                os.replace(compiled_path + ".tmp", compiled_path)
+            except OSError:  # read-only location: keep the calendar in memory only
+                pass
+
+        calendar = TradingCalendar(holidays)
+        _calendars[key] = (source, calendar)
+        return calendar
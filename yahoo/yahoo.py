@@ -1,137 +1,125 @@
-import xlwings as xw
-import yfinance as yf
-import pandas as pd
+import argparse
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
 from dateutil.relativedelta import relativedelta
 
+from common.writers import Sheet, export_sheets
+from common import instrument
+from common.lazy import lazy_import
+from yahoo.ticker_cache import TickerCache, TICKER_CACHE_PATH
+from yahoo.trading_calendar import load_calendar
+from yahoo.price_store import PriceStore, PRICE_STORE_DIR
+from yahoo.price_panel import compact_panel
+
+# Loaded on first use, so normalize_ticker and the other helpers import without them
+xw = lazy_import("xlwings")
+yf = lazy_import("yfinance")
+pd = lazy_import("pandas")
+
+# Turkish holidays workbook shipped with the package
+HOLIDAYS_FILEPATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "riskfree_holiday.xlsx")
+
 # Set the default end date to today's date as default
 end = date.today()
 
 # Calculate the default start date, which is one year before the end date as default
 start = end - relativedelta(years=1)
 
-def adjust_for_turkish_business_days(data, holidays_filepath):
-    # Load the data from the first sheet
-    hdays = pd.read_excel(holidays_filepath, sheet_name='Sheet1')
+# Symbol resolutions of earlier runs, opened on first use
+ticker_cache = None
+ticker_cache_lock = threading.Lock()
 
-    # Correct the column name and convert it to pandas datetime objects
-    hdays.rename(columns={'# holiday_date': 'holiday_date'}, inplace=True)
-    hdays['holiday_date'] = pd.to_datetime(hdays['holiday_date'])
+def get_ticker_cache():
+    global ticker_cache
+    with ticker_cache_lock:
+        if ticker_cache is None:
+            ticker_cache = TickerCache(TICKER_CACHE_PATH)
+    return ticker_cache
 
-    # Set the index to date
-    data.index = pd.to_datetime(data.index)
+# Prices downloaded by earlier runs, opened on first use
+price_store = None
 
-    # Reindex to include all business days between the start and end of the data
-    all_days = pd.date_range(start=data.index.min(), end=data.index.max(), freq='B')
-    data = data.reindex(all_days, method='ffill')
-    
-    # Drop rows that are in Turkish holidays
-    data = data[~data.index.isin(hdays['holiday_date'])]
-    
+def get_price_store():
+    global price_store
+    with ticker_cache_lock:
+        if price_store is None:
+            price_store = PriceStore(PRICE_STORE_DIR)
+    return price_store
+
+def download_prices(symbol, start_date, end_date):
+    """
+    Every symbol probe in yf_xw downloads through here; benchmarks point it at a local stand-in.
+    """
+    with instrument.span("yahoo.http_fetch"):
+        data = yf.download(symbol, start_date, end_date, auto_adjust=False, multi_level_index=False, progress=False)
+    instrument.count("yahoo.http_requests")
+    instrument.count("yahoo.downloaded_rows", len(data))
     return data
 
-def yf_xw(ticker, start_date=None, end_date=None, output_path=None, holidays_filepath=None):
-    # Create a new Excel workbook
-    wb = xw.Book()
-    
-    if start_date is None:
-        start_date = start
-    else:
-        start_date = pd.to_datetime(start_date, format="%d.%m.%Y")
-    
-    if end_date is None:
-        end_date = end
-    else:
-        end_date = pd.to_datetime(end_date, format="%d.%m.%Y")
-    
-    ticker = ticker.removeprefix("F_").lower().split()[0]
-     
-    # Debug
-    print("normalized ticker =", ticker)
-    
-    # Try BIST stocks first
-    data = yf.download((ticker.split("_")[0] + ".IS"), start_date, end_date)
-    currency = "TRY"
-    label = "IMKB"
-    data["ASSET_NAME"] = ticker.upper()
-    
-    # Try US stocks and ETFs
-    if len(data) == 0:
-        data = yf.download(ticker.split("_")[0], start_date, end_date)
-        currency = "USD"
-        label = "SP500"
-        
-        if "_us" in ticker:
-            data["ASSET_NAME"] = f"{ticker.upper()}"
-        else:
-            data["ASSET_NAME"] = f"{ticker.upper()}_US"
-    
-    # if data empty, try with "^" symbol as ticker might be a US index
-    if len(data) == 0:
-        data = yf.download(f"^{ticker}", start_date, end_date)
-        currency = "USD"
-        label = "FOR_IND"
-        data["ASSET_NAME"] = ticker.upper()
-    
-    # if data empty again, try futures
-    if len(data) == 0:
-        tickerdict = {
-            "cotton":"CT=F",
-            "sugar":"SB=F",
-            "coffee":"KC=F", 
-            "crude":"CL=F",
-            "woil":"CL=F", 
-            "brent":"BZ=F", 
-            "cattle":"LE=F",
-            "feeder":"LE=F",
-            "cocoa":"CC=F", 
-            "copper":"HG=F",
-            "corn":"ZC=F",
-            "ngas":"NG=F",
-            "natural":"NG=F",
-            "oat":"ZO=F",
-            "platn":"PL=F",
-            "plat":"PL=F",
-            "soybean":"ZS=F",
-            "soy":"ZS=F",
-            "wheat":"KE=F",
-            "kcbt":"KE=F",
-            "silver":"SI=F",
-            "gold":"GC=F",
-            "gc":"GC=F"
-            }
-        
-        for key in tickerdict.keys():
-            if key in ticker:
-                print(f"commodity, key pair found -> {ticker}, {key}" )
-                data = yf.download(tickerdict[key], start_date, end_date)
-                currency = "USD"
-                label = "COMDTY_MARKET"
-                data["ASSET_NAME"] = key.upper()
-                break
-            
-    # if data empty again, try with ".CBT" suffix
-    if len(data) == 0:
-        data = yf.download(f"{ticker}.CBT", start_date, end_date)
-        currency = "USD"
-        label = "COMDTY_MARKET"
-        data["ASSET_NAME"] = ticker.upper()
-        
-    # if data empty again, try with ".CMX" suffix
-    if len(data) == 0:
-        data = yf.download(f"{ticker}.CMX", start_date, end_date)
-        currency = "USD"
-        label = "COMDTY_MARKET"
-        data["ASSET_NAME"] = ticker.upper()
-        
-     # if data empty again, raise ValueError
-    if len(data) == 0:
-        raise ValueError("ticker not found!")
-    
-    # Adjust for Turkish business days:
-    data = adjust_for_turkish_business_days(data, holidays_filepath)
-    
-    # Format adjustments
+def probe_prices(symbol, start_date, end_date):
+    """
+    download_prices for speculative resolution. yf.download keeps module-level state and is not
+    safe to call from several threads, so probes go through a Ticker object each; the frame is
+    brought to the yf.download layout (no dividend/split columns, naive dates) so the winning
+    probe's prices are used as they are.
+    """
+    with instrument.span("yahoo.http_probe"):
+        data = yf.Ticker(symbol).history(start=start_date, end=end_date, auto_adjust=False, actions=False)
+    instrument.count("yahoo.http_requests")
+    instrument.count("yahoo.downloaded_rows", len(data))
+    if len(data) > 0 and data.index.tz is not None:
+        data.index = data.index.tz_localize(None)
+    return data
+
+def existing_symbols(symbols):
+    """
+    The symbols Yahoo has any price history for, from one coarse download without a date range.
+    A ticker is only cached as a miss when none of its candidates exists: a date range can come
+    back empty for a listed symbol too (before its listing, or holidays only).
+    """
+    with instrument.span("yahoo.http_probe"):
+        data = yf.download(symbols, period="max", interval="3mo", group_by="ticker", threads=True, progress=False,
+                           auto_adjust=False, multi_level_index=True)
+    instrument.count("yahoo.http_requests", len(symbols))
+    downloaded = set(data.columns.get_level_values(0)) if len(data.columns) else set()
+    return {symbol for symbol in symbols if symbol in downloaded and len(data[symbol].dropna(how="all")) > 0}
+
+@instrument.timed("yahoo.adjust_for_turkish_business_days")
+def adjust_for_turkish_business_days(data, holidays_filepath):
+    """
+    Reindexes the prices to the Turkish business days between their first and last date,
+    forward filling missing days.
+    """
+    return load_calendar(holidays_filepath).reindex(data)
+
+@instrument.timed("yahoo.adjust_panel_for_turkish_business_days")
+def adjust_panel_for_turkish_business_days(panel, holidays_filepath):
+    """
+    adjust_for_turkish_business_days for a wide panel whose columns are (key, price field) pairs:
+    one reindex and forward fill for all keys, after which every key is cut back to its own
+    first..last date so a short history is not stretched over the range of the others.
+    """
+    panel.index = pd.to_datetime(panel.index)
+    keys = panel.columns.get_level_values(0)
+
+    # Each key's own date range, before filling
+    has_row = panel.notna().T.groupby(level=0, sort=False).any().T
+    first, last = has_row.idxmax(), has_row[::-1].idxmax()
+
+    business_days = load_calendar(holidays_filepath).business_days(panel.index.min(), panel.index.max())
+    panel = panel.reindex(panel.index.union(business_days)).ffill().reindex(business_days)
+
+    days = business_days.values[:, None]
+    in_range = (days >= first[keys].values) & (days <= last[keys].values)
+    return panel.where(in_range)
+
+@instrument.timed("yahoo.frame_build")
+def format_price_frame(data, currency, label):
+    """
+    Maps a yf.download frame (with ASSET_NAME set) to the EOD price sheet columns, indexed by RECORD_DATE.
+    """
     data["CURRENCY_CODE"] = currency
     data["MARKET_NAME"] = label
     data["PRICE_BID"] = data["Adj Close"]
@@ -159,6 +147,264 @@ def yf_xw(ticker, start_date=None, end_date=None, output_path=None, holidays_fil
     
     # Rename the index column to "RECORD_DATE"
     data.rename_axis("RECORD_DATE", inplace=True)
+    
+    return data
+
+def panel_rows(frames, resolutions, holidays_filepath):
+    """
+    Adjusts {ticker: downloaded frame} as one wide panel and formats it back to one row per
+    (date, ticker), ordered by ticker (in frames order) then date, using the resolved
+    (symbol, currency, label, ASSET_NAME) of every ticker.
+    Returns (formatted rows, ticker of each row).
+    """
+    order = list(frames)
+    panel = pd.concat(frames, axis=1)
+    panel = adjust_panel_for_turkish_business_days(panel, holidays_filepath)
+    data = panel.stack(level=0).dropna(how="all")
+    data.index.names = ["RECORD_DATE", "TICKER"]
+    data = data.reset_index(level="TICKER")
+    data["TICKER"] = pd.Categorical(data["TICKER"], categories=order)
+    data = data.sort_values(["TICKER", "RECORD_DATE"], kind="stable")
+    
+    data["ASSET_NAME"] = data["TICKER"].map({ticker: resolutions[ticker][3] for ticker in order}).astype(object)
+    labels = data["TICKER"].map({ticker: resolutions[ticker][2] for ticker in order}).astype(object)
+    currencies = data["TICKER"].map({ticker: resolutions[ticker][1] for ticker in order}).astype(object)
+    tickers = data["TICKER"].astype(object).values
+    return format_price_frame(data, currencies, labels), tickers
+
+def store_rows(data, tickers, resolutions, start_date, end_date, calendar):
+    """
+    Writes the rows of panel_rows to the price store, one update per ticker, and returns
+    {ticker: rows}. Tickers without rows are recorded as covered without data.
+    """
+    store = get_price_store()
+    grouped = {ticker: rows for ticker, rows in data.groupby(tickers, sort=False)}
+    for ticker, resolution in resolutions.items():
+        store.update(resolution[3], grouped.get(ticker), start_date, end_date, calendar)
+    return grouped
+
+@instrument.timed("yahoo.refresh_stored_prices")
+def refresh_stored_prices(resolutions, start_date, end_date, holidays_filepath):
+    """
+    Brings the price store up to date over [start_date, end_date) for {ticker: resolution} of
+    tickers that are stored already, downloading only the missing ranges: tickers with the same
+    missing range share one download_batch call. Returns {ticker: stored rows of the range}.
+    """
+    store = get_price_store()
+    calendar = load_calendar(holidays_filepath)
+    gaps = {}
+    for ticker, resolution in resolutions.items():
+        for gap in store.missing_ranges(resolution[3], start_date, end_date, calendar):
+            gaps.setdefault(gap, []).append(ticker)
+    
+    for (gap_start, gap_end), tickers in gaps.items():
+        symbols = list(dict.fromkeys(resolutions[ticker][0] for ticker in tickers))
+        if len(symbols) > 1:
+            downloads = download_batch(symbols, gap_start, gap_end)
+        else:
+            downloads = {symbol: data for symbol in symbols for data in [download_prices(symbol, gap_start, gap_end)] if len(data) > 0}
+        frames = {ticker: downloads[resolutions[ticker][0]] for ticker in tickers if resolutions[ticker][0] in downloads}
+        gap_resolutions = {ticker: resolutions[ticker] for ticker in tickers}
+        if frames:
+            data, row_tickers = panel_rows(frames, gap_resolutions, holidays_filepath)
+            store_rows(data, row_tickers, gap_resolutions, gap_start, gap_end, calendar)
+        else:
+            for resolution in gap_resolutions.values():
+                store.update(resolution[3], None, gap_start, gap_end, calendar)
+    
+    return {ticker: store.read(resolution[3], start_date, end_date) for ticker, resolution in resolutions.items()}
+
+# Commodity name fragments and their futures symbols, scanned in order by the probe chain
+COMMODITY_SYMBOLS = {
+    "cotton":"CT=F",
+    "sugar":"SB=F",
+    "coffee":"KC=F", 
+    "crude":"CL=F",
+    "woil":"CL=F", 
+    "brent":"BZ=F", 
+    "cattle":"LE=F",
+    "feeder":"LE=F",
+    "cocoa":"CC=F", 
+    "copper":"HG=F",
+    "corn":"ZC=F",
+    "ngas":"NG=F",
+    "natural":"NG=F",
+    "oat":"ZO=F",
+    "platn":"PL=F",
+    "plat":"PL=F",
+    "soybean":"ZS=F",
+    "soy":"ZS=F",
+    "wheat":"KE=F",
+    "kcbt":"KE=F",
+    "silver":"SI=F",
+    "gold":"GC=F",
+    "gc":"GC=F"
+    }
+
+def normalize_ticker(ticker):
+    return ticker.removeprefix("F_").lower().split()[0]
+
+def candidate_symbols(ticker):
+    """
+    The Yahoo symbols a normalized ticker may be listed under, in probe priority order, as
+    (symbol, currency, MARKET_NAME label, ASSET_NAME) tuples.
+    """
+    # BIST stocks first, then US stocks and ETFs, then US indices ("^")
+    candidates = [
+        (ticker.split("_")[0] + ".IS", "TRY", "IMKB", ticker.upper()),
+        (ticker.split("_")[0], "USD", "SP500", f"{ticker.upper()}" if "_us" in ticker else f"{ticker.upper()}_US"),
+        (f"^{ticker}", "USD", "FOR_IND", ticker.upper()),
+    ]
+    
+    # then futures, the first commodity name contained in the ticker
+    for key in COMMODITY_SYMBOLS.keys():
+        if key in ticker:
+            candidates.append((COMMODITY_SYMBOLS[key], "USD", "COMDTY_MARKET", key.upper()))
+            break
+    
+    # then the ".CBT" and ".CMX" suffixes
+    candidates.append((f"{ticker}.CBT", "USD", "COMDTY_MARKET", ticker.upper()))
+    candidates.append((f"{ticker}.CMX", "USD", "COMDTY_MARKET", ticker.upper()))
+    return candidates
+
+def resolution_chain(ticker):
+    """
+    Returns (chain, cached): the candidates to probe for a normalized ticker, with the cached
+    resolution first and the rest of candidate_symbols after it in case it stopped returning data.
+    chain is None if the ticker is a cached miss.
+    """
+    found, resolution = get_ticker_cache().lookup(ticker)
+    if not found:
+        return candidate_symbols(ticker), False
+    if resolution is None:
+        return None, True
+    instrument.count("yahoo.ticker_cache_hits")
+    return [resolution] + [candidate for candidate in candidate_symbols(ticker) if candidate != resolution], True
+
+# Candidates probed at the same time, in priority order from the first one still undecided
+PROBE_WORKERS = 4
+
+@instrument.timed("yahoo.probe_speculatively")
+def probe_speculatively(chain, start_date, end_date, workers=PROBE_WORKERS):
+    """
+    Probes the candidates of chain concurrently over the whole date range and returns
+    (candidate, prices) of the highest-priority candidate that had data, or None: the same
+    symbol the serial chain would pick, with its prices, so the winner is not downloaded again.
+    At most workers candidates are in flight, counted from the first one still undecided: the
+    next candidate is only started once a candidate before it came back empty, and none is
+    started while a probe in flight already has data. Probes still running when the winner is
+    known cannot be interrupted and finish in the background.
+    """
+    executor = ThreadPoolExecutor(max_workers=workers)
+    probes = []
+    
+    def has_data(probe):
+        return probe.done() and probe.exception() is None and len(probe.result()) > 0
+    
+    try:
+        for first, candidate in enumerate(chain):
+            while len(probes) < min(first + workers, len(chain)) and not any(has_data(probe) for probe in probes[first:]):
+                probes.append(executor.submit(probe_prices, chain[len(probes)][0], start_date, end_date))
+            try:
+                data = probes[first].result()
+            except Exception:
+                continue
+            if len(data) > 0:
+                return candidate, data
+        return None
+    finally:
+        executor.shutdown(wait=False)
+
+def sheet_name_for(label):
+    """
+    Sheet a MARKET_NAME label is written to.
+    """
+    if label == "SP500":
+        return "EQUITY"
+    elif label == "FOR_IND":
+        return "INDEX"
+    else:
+        return "COMMODITY"
+
+def parse_date_range(start_date, end_date):
+    """
+    "dd.mm.yyyy" start/end dates, defaulting to the last year.
+    """
+    start_date = start if start_date is None else pd.to_datetime(start_date, format="%d.%m.%Y")
+    end_date = end if end_date is None else pd.to_datetime(end_date, format="%d.%m.%Y")
+    return start_date, end_date
+
+@instrument.timed("yahoo.yf_xw")
+def yf_xw(ticker, start_date=None, end_date=None, output_path=None, holidays_filepath=HOLIDAYS_FILEPATH, backend="xlwings", probe="serial"):
+    """
+    Downloads the ticker's price history and writes it to an EQUITY/INDEX/COMMODITY sheet.
+    backend "xlwings" fills a live Excel workbook; "xlsx", "parquet" and "csv" write files
+    headless through common.writers and need output_path.
+    probe "speculative" resolves a ticker that is not in the ticker cache with concurrent
+    probes of its candidates (probe_speculatively) and keeps the winner's prices; when no
+    probe finds data it falls back to the serial chain.
+    """
+    if backend != "xlwings" and output_path is None:
+        raise ValueError(f"output_path is required for the {backend} backend.")
+    
+    start_date, end_date = parse_date_range(start_date, end_date)
+    
+    ticker = normalize_ticker(ticker)
+     
+    # Debug
+    print("normalized ticker =", ticker)
+    
+    # Probe the candidates one by one until a download returns data
+    chain, cached = resolution_chain(ticker)
+    if chain is None:
+        raise ValueError("ticker not found! (cached, see ticker_cache.py invalidate)")
+    probed = None
+    if probe == "speculative" and not cached:
+        probed = probe_speculatively(chain, start_date, end_date)
+    store = get_price_store()
+    if cached and store.has(chain[0][3]):
+        # Known ticker: only the dates the price store is missing are downloaded
+        symbol, currency, label, asset_name = chain[0]
+        data = refresh_stored_prices({ticker: chain[0]}, start_date, end_date, holidays_filepath)[ticker]
+        if len(data) == 0:
+            raise ValueError("ticker not found!")
+    else:
+        if probed is not None:
+            (symbol, currency, label, asset_name), data = probed
+        else:
+            for symbol, currency, label, asset_name in chain:
+                data = download_prices(symbol, start_date, end_date)
+                if len(data) > 0:
+                    break
+        
+         # if data empty again, raise ValueError; a cached resolution is kept either way
+        if len(data) == 0:
+            if cached or existing_symbols([candidate[0] for candidate in chain]):
+                raise ValueError("ticker has no prices in the date range!")
+            get_ticker_cache().store(ticker, None)
+            raise ValueError("ticker not found!")
+        get_ticker_cache().store(ticker, (symbol, currency, label, asset_name))
+        data["ASSET_NAME"] = asset_name
+        
+        # Adjust for Turkish business days:
+        data = adjust_for_turkish_business_days(data, holidays_filepath)
+        
+        # Format adjustments
+        data = format_price_frame(data, currency, label)
+        store.update(asset_name, data, start_date, end_date, load_calendar(holidays_filepath))
+    
+    # Set sheet name based on the label
+    sheet_name = sheet_name_for(label)
+    
+    instrument.count("yahoo.rows", len(data))
+    if backend != "xlwings":
+        with instrument.span("yahoo.export"):
+            paths = export_sheets([Sheet(sheet_name, data, {})], output_path + f"{ticker}" + f"_{date.today()}", backend)
+        print("Export successful:", ", ".join(paths))
+        return paths
+    
+    # Create a new Excel workbook
+    wb = xw.Book()
                 
     # Write dataframe to Excel
     wb.sheets[0].range("A1").value = data
@@ -170,25 +416,166 @@ def yf_xw(ticker, start_date=None, end_date=None, output_path=None, holidays_fil
     # Resize columns for readability
     wb.sheets[0].autofit()
     
-    # Set sheet name based on the label
-    if label == "SP500":
-        sheet_name = "EQUITY"
-    elif label == "FOR_IND":
-        sheet_name = "INDEX"
-    else:
-        sheet_name = "COMMODITY"
     wb.sheets[0].name = sheet_name
     
     # Save the Excel workbook
     if output_path != None:
         wb.save(output_path + f"{ticker}" + f"_{date.today()}" + ".xlsx")
         wb.close()
+
+
+def download_batch(symbols, start_date, end_date):
+    """
+    Downloads several symbols in one yf.download call with its thread pool and returns
+    {symbol: price frame} for the symbols that returned data.
+    """
+    with instrument.span("yahoo.http_fetch"):
+        data = yf.download(symbols, start_date, end_date, group_by="ticker", threads=True, progress=False,
+                           auto_adjust=False, multi_level_index=True)
+    instrument.count("yahoo.http_requests", len(symbols))
+    
+    frames = {}
+    downloaded = set(data.columns.get_level_values(0)) if len(data.columns) else set()
+    for symbol in symbols:
+        if symbol in downloaded:
+            frame = data[symbol].dropna(how="all")
+            if len(frame) > 0:
+                frames[symbol] = frame
+    instrument.count("yahoo.downloaded_rows", sum(len(frame) for frame in frames.values()))
+    return frames
+
+def resolve_batch(tickers, start_date, end_date):
+    """
+    Runs the probe chain of every normalized ticker stage by stage: each stage downloads the next
+    candidate of all still unresolved tickers in one download_batch call, so priorities are kept
+    per ticker. Tickers in the ticker cache start from their cached symbol.
+    Returns {ticker: (frame, (symbol, currency, label, ASSET_NAME))} for the resolved tickers.
+    Unresolved tickers are cached as misses only if none of their candidates exists at all;
+    a cached resolution is never replaced by a miss.
+    """
+    chains, cached = {}, {}
+    for ticker in tickers:
+        chains[ticker], cached[ticker] = resolution_chain(ticker)
+    resolved = {}
+    pending = [ticker for ticker in tickers if chains[ticker] is not None]
+    stage = 0
+    while pending:
+        wanted = {ticker: chains[ticker][stage] for ticker in pending if stage < len(chains[ticker])}
+        if not wanted:
+            break
+        frames = download_batch(list(dict.fromkeys(candidate[0] for candidate in wanted.values())), start_date, end_date)
+        for ticker, candidate in wanted.items():
+            if candidate[0] in frames:
+                resolved[ticker] = (frames[candidate[0]], candidate)
+        pending = [ticker for ticker in wanted if ticker not in resolved]
+        stage += 1
+    
+    cache = get_ticker_cache()
+    for ticker in resolved:
+        cache.store(ticker, resolved[ticker][1])
+    unresolved = [ticker for ticker in tickers if ticker not in resolved and chains[ticker] is not None and not cached[ticker]]
+    if unresolved:
+        exists = existing_symbols(list(dict.fromkeys(candidate[0] for ticker in unresolved for candidate in chains[ticker])))
+        for ticker in unresolved:
+            if not any(candidate[0] in exists for candidate in chains[ticker]):
+                cache.store(ticker, None)
+    return resolved
+
+def batch_rows(tickers, start_date, end_date, holidays_filepath):
+    """
+    The price rows of a list of tickers in the sheet layout, ordered by ticker then date: symbols
+    are resolved with bulk downloads and the business-day adjustment and column mapping run once
+    on the whole panel. Tickers whose symbol is cached and whose prices are in the price store
+    only download the missing date ranges (refresh_stored_prices); the rows of the others are
+    added to the store. Returns (rows or None, tickers that were not found).
+    """
+    start_date, end_date = parse_date_range(start_date, end_date)
+    tickers = list(dict.fromkeys(normalize_ticker(ticker) for ticker in tickers))
+    
+    store = get_price_store()
+    stored = {}
+    for ticker in tickers:
+        resolution = get_ticker_cache().lookup(ticker)[1]
+        if resolution is not None and store.has(resolution[3]):
+            stored[ticker] = resolution
+    frames = {ticker: rows for ticker, rows in refresh_stored_prices(stored, start_date, end_date, holidays_filepath).items() if len(rows) > 0}
+    
+    resolved = resolve_batch([ticker for ticker in tickers if ticker not in stored], start_date, end_date)
+    missing = [ticker for ticker in tickers if ticker not in resolved and ticker not in frames]
+    if missing:
+        print(f"{len(missing)} tickers not found: {', '.join(missing)}")
+    
+    if resolved:
+        # One wide panel keyed by ticker, adjusted at once, then back to one row per (date, ticker)
+        order = [ticker for ticker in tickers if ticker in resolved]
+        resolutions = {ticker: resolved[ticker][1] for ticker in order}
+        data, row_tickers = panel_rows({ticker: resolved[ticker][0] for ticker in order}, resolutions, holidays_filepath)
+        frames.update(store_rows(data, row_tickers, resolutions, start_date, end_date, load_calendar(holidays_filepath)))
+    
+    if not frames:
+        return None, missing
+    order = [ticker for ticker in tickers if ticker in frames]
+    data = pd.concat([frames[ticker] for ticker in order])
+    instrument.count("yahoo.rows", len(data))
+    return data, missing
+
+@instrument.timed("yahoo.yf_batch")
+def yf_batch(tickers, start_date=None, end_date=None, output_path=None, holidays_filepath=HOLIDAYS_FILEPATH, backend="xlsx"):
+    """
+    yf_xw for a list of tickers (see batch_rows): one output is written per sheet type
+    (EQUITY/INDEX/COMMODITY) with a common.writers backend.
+    Returns (written paths, tickers that were not found).
+    """
+    if output_path is None:
+        raise ValueError("output_path is required for yf_batch.")
+    
+    data, missing = batch_rows(tickers, start_date, end_date, holidays_filepath)
+    if data is None:
+        return [], missing
+    
+    paths = []
+    sheet_names = data["MARKET_NAME"].map(sheet_name_for)
+    with instrument.span("yahoo.export"):
+        for sheet_name in ["EQUITY", "INDEX", "COMMODITY"]:
+            sheet = data[(sheet_names == sheet_name).values]
+            if len(sheet) > 0:
+                paths += export_sheets([Sheet(sheet_name, sheet, {})], output_path + f"{sheet_name}_{date.today()}", backend)
+    print("Export successful:", ", ".join(paths))
+    return paths, missing
+
+@instrument.timed("yahoo.yf_panel")
+def yf_panel(tickers, start_date=None, end_date=None, holidays_filepath=HOLIDAYS_FILEPATH, price_dtype="float64"):
+    """
+    The prices of a list of tickers (see batch_rows) as one compact panel indexed by
+    (RECORD_DATE, ASSET_NAME), with categorical string columns and price_dtype prices
+    (price_panel.compact_panel). Write it with price_panel.write_panel for Parquet or Arrow output.
+    Returns (panel or None, tickers that were not found).
+    """
+    data, missing = batch_rows(tickers, start_date, end_date, holidays_filepath)
+    if data is None:
+        return None, missing
+    return compact_panel(data, price_dtype), missing
         
         
-# Run code
-holidays_filepath = r"C:\Users\adevr\ra_forecaster\yahoo\riskfree_holiday.xlsx"
-output_path = r"C:\\Users\\adevr\\OneDrive\\Belgeler\\Riskactive Portföy\\Historical data\\"
+def main():
+    parser = argparse.ArgumentParser(description="EOD prices of tickers from Yahoo Finance, adjusted to Turkish business days.")
+    parser.add_argument("tickers", nargs="+", help="one ticker runs yf_xw, several run yf_batch")
+    parser.add_argument("--start", help="dd.mm.yyyy, default one year ago")
+    parser.add_argument("--end", help="dd.mm.yyyy, default today")
+    parser.add_argument("--output", help="output directory/prefix; required unless --backend xlwings")
+    parser.add_argument("--holidays", default=HOLIDAYS_FILEPATH, help="holidays workbook (default yahoo/riskfree_holiday.xlsx)")
+    parser.add_argument("--backend", choices=["xlwings", "xlsx", "parquet", "csv"],
+                        help="default xlwings for one ticker, xlsx for several")
+    parser.add_argument("--probe", default="serial", choices=["serial", "speculative"])
+    args = parser.parse_args()
 
-ticker = "F_RTYU24"
+    if len(args.tickers) == 1:
+        yf_xw(args.tickers[0], args.start, args.end, args.output, args.holidays,
+              backend=args.backend or "xlwings", probe=args.probe)
+    else:
+        yf_batch(args.tickers, args.start, args.end, args.output, args.holidays, backend=args.backend or "xlsx")
+    instrument.flush()
 
-yf_xw(ticker, output_path=output_path, holidays_filepath=holidays_filepath)
\ No newline at end of file
+# Run code
+if __name__ == "__main__":
+    main()